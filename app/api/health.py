@@ -0,0 +1,37 @@
+import asyncio
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from ..core.config import get_settings
+from ..database import get_session_factory, pool_stats
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.get("/health/ready")
+async def readiness(request: Request, session_factory=Depends(get_session_factory)):
+    """200 once startup has finished and the database answers; 503 otherwise.
+
+    Reports pool telemetry either way, so a worker stuck waiting on pool
+    checkout shows up here rather than as slow requests.
+    """
+    checks = {"startup": "ok" if getattr(request.app.state, "ready", False) else "pending"}
+
+    async def ping():
+        async with session_factory() as db:
+            await db.execute(select(1))
+
+    try:
+        await asyncio.wait_for(ping(), settings.health_check_timeout)
+        checks["database"] = "ok"
+    except asyncio.TimeoutError:
+        checks["database"] = "timeout"
+    except Exception:
+        checks["database"] = "error"
+
+    ready = all(check == "ok" for check in checks.values())
+    return JSONResponse(
+        {"status": "ready" if ready else "unavailable", "checks": checks, "pool": pool_stats()},
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
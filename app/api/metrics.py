@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+from ..core.metrics import collect_stats
+from ..core.prometheus import CONTENT_TYPE, render
+from ..core.telemetry import request_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape target; unauthenticated, so keep it off public ingress."""
+    return Response(render(request_metrics, collect_stats()), media_type=CONTENT_TYPE)
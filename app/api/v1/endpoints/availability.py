@@ -0,0 +1,64 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from ....core.config import get_settings
+from ....database import get_session_factory
+from ....models.event import Event as EventModel
+from ....services.availability import availability, availability_message, sse_stream
+
+router = APIRouter()
+settings = get_settings()
+
+
+async def _event_exists(session_factory, event_id: int) -> bool:
+    async with session_factory() as db:
+        return await db.scalar(select(EventModel.id).where(EventModel.id == event_id)) is not None
+
+
+@router.get("/events/{event_id:int}/availability/stream", response_class=StreamingResponse)
+async def stream_availability(event_id: int, session_factory=Depends(get_session_factory)):
+    """Server-Sent Events with the event's available tickets.
+
+    Sends the current count on connect, then at most one ``availability``
+    event per AVAILABILITY_STREAM_INTERVAL while it changes. The stream
+    ends with ``{"deleted": true}`` if the event is deleted.
+    """
+    if not await _event_exists(session_factory, event_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if availability.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many availability streams, please poll",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        sse_stream(session_factory, event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/{event_id:int}/availability/ws")
+async def availability_socket(
+    websocket: WebSocket, event_id: int, session_factory=Depends(get_session_factory)
+):
+    """The same updates as the SSE stream, as JSON messages."""
+    if availability.full() or not await _event_exists(session_factory, event_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    try:
+        async with availability.subscribe(session_factory, event_id) as subscription:
+            while True:
+                try:
+                    value = await subscription.next(settings.availability_keepalive)
+                except asyncio.TimeoutError:
+                    await websocket.send_json({"event_id": event_id, "keepalive": True})
+                    continue
+                await websocket.send_json(availability_message(event_id, value))
+                if value is None:
+                    await websocket.close()
+                    return
+    except WebSocketDisconnect:
+        pass
@@ -1,45 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
-from ....database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from ....database import get_db, get_read_db, get_session_factory
 from ....models.booking import Booking as BookingModel
 from ....models.event import Event as EventModel
-from ....schemas.booking import Booking, BookingCreate, BookingWithDetails
-from ....core.security import get_current_user, get_current_admin
+from ....schemas.booking import (
+    Booking,
+    BookingBatchCreate,
+    BookingCreate,
+    BookingPage,
+    BookingWithDetails,
+    serialize_booking,
+    serialize_booking_details,
+)
+from ....schemas.event import serialize_event
+from ....core.config import get_settings
+from ....core.idempotency import IdempotentRoute
+from ....core.responses import etag_response, fast_response
+from ....core.pagination import MAX_PAGE_SIZE, keyset, page
+from ....core.security import CurrentUser, get_current_user, get_current_admin
+from ....services.event_cache import invalidate_availability
+from ....services.flash_sale import flash_sales
+from ....services.idempotency import idempotent
+from ....services.outbox import BOOKING_CANCELLED, booking_message, outbox
+from ....services.export import MEDIA_TYPES, export_query, stream_export
+from ....services.rollups import record_sales
+from ....services.inventory import (
+    booking_failure,
+    insert_bookings,
+    release_tickets,
+    reserve_many,
+    reserve_tickets,
+)
 from ....models.user import User
 from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
+settings = get_settings()
 
 
-# Admin
-@router.get(
-    "/admin/booking",
-    response_model=List[BookingWithDetails],
-    dependencies=[Depends(get_current_admin)],
-)
-async def get_all_bookings(
-    db: Session = Depends(get_db), skip: int = 0, limit: int = 100
-):
-    bookings_data = (
-        db.query(
+def _bookings_with_details():
+    return (
+        select(
             BookingModel.id,
             BookingModel.event_id,
             BookingModel.user_id,
             User.email.label("user_email"),
             BookingModel.number_of_tickets.label("num_tickets"),
-            (BookingModel.number_of_tickets * EventModel.price).label("total_price"),
+            (BookingModel.number_of_tickets * BookingModel.unit_price).label("total_price"),
             BookingModel.booking_date,
             EventModel,
         )
         .join(User, BookingModel.user_id == User.id)
         .join(EventModel, BookingModel.event_id == EventModel.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
 
+
+def _with_details(bookings_data):
     result = []
     for booking in bookings_data:
         result.append(
@@ -54,18 +73,146 @@ async def get_all_bookings(
                 "event": booking[7],
             }
         )
-
     return result
 
 
+def _compact_bookings():
+    return select(
+        BookingModel.id,
+        BookingModel.event_id,
+        BookingModel.user_id,
+        BookingModel.number_of_tickets.label("num_tickets"),
+        (BookingModel.number_of_tickets * BookingModel.unit_price).label("total_price"),
+        BookingModel.booking_date,
+    )
+
+
+async def _normalized(db, bookings_data, emails=None):
+    """Build a BookingPage payload from compact rows.
+
+    Each referenced event is loaded once with an IN query instead of being
+    joined into every row.
+    """
+    event_ids = {booking.event_id for booking in bookings_data}
+    events = {}
+    if event_ids:
+        events = {
+            event.id: event
+            for event in await db.scalars(
+                select(EventModel).where(EventModel.id.in_(event_ids))
+            )
+        }
+    if emails is None:
+        user_ids = {booking.user_id for booking in bookings_data}
+        emails = {}
+        if user_ids:
+            emails = dict(
+                (await db.execute(select(User.id, User.email).where(User.id.in_(user_ids)))).all()
+            )
+    return {
+        "bookings": [
+            {
+                "id": booking.id,
+                "event_id": booking.event_id,
+                "user_id": booking.user_id,
+                "num_tickets": booking.num_tickets,
+                "total_price": booking.total_price,
+                "booking_date": booking.booking_date,
+            }
+            for booking in bookings_data
+        ],
+        # JSON object keys are strings.
+        "events": {str(event_id): serialize_event(event) for event_id, event in events.items()},
+        "users": {str(user_id): email for user_id, email in emails.items()},
+    }
+
+
+def _booking_key(booking):
+    return booking.booking_date, booking.id
+
+
+# Admin
+@router.get(
+    "/admin/booking",
+    response_model=Union[List[BookingWithDetails], BookingPage],
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_all_bookings(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    view: str = Query("full", pattern="^(full|normalized)$"),
+):
+    stmt = _compact_bookings() if view == "normalized" else _bookings_with_details()
+    if skip is not None:
+        # Legacy offset paging; deep offsets scan every skipped row.
+        stmt = stmt.order_by(BookingModel.booking_date, BookingModel.id)
+        bookings_data = (await db.execute(stmt.offset(skip).limit(limit))).all()
+    else:
+        stmt = keyset(
+            stmt, "bookings", BookingModel.booking_date, BookingModel.id, cursor
+        )
+        bookings_data = page(
+            (await db.execute(stmt.limit(limit + 1))).all(),
+            limit,
+            "bookings",
+            _booking_key,
+            response,
+        )
+
+    if view == "normalized":
+        return fast_response(await _normalized(db, bookings_data), response)
+    return fast_response(
+        _with_details(bookings_data), response, serialize_booking_details
+    )
+
+
+@router.get(
+    "/admin/booking/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(get_current_admin)],
+)
+async def export_bookings(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    event_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    session_factory=Depends(get_session_factory),
+):
+    stmt = export_query(event_id, date_from, date_to)
+    return StreamingResponse(
+        stream_export(session_factory, stmt, export_format, settings.export_batch_size),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="bookings.{export_format}"'
+        },
+    )
+
+
 @router.get(
     "/admin/events/{event_id}/booking",
     response_model=List[Booking],
     dependencies=[Depends(get_current_admin)],
 )
-async def get_event_bookings(event_id: int, db: Session = Depends(get_db)):
-    bookings = db.query(BookingModel).filter(BookingModel.event_id == event_id).all()
-    return bookings
+async def get_event_bookings(
+    event_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    stmt = keyset(
+        select(BookingModel).where(BookingModel.event_id == event_id),
+        "bookings",
+        BookingModel.booking_date,
+        BookingModel.id,
+        cursor,
+    )
+    bookings = (await db.scalars(stmt.limit(limit + 1))).all()
+    bookings = page(bookings, limit, "bookings", _booking_key, response)
+    return fast_response(bookings, response, serialize_booking)
 
 
 # User
@@ -73,133 +220,244 @@ async def get_event_bookings(event_id: int, db: Session = Depends(get_db)):
     "/events/{event_id}/book",
     response_model=Booking,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotent)],
 )
 async def book_event(
     event_id: int,
     booking: BookingCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    session_factory=Depends(get_session_factory),
 ):
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+    if await flash_sales.is_flash_sale(db, event_id):
+        return await flash_sales.book(
+            session_factory, event_id, current_user.id, booking.number_of_tickets
         )
 
-    if event.date < datetime.now():
+    try:
+        price = await reserve_tickets(db, event_id, booking.number_of_tickets)
+        reserved = price is not None
+        if reserved:
+            (db_booking,) = await insert_bookings(
+                db,
+                [
+                    {
+                        "user_id": current_user.id,
+                        "event_id": event_id,
+                        "number_of_tickets": booking.number_of_tickets,
+                    }
+                ],
+                {event_id: price},
+            )
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot book tickets for past events",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating booking",
         )
 
-    if event.available_tickets < booking.number_of_tickets:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Not enough tickets available",
-        )
+    if not reserved:
+        await db.rollback()
+        raise await booking_failure(db, event_id)
 
-    try:
-        db_booking = BookingModel(
-            user_id=current_user.id,
-            event_id=event_id,
-            number_of_tickets=booking.number_of_tickets,
-        )
+    await invalidate_availability(event_id)
+    return db_booking
 
-        event.available_tickets -= booking.number_of_tickets
 
-        db.add(db_booking)
-        db.commit()
-        db.refresh(db_booking)
+@router.post(
+    "/bookings/batch",
+    response_model=List[Booking],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotent)],
+)
+async def book_events(
+    batch: BookingBatchCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    tickets = {}
+    for item in batch.bookings:
+        tickets[item.event_id] = tickets.get(item.event_id, 0) + item.number_of_tickets
 
-        return db_booking
+    try:
+        # Lock the rows in id order so overlapping carts cannot deadlock.
+        events = {
+            event.id: event
+            for event in await db.execute(
+                select(EventModel.id, EventModel.date, EventModel.available_tickets, EventModel.price)
+                .where(EventModel.id.in_(tickets))
+                .order_by(EventModel.id)
+                .with_for_update()
+            )
+        }
+        reserved = len(events) == len(tickets) and await reserve_many(db, tickets)
+        if reserved:
+            db_bookings = await insert_bookings(
+                db,
+                [
+                    {
+                        "user_id": current_user.id,
+                        "event_id": item.event_id,
+                        "number_of_tickets": item.number_of_tickets,
+                    }
+                    for item in batch.bookings
+                ],
+                # Locked above, so still the prices the tickets are reserved at.
+                {event_id: event.price for event_id, event in events.items()},
+            )
+            await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating booking",
         )
 
+    if not reserved:
+        await db.rollback()
+        for event_id in sorted(tickets):
+            event = events.get(event_id)
+            if not event:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Event {event_id} not found",
+                )
+            if event.date < datetime.now():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Cannot book tickets for past event {event_id}",
+                )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Not enough tickets available",
+        )
+
+    for event_id in tickets:
+        await invalidate_availability(event_id)
+    return db_bookings
+
 
-@router.delete("/events/{event_id}/cancel")
+@router.delete(
+    "/events/{event_id}/cancel",
+    response_model=Booking,
+    dependencies=[Depends(idempotent)],
+)
 async def cancel_booking(
     event_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    booking = (
-        db.query(BookingModel)
-        .filter(
+    booking = await db.scalar(
+        select(BookingModel).where(
             and_(
                 BookingModel.event_id == event_id,
                 BookingModel.user_id == current_user.id,
             )
         )
-        .first()
     )
 
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found"
         )
-
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
-
-    if event.date < datetime.now():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot cancel bookings for past events",
-        )
+    db.expunge(booking)
 
     try:
-        event.available_tickets += booking.number_of_tickets
-
-        db.delete(booking)
-        db.commit()
-
-        return booking
+        # Deleting by id first means two concurrent cancels of the same
+        # booking cannot both restore its tickets.
+        deleted = (
+            await db.execute(
+                delete(BookingModel)
+                .where(BookingModel.id == booking.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).rowcount == 1
+        released = deleted and await release_tickets(
+            db, event_id, booking.number_of_tickets
+        )
+        if released:
+            await record_sales(
+                db,
+                [
+                    (
+                        event_id,
+                        booking.booking_date.date(),
+                        -booking.number_of_tickets,
+                        -booking.number_of_tickets * booking.unit_price,
+                        -1,
+                    )
+                ],
+            )
+            await outbox.enqueue(db, BOOKING_CANCELLED, [booking_message(booking)])
+            await db.commit()
+        else:
+            await db.rollback()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error cancelling booking",
         )
 
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found"
+        )
+
+    if not released:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot cancel bookings for past events",
+        )
+
+    await invalidate_availability(event_id)
+    return booking
+
 
-@router.post("/events/history", response_model=List[BookingWithDetails])
+@router.get(
+    "/events/history",
+    response_model=Union[List[BookingWithDetails], BookingPage],
+)
+@router.post(
+    "/events/history",
+    response_model=Union[List[BookingWithDetails], BookingPage],
+    deprecated=True,
+)
 async def get_booking_history(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    view: str = Query("full", pattern="^(full|normalized)$"),
 ):
-    bookings_data = (
-        db.query(
-            BookingModel.id,
-            BookingModel.event_id,
-            BookingModel.user_id,
-            User.email.label("user_email"),
-            BookingModel.number_of_tickets.label("num_tickets"),
-            (BookingModel.number_of_tickets * EventModel.price).label("total_price"),
-            BookingModel.booking_date,
-            EventModel,
-        )
-        .join(User, BookingModel.user_id == User.id)
-        .join(EventModel, BookingModel.event_id == EventModel.id)
-        .filter(BookingModel.user_id == current_user.id)
-        .order_by(BookingModel.booking_date.desc())
-        .all()
+    """The caller's bookings, newest first, with an ETag for revalidation."""
+    if view == "normalized":
+        stmt = _compact_bookings().where(BookingModel.user_id == current_user.id)
+    else:
+        stmt = _bookings_with_details().where(BookingModel.user_id == current_user.id)
+    stmt = keyset(
+        stmt,
+        "history",
+        BookingModel.booking_date,
+        BookingModel.id,
+        cursor,
+        descending=True,
+    )
+    bookings_data = page(
+        (await db.execute(stmt.limit(limit + 1))).all(),
+        limit,
+        "history",
+        _booking_key,
+        response,
     )
 
-    result = []
-    for booking in bookings_data:
-        result.append(
-            {
-                "id": booking.id,
-                "event_id": booking.event_id,
-                "user_id": booking.user_id,
-                "user_email": booking.user_email,
-                "num_tickets": booking.num_tickets,
-                "total_price": booking.total_price,
-                "booking_date": booking.booking_date,
-                "event": booking[7],
-            }
+    if view == "normalized":
+        content = await _normalized(
+            db, bookings_data, {current_user.id: current_user.email}
         )
-
-    return result
+        return etag_response(request, content, response, BookingPage)
+    content = [serialize_booking_details(b) for b in _with_details(bookings_data)]
+    return etag_response(request, content, response, List[BookingWithDetails])
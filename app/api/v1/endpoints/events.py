@@ -1,25 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
-from ....database import get_db
+from ....database import get_db, get_read_db, reads_own_writes
 from ....models.event import Event as EventModel
-from ....schemas.event import Event, EventCreate, EventUpdate
+from ....schemas.event import Event, EventCreate, EventImportResult, EventUpdate, serialize_event
+from ....core.responses import fast_response
+from ....core.config import get_settings
+from ....core.idempotency import IdempotentRoute
+from ....core.pagination import MAX_PAGE_SIZE, keyset, set_next_cursor, split_page
 from ....core.security import get_current_admin
+from ....services.event_import import csv_records, import_events, json_records
+from ....services.flash_sale import flash_sales
+from ....services.idempotency import idempotent
+from ....services.search import search_events, search_terms
+from ....services.event_cache import (
+    EVENT_LISTINGS,
+    event_cache,
+    event_namespace,
+    invalidate_event,
+    invalidate_listings,
+)
 from ....models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
+settings = get_settings()
+
+
+async def _event_page(db, stmt, cursor, skip, limit):
+    """Return one page of events and the cursor of the next page, if any."""
+    if skip is not None:
+        # Legacy offset paging; deep offsets scan every skipped row.
+        stmt = stmt.order_by(EventModel.date, EventModel.id).offset(skip).limit(limit)
+        return (await db.scalars(stmt)).all(), None
+
+    stmt = keyset(stmt, "events", EventModel.date, EventModel.id, cursor)
+    events = (await db.scalars(stmt.limit(limit + 1))).all()
+    return split_page(events, limit, "events", lambda event: (event.date, event.id))
+
 
 # Admin
 @router.post(
     "/admin/events",
     response_model=Event,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_current_admin)]
+    dependencies=[Depends(get_current_admin), Depends(idempotent)]
 )
 async def create_event(
     event: EventCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_event = EventModel(
         **event.model_dump(),
@@ -33,76 +63,137 @@ async def create_event(
         )
     db.add(db_event)
     try:
-        db.commit()
-        db.refresh(db_event)
+        await db.commit()
+        await db.refresh(db_event)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating event"
         )
+    await invalidate_listings()
     return db_event
 
+@router.post(
+    "/admin/events/bulk",
+    response_model=EventImportResult,
+    dependencies=[Depends(get_current_admin), Depends(idempotent)]
+)
+async def import_events_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Import events from a JSON array or CSV (raw ``text/csv`` body or a
+    multipart ``file`` upload), reporting invalid rows instead of failing."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        upload = (await request.form()).get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Missing CSV file"
+            )
+
+        async def chunks():
+            while chunk := await upload.read(65536):
+                yield chunk
+
+        records = csv_records(chunks())
+    elif content_type.startswith("text/csv"):
+        records = csv_records(request.stream())
+    elif content_type.startswith("application/json"):
+        records = json_records(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send a JSON array or CSV"
+        )
+
+    result = await import_events(db, records, settings.event_import_chunk_size)
+    if result["created"]:
+        await invalidate_listings()
+    return result
+
 @router.put(
     "/admin/events/{event_id}",
     response_model=Event,
-    dependencies=[Depends(get_current_admin)]
+    dependencies=[Depends(get_current_admin), Depends(idempotent)]
 )
 async def update_event(
     event_id: int,
     event_update: EventUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not db_event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
+    values = event_update.model_dump(exclude_unset=True)
+    stmt = update(EventModel).where(EventModel.id == event_id)
+    if "total_tickets" in values:
+        # Shift availability by the change in capacity within the UPDATE, so
+        # bookings committed since the event was read are not overwritten,
+        # and never below the tickets already sold.
+        available = EventModel.available_tickets + (
+            values["total_tickets"] - EventModel.total_tickets
         )
-    
-    update_data = event_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        if key == "total_tickets":
-            ticket_difference = value - db_event.total_tickets
-            db_event.available_tickets += ticket_difference
-        setattr(db_event, key, value)
+        stmt = stmt.where(available >= 0)
+        values["available_tickets"] = available
 
     try:
-        db.commit()
-        db.refresh(db_event)
+        if values:
+            db_event = await db.scalar(
+                stmt.values(**values)
+                .returning(EventModel)
+                .execution_options(populate_existing=True)
+            )
+        else:
+            db_event = await db.scalar(select(EventModel).where(EventModel.id == event_id))
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating event"
         )
+
+    if not db_event:
+        if await db.scalar(select(EventModel.id).where(EventModel.id == event_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="total_tickets is below the number of tickets already booked"
+        )
+    await invalidate_event(event_id)
+    flash_sales.forget(event_id)
     return db_event
 
 @router.delete(
     "/admin/events/{event_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_current_admin)]
+    dependencies=[Depends(get_current_admin), Depends(idempotent)]
 )
 async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not db_event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
-        )
-    
     try:
-        db.delete(db_event)
-        db.commit()
+        deleted = await db.execute(
+            delete(EventModel).where(EventModel.id == event_id)
+        )
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting event"
         )
+    if deleted.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    await invalidate_event(event_id)
+    flash_sales.forget(event_id)
     return None
 
 @router.get(
@@ -111,35 +202,93 @@ async def delete_event(
     dependencies=[Depends(get_current_admin)]
 )
 async def get_all_events_admin(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
 ):
-    events = db.query(EventModel).offset(skip).limit(limit).all()
-    return events
+    events, next_cursor = await _event_page(db, select(EventModel), cursor, skip, limit)
+    set_next_cursor(response, next_cursor)
+    return fast_response(events, response, serialize_event)
 
 # User
 @router.get("/events", response_model=List[Event])
 async def get_available_events(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
 ):
-    events = db.query(EventModel).filter(
-        EventModel.available_tickets > 0,
-        EventModel.date > datetime.now()
-    ).offset(skip).limit(limit).all()
-    return events 
+    async def load():
+        stmt = select(EventModel).where(
+            EventModel.available_tickets > 0,
+            EventModel.date > datetime.now()
+        )
+        events, next_cursor = await _event_page(db, stmt, cursor, skip, limit)
+        return {
+            "items": [Event.model_validate(e).model_dump(mode="json") for e in events],
+            "next_cursor": next_cursor,
+        }
 
-@router.get("/events/{event_id}", response_model=Event)
+    cached = await event_cache.get_or_load(
+        EVENT_LISTINGS, f"{cursor}:{skip}:{limit}", load, bypass=reads_own_writes(request)
+    )
+    set_next_cursor(response, cached["next_cursor"])
+    return fast_response(cached["items"], response)
+
+@router.get("/events/search", response_model=List[Event])
+async def search_available_events(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    venue: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if not search_terms(q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query has no words"
+        )
+
+    async def load():
+        stmt = search_events(
+            db.get_bind().dialect.name, q, date_from, date_to, min_price, max_price, venue
+        )
+        events = (await db.scalars(stmt.offset(skip).limit(limit))).all()
+        return [Event.model_validate(e).model_dump(mode="json") for e in events]
+
+    # Ranking a common term means scoring every match, so repeated searches
+    # are served from the listings cache.
+    key = "search:" + repr((q, date_from, date_to, min_price, max_price, venue, skip, limit))
+    return fast_response(
+        await event_cache.get_or_load(EVENT_LISTINGS, key, load, bypass=reads_own_writes(request))
+    )
+
+# ":int" keeps /events/search and /events/history from matching here.
+@router.get("/events/{event_id:int}", response_model=Event)
 async def get_event_details(
+    request: Request,
     event_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    async def load():
+        event = await db.scalar(select(EventModel).where(EventModel.id == event_id))
+        return event and Event.model_validate(event).model_dump(mode="json")
+
+    event = await event_cache.get_or_load(
+        event_namespace(event_id), "detail", load, bypass=reads_own_writes(request)
+    )
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
-    return event
\ No newline at end of file
+    return fast_response(event)
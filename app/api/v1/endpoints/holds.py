@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from ....database import get_db
+from ....models.hold import TicketHold
+from ....schemas.booking import Booking
+from ....schemas.hold import Hold, HoldCreate
+from ....core.config import get_settings
+from ....core.security import CurrentUser, get_current_user
+from ....services.event_cache import invalidate_availability
+from ....services.holds import hold_stats
+from ....services.inventory import (
+    booking_failure,
+    insert_bookings,
+    release_tickets,
+    reserve_tickets,
+)
+
+router = APIRouter()
+settings = get_settings()
+
+
+async def _take_hold(db, hold_id, user_id, live):
+    """Delete the caller's hold and return it, or None if it is gone.
+
+    Confirm, release and the expiry sweeper all delete the hold first, so
+    exactly one of them gets to act on it.
+    """
+    stmt = delete(TicketHold).where(
+        TicketHold.id == hold_id, TicketHold.user_id == user_id
+    )
+    if live:
+        stmt = stmt.where(TicketHold.expires_at > datetime.now())
+    return (
+        await db.execute(
+            stmt.returning(TicketHold.event_id, TicketHold.number_of_tickets)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+
+
+@router.post(
+    "/events/{event_id}/hold",
+    response_model=Hold,
+    status_code=status.HTTP_201_CREATED,
+)
+async def hold_tickets(
+    event_id: int,
+    hold: HoldCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        reserved = await reserve_tickets(db, event_id, hold.number_of_tickets) is not None
+        if reserved:
+            db_hold = TicketHold(
+                user_id=current_user.id,
+                event_id=event_id,
+                number_of_tickets=hold.number_of_tickets,
+                expires_at=datetime.now() + timedelta(seconds=settings.hold_ttl),
+            )
+            db.add(db_hold)
+            await db.commit()
+            await db.refresh(db_hold)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating hold",
+        )
+
+    if not reserved:
+        await db.rollback()
+        raise await booking_failure(db, event_id)
+
+    hold_stats.created += 1
+    await invalidate_availability(event_id)
+    return db_hold
+
+
+@router.post(
+    "/holds/{hold_id}/confirm",
+    response_model=Booking,
+    status_code=status.HTTP_201_CREATED,
+)
+async def confirm_hold(
+    hold_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        hold = await _take_hold(db, hold_id, current_user.id, live=True)
+        if hold:
+            # The tickets already left the inventory when the hold was taken.
+            (db_booking,) = await insert_bookings(
+                db,
+                [
+                    {
+                        "user_id": current_user.id,
+                        "event_id": hold.event_id,
+                        "number_of_tickets": hold.number_of_tickets,
+                    }
+                ],
+            )
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error confirming hold",
+        )
+
+    if not hold:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hold not found or expired",
+        )
+
+    hold_stats.confirmed += 1
+    return db_booking
+
+
+@router.delete("/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_hold(
+    hold_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        hold = await _take_hold(db, hold_id, current_user.id, live=False)
+        if hold:
+            await release_tickets(db, hold.event_id, hold.number_of_tickets)
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error releasing hold",
+        )
+
+    if not hold:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found"
+        )
+
+    hold_stats.released += 1
+    await invalidate_availability(hold.event_id)
+    return None
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from ....core.metrics import collect_stats
+from ....core.security import get_current_admin
+
+router = APIRouter()
+
+
+@router.get("/admin/metrics", dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    return collect_stats()
@@ -0,0 +1,69 @@
+from datetime import date
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ....database import get_read_db
+from ....models.sales import EventSalesDaily
+from ....schemas.stats import DailySales, EventSales
+from ....core.security import get_current_admin
+
+router = APIRouter()
+
+
+def _in_range(stmt, date_from, date_to):
+    if date_from is not None:
+        stmt = stmt.where(EventSalesDaily.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(EventSalesDaily.day <= date_to)
+    return stmt
+
+
+@router.get(
+    "/admin/events/{event_id}/stats",
+    response_model=EventSales,
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_event_stats(
+    event_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = _in_range(
+        select(EventSalesDaily).where(EventSalesDaily.event_id == event_id),
+        date_from,
+        date_to,
+    )
+    daily = (await db.scalars(stmt.order_by(EventSalesDaily.day))).all()
+    return {
+        "event_id": event_id,
+        "tickets_sold": sum(row.tickets_sold for row in daily),
+        "revenue": sum(row.revenue for row in daily),
+        "bookings": sum(row.bookings for row in daily),
+        "daily": daily,
+    }
+
+
+@router.get(
+    "/admin/stats/daily",
+    response_model=List[DailySales],
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_daily_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    event_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = select(
+        EventSalesDaily.day,
+        func.sum(EventSalesDaily.tickets_sold).label("tickets_sold"),
+        func.sum(EventSalesDaily.revenue).label("revenue"),
+        func.sum(EventSalesDaily.bookings).label("bookings"),
+    )
+    if event_id is not None:
+        stmt = stmt.where(EventSalesDaily.event_id == event_id)
+    stmt = _in_range(stmt, date_from, date_to)
+    rows = await db.execute(stmt.group_by(EventSalesDaily.day).order_by(EventSalesDaily.day))
+    return rows.all()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import auth, events, booking
+from .endpoints import auth, availability, events, booking, holds, metrics, stats
 
 api_router = APIRouter()
 
@@ -14,7 +14,27 @@ api_router.include_router(
     tags=["events"]
 )
 
+api_router.include_router(
+    availability.router,
+    tags=["availability"]
+)
+
 api_router.include_router(
     booking.router,
     tags=["bookings"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    holds.router,
+    tags=["holds"]
+)
+
+api_router.include_router(
+    metrics.router,
+    tags=["metrics"]
+)
+
+api_router.include_router(
+    stats.router,
+    tags=["stats"]
+)
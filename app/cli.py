@@ -0,0 +1,122 @@
+"""Command line entry point: ``python -m app.cli <command>``."""
+import argparse
+import asyncio
+import signal
+from datetime import datetime
+from sqlalchemy import func, select, update
+from . import migrations
+from .database import dispose_engines, get_engine, get_session_factory
+from .models.outbox import OutboxMessage
+from .services.outbox import run_outbox_worker
+from .services.rollups import rebuild_rollups
+
+
+def db_upgrade(args):
+    with get_engine().begin() as conn:
+        applied = migrations.upgrade(conn, args.revision)
+        print(f"Applied {applied or 'nothing'}; now at revision {migrations.current_revision(conn)}")
+
+
+def db_downgrade(args):
+    with get_engine().begin() as conn:
+        reverted = migrations.downgrade(conn, args.revision)
+        print(f"Reverted {reverted or 'nothing'}; now at revision {migrations.current_revision(conn)}")
+
+
+def db_current(args):
+    with get_engine().connect() as conn:
+        print(f"Current revision {migrations.current_revision(conn)} (head {migrations.head()})")
+
+
+def db_history(args):
+    for migration in migrations.load_migrations():
+        print(f"{migration.revision:04d}  {migration.description}")
+
+
+def stats_rebuild(args):
+    with get_engine().begin() as conn:
+        print(f"Rebuilt {rebuild_rollups(conn)} daily sales rollup rows")
+
+
+def outbox_run(args):
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            await run_outbox_worker(get_session_factory(), stop)
+        finally:
+            await dispose_engines()
+
+    asyncio.run(run())
+
+
+def outbox_status(args):
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            select(
+                OutboxMessage.dead_at.is_not(None),
+                func.count(),
+                func.min(OutboxMessage.created_at),
+            ).group_by(OutboxMessage.dead_at.is_not(None))
+        ).all()
+    for dead, count, oldest in rows:
+        print(f"{'Dead' if dead else 'Pending'}: {count} (oldest {oldest})")
+    if not rows:
+        print("Outbox is empty")
+
+
+def outbox_requeue(args):
+    with get_engine().begin() as conn:
+        requeued = conn.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.dead_at.is_not(None))
+            .values(dead_at=None, attempts=0, available_at=datetime.now())
+        ).rowcount
+        print(f"Requeued {requeued} dead outbox messages")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    db = commands.add_parser("db", help="schema migrations")
+    db_commands = db.add_subparsers(dest="db_command", required=True)
+    upgrade = db_commands.add_parser("upgrade", help="apply migrations (default: to head)")
+    upgrade.add_argument("revision", type=int, nargs="?")
+    upgrade.set_defaults(func=db_upgrade)
+    downgrade = db_commands.add_parser("downgrade", help="revert migrations down to a revision")
+    downgrade.add_argument("revision", type=int)
+    downgrade.set_defaults(func=db_downgrade)
+    db_commands.add_parser("current", help="show the applied revision").set_defaults(func=db_current)
+    db_commands.add_parser("history", help="list migrations").set_defaults(func=db_history)
+
+    stats = commands.add_parser("stats", help="sales rollups")
+    stats_commands = stats.add_subparsers(dest="stats_command", required=True)
+    stats_commands.add_parser(
+        "rebuild", help="recompute the daily sales rollups from bookings"
+    ).set_defaults(func=stats_rebuild)
+
+    outbox = commands.add_parser("outbox", help="post-booking side effects")
+    outbox_commands = outbox.add_subparsers(dest="outbox_command", required=True)
+    outbox_commands.add_parser(
+        "run", help="deliver outbox messages until interrupted"
+    ).set_defaults(func=outbox_run)
+    outbox_commands.add_parser(
+        "status", help="count pending and dead messages"
+    ).set_defaults(func=outbox_status)
+    outbox_commands.add_parser(
+        "requeue", help="retry every dead message from scratch"
+    ).set_defaults(func=outbox_requeue)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
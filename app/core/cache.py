@@ -0,0 +1,191 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+# Result of a load whose caller was cancelled; its waiters load again.
+_ABANDONED = object()
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries also expire after a TTL.
+
+    Not thread-safe; it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(ABC):
+    """Storage behind ReadThroughCache.
+
+    Values handed to ``set`` are JSON-compatible, so a backend for a shared
+    store only needs to serialize them.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU/TTL backend."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class ReadThroughCache:
+    """Namespaced read-through cache with single-flight loading.
+
+    Keys live under a namespace generation; ``invalidate`` bumps the
+    generation instead of deleting keys, so a load that raced with a write
+    stores its result under the old generation where nobody reads it.
+    Concurrent misses for the same key share one loader call; if the caller
+    running it is cancelled, the next waiter takes over the load.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def _generation(self, namespace: str) -> int:
+        key = f"{namespace}:generation"
+        generation = await self.backend.get(key)
+        if generation is None:
+            # A clock-based start never reuses a generation that expired or
+            # was evicted, so entries stored under it stay unreachable.
+            generation = time.time_ns()
+            await self.backend.set(key, generation)
+        return generation
+
+    async def get_or_load(
+        self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]],
+        bypass: bool = False,
+    ) -> Any:
+        """Return the cached value or run ``loader``; ``None`` is never cached.
+
+        ``bypass`` runs ``loader`` without reading or filling the cache.
+        """
+        if not self.enabled or bypass:
+            return await loader()
+
+        full_key = f"{namespace}:{await self._generation(namespace)}:{key}"
+        value = await self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(full_key)
+        while inflight is not None:
+            self.coalesced += 1
+            value = await asyncio.shield(inflight)
+            if value is not _ABANDONED:
+                return value
+            inflight = self._inflight.get(full_key)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                await self.backend.set(full_key, value, self.ttl)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                # Only this caller went away; don't fail the others.
+                future.set_result(_ABANDONED)
+            else:
+                future.set_exception(exc)
+                future.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            del self._inflight[full_key]
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            await self.backend.delete(f"{namespace}:generation")
+            self.invalidations += 1
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        self.hits = self.misses = self.coalesced = self.invalidations = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
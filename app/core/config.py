@@ -0,0 +1,156 @@
+from functools import lru_cache
+from typing import List
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    database_url: str
+    # Serve requests through AsyncSession; set DATABASE_ASYNC=false to fall
+    # back to the synchronous Session run in the threadpool.
+    database_async: bool = True
+
+    # Read replicas: read-only endpoints use one of database_replica_urls,
+    # picked "round_robin" or "least_loaded" (fewest open sessions). A client
+    # that wrote in the last read_your_writes_seconds reads from the primary
+    # instead; this is tracked per worker, by bearer token.
+    database_replica_urls: List[str] = []
+    replica_policy: str = "round_robin"
+    read_your_writes_seconds: float = 5.0
+
+    # Connection pool of each engine, per worker process. A request waits at
+    # most db_pool_timeout seconds for a connection before failing;
+    # connections are replaced after db_pool_recycle seconds (-1 never) and
+    # checked with a ping on checkout when db_pool_pre_ping is set.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Per-route latency and SQL cost, served in Prometheus text format at
+    # /metrics. Statements slower than slow_query_ms are logged with their
+    # route and parameter types (0 logs every statement, negative none).
+    metrics_enabled: bool = True
+    slow_query_ms: float = 200.0
+    slow_query_log_size: int = 100
+
+    # Per-worker admission control: at most overload_max_concurrency requests
+    # run at once ("static"), or fewer while latency is above target
+    # ("adaptive", AIMD); "off" disables it. Excess requests wait up to
+    # overload_queue_timeout_ms in a bounded priority queue, where browse
+    # traffic is shed before bookings and auth.
+    overload_limit_mode: str = "adaptive"
+    overload_max_concurrency: int = 100
+    overload_min_concurrency: int = 4
+    overload_queue_limit: int = 200
+    overload_queue_timeout_ms: float = 500.0
+    overload_latency_target_ms: float = 500.0
+    overload_retry_after: int = 1
+
+    # Idempotency-Key on bookings, cancellations and admin writes. Responses
+    # are kept idempotency_ttl seconds in "memory" (per worker) or in the
+    # "database" (shared by every worker). A request holds its key for at
+    # most idempotency_lock_ttl seconds; a duplicate waits up to
+    # idempotency_wait_timeout seconds for it to finish, then gets a 409.
+    idempotency_backend: str = "memory"
+    idempotency_ttl: float = 86400.0
+    idempotency_max_entries: int = 10000
+    idempotency_lock_ttl: float = 60.0
+    idempotency_wait_timeout: float = 10.0
+
+    # Upper bound on the database check behind /health/ready.
+    health_check_timeout: float = 2.0
+
+    # Token signing.
+    secret_key: str
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    cors_origins: List[str] = ["http://localhost:5173"]
+
+    # Application startup: connections opened (and checked) before serving,
+    # refusing to start on a schema behind the migrations, and running the
+    # hot statements once so their compiled SQL is cached.
+    db_pool_warm_connections: int = 4
+    verify_schema_on_startup: bool = True
+    precompile_statements: bool = True
+
+    # bcrypt runs on a bounded executor ("thread" or "process"); requests
+    # beyond workers + queue limit are rejected with 503.
+    password_hash_workers: int = 4
+    password_hash_queue_limit: int = 64
+    password_hash_executor: str = "thread"
+
+    # Serialize trusted rows straight to JSON on hot read endpoints instead
+    # of revalidating them against the response model.
+    fast_json_responses: bool = True
+
+    # Hard cap on the page size of every list endpoint.
+    max_page_size: int = 500
+
+    # Rows fetched per round trip by the streaming booking export.
+    export_batch_size: int = 1000
+
+    # Ticket holds expire after hold_ttl seconds; a background sweeper
+    # returns expired holds to inventory in batches.
+    hold_ttl: int = 600
+    hold_sweep_interval: float = 5.0
+    hold_sweep_batch_size: int = 1000
+
+    # Events per INSERT (and commit) in the bulk event import.
+    event_import_chunk_size: int = 1000
+
+    # Authenticated identities are cached per token (0 disables the cache).
+    auth_cache_size: int = 10000
+    auth_cache_ttl: float = 300.0
+
+    # Read-through cache for event details and listings.
+    cache_enabled: bool = True
+    cache_max_entries: int = 10000
+    cache_ttl: float = 30.0
+
+    # Live availability streams: subscribers of an event share one fan-out
+    # task that sends at most one update per availability_stream_interval
+    # seconds, and re-reads the count every availability_poll_interval
+    # seconds to catch writes made by other workers. Idle streams get a
+    # keepalive every availability_keepalive seconds.
+    availability_stream_interval: float = 1.0
+    availability_poll_interval: float = 5.0
+    availability_keepalive: float = 15.0
+    availability_max_subscribers: int = 10000
+
+    # Transactional outbox: bookings and cancellations insert a message in
+    # their own transaction, and a worker delivers it to the handlers of its
+    # topic (registered by the outbox_handler_modules it imports). Nothing is
+    # enqueued while no handler module is configured. Messages of topics
+    # without a handler stay pending, and are purged once older than
+    # outbox_unhandled_retention seconds. A worker claims up to
+    # outbox_batch_size messages for outbox_lease seconds and retries
+    # failures with exponential backoff, giving up after outbox_max_attempts.
+    # Set outbox_worker_in_process=false to run the worker separately with
+    # ``python -m app.cli outbox run``.
+    outbox_enabled: bool = True
+    outbox_worker_in_process: bool = True
+    outbox_handler_modules: List[str] = []
+    outbox_batch_size: int = 100
+    outbox_poll_interval: float = 1.0
+    outbox_lease: float = 60.0
+    outbox_handler_timeout: float = 30.0
+    outbox_max_attempts: int = 10
+    outbox_backoff_base: float = 1.0
+    outbox_backoff_max: float = 600.0
+    outbox_unhandled_retention: float = 86400.0
+
+    # Flash-sale events book through a per-event queue in group-committed
+    # batches; a worker waits up to max_wait_ms for a batch to fill.
+    flash_sale_batch_size: int = 100
+    flash_sale_max_wait_ms: float = 2.0
+    flash_sale_queue_limit: int = 10000
+    flash_sale_flag_ttl: float = 5.0
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,368 @@
+"""Idempotency keys for write endpoints.
+
+A client sends ``Idempotency-Key`` with a write. The first request with a
+key runs and its response is stored; a retry with the same key gets that
+response back without running the endpoint again, and a duplicate that
+arrives while the first is still running waits for its response instead
+of running twice. Keys are scoped per caller and bound to the request they
+were first used with, so reusing one for a different request is an error.
+
+Responses with a 5xx status, and requests that fail with an exception, are
+not stored: the key is released and the client may retry it.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from ..models.idempotency import IdempotencyRecord
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Recomputed for the replayed body.
+_SKIPPED_HEADERS = {"content-length"}
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+    @classmethod
+    def of(cls, response: Response) -> "StoredResponse":
+        headers = [
+            (key, value) for key, value in response.headers.items()
+            if key not in _SKIPPED_HEADERS
+        ]
+        return cls(response.status_code, headers, bytes(response.body))
+
+    def replay(self) -> Response:
+        response = Response(self.body, status_code=self.status_code)
+        response.raw_headers.extend(
+            (key.encode("latin-1"), value.encode("latin-1"))
+            for key, value in self.headers + [(REPLAYED_HEADER.lower(), "true")]
+        )
+        return response
+
+
+@dataclass
+class Record:
+    """What holds a key: the request's fingerprint and, once done, its response."""
+    fingerprint: str
+    response: Optional[StoredResponse] = None
+
+
+class IdempotencyStore(ABC):
+    """Storage behind IdempotencyKeys; keys are hex digests."""
+
+    @abstractmethod
+    async def claim(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[Record]:
+        """Take a free ``key`` for ``lock_ttl`` seconds and return None, or
+        return the record already holding it."""
+
+    @abstractmethod
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Free a key whose request did not complete."""
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-process LRU/TTL store; duplicates sent to another worker run again."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._records = TTLCache(maxsize, ttl)
+
+    async def claim(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[Record]:
+        record = self._records.get(key)
+        if record is None:
+            self._records.set(key, Record(fingerprint), lock_ttl)
+        return record
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse, ttl: float) -> None:
+        self._records.set(key, Record(fingerprint, response), ttl)
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key)
+
+    async def clear(self) -> None:
+        self._records.clear()
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Store shared by every worker through the ``idempotency_keys`` table.
+
+    The primary key makes claiming atomic. ``session_factory`` returns the
+    session factory to use, so it is looked up on each call.
+    """
+
+    # Seconds between deletes of every expired record.
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, session_factory: Callable[[], Callable]):
+        self.session_factory = session_factory
+        self._purged_at = 0.0
+
+    async def claim(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[Record]:
+        async with self.session_factory()() as db:
+            while True:
+                now = datetime.now()
+                if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+                    self._purged_at = time.monotonic()
+                    await self._delete_expired(db, now)
+                try:
+                    await db.execute(
+                        insert(IdempotencyRecord).values(
+                            key=key,
+                            fingerprint=fingerprint,
+                            expires_at=now + timedelta(seconds=lock_ttl),
+                        )
+                    )
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+
+                row = (
+                    await db.execute(
+                        select(
+                            IdempotencyRecord.fingerprint,
+                            IdempotencyRecord.status_code,
+                            IdempotencyRecord.headers,
+                            IdempotencyRecord.body,
+                            IdempotencyRecord.expires_at,
+                        ).where(IdempotencyRecord.key == key)
+                    )
+                ).one_or_none()
+                if row is not None and row.expires_at <= now:
+                    # An expired record, finished or abandoned, no longer
+                    # holds its key.
+                    await self._delete_expired(db, now, key)
+                    row = None
+                await db.rollback()
+                if row is None:
+                    continue
+                if row.status_code is None:
+                    return Record(row.fingerprint)
+                headers = [tuple(header) for header in json.loads(row.headers)]
+                return Record(row.fingerprint, StoredResponse(row.status_code, headers, row.body))
+
+    @staticmethod
+    async def _delete_expired(db, now: datetime, key: Optional[str] = None) -> None:
+        expired = IdempotencyRecord.expires_at <= now
+        if key is not None:
+            expired = expired & (IdempotencyRecord.key == key)
+        await db.execute(
+            delete(IdempotencyRecord)
+            .where(expired)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse, ttl: float) -> None:
+        async with self.session_factory()() as db:
+            await db.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=json.dumps(response.headers),
+                    body=response.body,
+                    expires_at=datetime.now() + timedelta(seconds=ttl),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def release(self, key: str) -> None:
+        async with self.session_factory()() as db:
+            await db.execute(
+                delete(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key, IdempotencyRecord.status_code.is_(None))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def clear(self) -> None:
+        async with self.session_factory()() as db:
+            await db.execute(delete(IdempotencyRecord))
+            await db.commit()
+
+
+class IdempotentReplay(Exception):
+    """Raised by the idempotency dependency to answer with a stored response."""
+
+    def __init__(self, response: Response):
+        self.response = response
+
+
+@dataclass
+class _Claim:
+    keys: "IdempotencyKeys"
+    key: str
+    fingerprint: str
+
+
+class IdempotencyKeys:
+    """Runs each (scope, key) once and replays its response afterwards.
+
+    Duplicates in the same worker wait on the running request directly;
+    a key held by another worker (database store) is polled until its
+    response is stored or ``wait_timeout`` passes, which answers 409.
+    """
+
+    def __init__(self, store: IdempotencyStore, ttl: float, lock_ttl: float,
+                 wait_timeout: float, poll_interval: float = 0.05):
+        self.store = store
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stored = 0
+        self.replayed = 0
+        self.waited = 0
+        self.mismatched = 0
+
+    async def enter(self, request: Request, scope: str, key: str) -> None:
+        """Claim ``key`` for ``request`` or raise ``IdempotentReplay``.
+
+        The claim is kept on ``request.state`` for ``IdempotentRoute`` to
+        store the response under once the endpoint returns.
+        """
+        digest = hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest()
+        target = f"{request.method} {request.url.path}?{request.url.query}\n".encode()
+        fingerprint = hashlib.sha256(target + await request.body()).hexdigest()
+        stored = await self.begin(digest, fingerprint)
+        if stored is not None:
+            raise IdempotentReplay(stored.replay())
+        request.state.idempotency = _Claim(self, digest, fingerprint)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Claim ``key`` and return None, or return the response to replay."""
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                record = await self.store.claim(key, fingerprint, self.lock_ttl)
+                if record is None:
+                    self._inflight[key] = asyncio.get_running_loop().create_future()
+                    return None
+                if record.fingerprint != fingerprint:
+                    self.mismatched += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used for a different request",
+                    )
+                if record.response is not None:
+                    self.replayed += 1
+                    return record.response
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            if not waited:
+                waited = True
+                self.waited += 1
+            if inflight is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(inflight), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Held by a request in another worker.
+                await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def finish(self, key: str, fingerprint: str, response: Response) -> None:
+        try:
+            if response.status_code < 500 and hasattr(response, "body"):
+                await self.store.complete(key, fingerprint, StoredResponse.of(response), self.ttl)
+                self.stored += 1
+            else:
+                await self.store.release(key)
+        except Exception:
+            # The write itself went through; answer it even if a retry cannot
+            # be replayed.
+            logger.exception("Could not store the response of an idempotent request")
+        finally:
+            self._done(key)
+
+    async def abandon(self, key: str) -> None:
+        try:
+            await self.store.release(key)
+        finally:
+            self._done(key)
+
+    def _done(self, key: str) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def clear(self) -> None:
+        await self.store.clear()
+        self.stored = self.replayed = self.waited = self.mismatched = 0
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "stored_total": self.stored,
+            "replayed_total": self.replayed,
+            "waited_total": self.waited,
+            "mismatched_total": self.mismatched,
+        }
+
+
+class IdempotentRoute(APIRoute):
+    """Route class storing the responses of requests claimed by ``enter``.
+
+    Routes that do not depend on an idempotency dependency, or requests
+    without a key, pass through unchanged.
+    """
+
+    def get_route_handler(self):
+        handle = super().get_route_handler()
+
+        async def idempotent_handler(request: Request) -> Response:
+            try:
+                response = await handle(request)
+            except IdempotentReplay as replay:
+                return replay.response
+            except HTTPException as exc:
+                claim = getattr(request.state, "idempotency", None)
+                if claim is None:
+                    raise
+                response = await http_exception_handler(request, exc)
+            except BaseException:
+                claim = getattr(request.state, "idempotency", None)
+                if claim is not None:
+                    await claim.keys.abandon(claim.key)
+                raise
+
+            claim = getattr(request.state, "idempotency", None)
+            if claim is not None:
+                await claim.keys.finish(claim.key, claim.fingerprint, response)
+            return response
+
+        return idempotent_handler
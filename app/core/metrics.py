@@ -0,0 +1,40 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Sequence
+
+# Latency buckets in seconds, shared by every histogram unless overridden.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_stats_providers: Dict[str, Callable[[], dict]] = {}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+def register_stats(name: str, provider: Callable[[], dict]) -> None:
+    """Expose ``provider()`` under ``name`` on the metrics endpoint."""
+    _stats_providers[name] = provider
+
+
+def collect_stats() -> dict:
+    return {name: provider() for name, provider in _stats_providers.items()}
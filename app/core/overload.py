@@ -0,0 +1,217 @@
+"""Per-worker admission control with priority load shedding.
+
+``ConcurrencyLimiter`` admits up to ``limit`` requests at once. Requests
+beyond that wait in a bounded priority queue until a slot frees up or
+their deadline passes. When the queue is full, a more important arrival
+evicts the least important waiter, so browse traffic is shed before
+bookings and auth. In adaptive mode the limit follows AIMD: it backs off
+multiplicatively when a window's p90 latency exceeds the target, and grows
+by one after a window in which requests had to queue.
+
+``LoadSheddingMiddleware`` applies the limiter to HTTP requests and
+answers shed requests immediately with 503 and ``Retry-After``.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+from starlette.responses import JSONResponse
+from .config import Settings
+from .metrics import Histogram
+
+# Lower is more important.
+CRITICAL, NORMAL, BROWSE = 0, 1, 2
+PRIORITY_NAMES = {CRITICAL: "critical", NORMAL: "normal", BROWSE: "browse"}
+
+# Completions per adaptive window, and the multiplicative back-off.
+WINDOW = 100
+BACKOFF = 0.8
+
+# Paths that must answer even when the worker is saturated.
+EXEMPT_PATHS = ("/health/", "/metrics")
+# Long-lived streams would hold a slot for as long as they stay open; they
+# are capped by their own subscriber limit instead.
+EXEMPT_SUFFIXES = ("/availability/stream",)
+
+_CRITICAL_SUFFIXES = ("/book", "/hold", "/cancel", "/confirm")
+
+
+def classify(method: str, path: str) -> int:
+    """Priority class of a request, from its method and path."""
+    if path.startswith(("/api/v1/auth/", "/api/v1/bookings", "/api/v1/holds")):
+        return CRITICAL
+    if path.startswith("/api/v1/events") and path.endswith(_CRITICAL_SUFFIXES):
+        return CRITICAL
+    if method == "GET" and path.startswith("/api/v1/events") and path != "/api/v1/events/history":
+        return BROWSE
+    return NORMAL
+
+
+class Shed(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+class ConcurrencyLimiter:
+    def __init__(self, mode: str, max_concurrency: int, min_concurrency: int,
+                 queue_limit: int, queue_timeout: float, latency_target: float):
+        if mode not in ("static", "adaptive"):
+            raise ValueError(f"Unknown concurrency limit mode {mode!r}")
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.limit = max_concurrency
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._window: List[float] = []
+        self._saturated = False
+        self.admitted: Dict[int, int] = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.shed: Dict[str, int] = {}
+        self.wait_seconds = Histogram()
+
+    def _shed(self, priority: int, reason: str) -> Shed:
+        key = f"{PRIORITY_NAMES[priority]}_{reason}"
+        self.shed[key] = self.shed.get(key, 0) + 1
+        return Shed(reason)
+
+    async def acquire(self, priority: int) -> None:
+        """Take a slot, waiting in the queue if needed; raises ``Shed``."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted[priority] += 1
+            return
+
+        self._saturated = True
+        if len(self._waiters) >= self.queue_limit:
+            least = max(self._waiters, default=None)
+            if least is None or least.priority <= priority:
+                raise self._shed(priority, "queue_full")
+            self._waiters.remove(least)
+            heapq.heapify(self._waiters)
+            if not least.future.done():
+                least.future.set_exception(self._shed(least.priority, "evicted"))
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise self._shed(priority, "deadline")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted[priority] += 1
+        self.wait_seconds.observe(time.perf_counter() - started)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        future = waiter.future
+        if future.done() and not future.cancelled() and future.exception() is None:
+            # _wake handed the waiter a slot before it gave up; pass it on.
+            self.in_flight -= 1
+            self._wake()
+        elif waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            waiter = heapq.heappop(self._waiters)
+            if not waiter.future.done():
+                self.in_flight += 1
+                waiter.future.set_result(None)
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        if self.mode == "adaptive":
+            self._adapt(latency)
+        self._wake()
+
+    def _adapt(self, latency: float) -> None:
+        self._window.append(latency)
+        if len(self._window) < WINDOW:
+            return
+        self._window.sort()
+        p90 = self._window[int(len(self._window) * 0.9)]
+        if p90 > self.latency_target:
+            self.limit = max(self.min_concurrency, int(self.limit * BACKOFF))
+        elif self._saturated:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+        self._window.clear()
+        self._saturated = False
+
+    def stats(self) -> dict:
+        queued = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        for waiter in self._waiters:
+            queued[PRIORITY_NAMES[waiter.priority]] += 1
+        return {
+            "mode": self.mode,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "admitted_total": {
+                PRIORITY_NAMES[priority]: count for priority, count in self.admitted.items()
+            },
+            "shed_total": dict(self.shed),
+            "queue_wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+class LoadSheddingMiddleware:
+    def __init__(self, app, limiter: ConcurrencyLimiter, retry_after: int):
+        self.app = app
+        self.limiter = limiter
+        self.retry_after = str(retry_after)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(EXEMPT_PATHS)
+            or scope["path"].endswith(EXEMPT_SUFFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.limiter.acquire(classify(scope["method"], scope["path"]))
+        except Shed:
+            response = JSONResponse(
+                {"detail": "Server overloaded, please retry"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.perf_counter() - started)
+
+
+def limiter_from_settings(settings: Settings) -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(
+        mode=settings.overload_limit_mode,
+        max_concurrency=settings.overload_max_concurrency,
+        min_concurrency=settings.overload_min_concurrency,
+        queue_limit=settings.overload_queue_limit,
+        queue_timeout=settings.overload_queue_timeout_ms / 1000,
+        latency_target=settings.overload_latency_target_ms / 1000,
+    )
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from .config import get_settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = get_settings().max_page_size
+
+
+def encode_cursor(kind: str, sort_value: datetime, id_value: int) -> str:
+    raw = json.dumps([kind, sort_value.isoformat(), id_value], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_kind, sort_value, id_value = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_kind != kind or not isinstance(id_value, int):
+            raise ValueError(cursor_kind)
+        return datetime.fromisoformat(sort_value), id_value
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset(stmt, kind: str, sort_column, id_column, cursor: Optional[str], descending: bool = False):
+    """Order ``stmt`` by ``(sort_column, id_column)`` and resume after ``cursor``."""
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column, id_column)
+    if cursor is None:
+        return stmt
+
+    sort_value, id_value = decode_cursor(kind, cursor)
+    if descending:
+        after = or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < id_value))
+    else:
+        after = or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > id_value))
+    return stmt.where(after)
+
+
+def split_page(
+    rows: Sequence[Any],
+    limit: int,
+    kind: str,
+    key: Callable[[Any], Tuple[datetime, int]],
+) -> Tuple[List[Any], Optional[str]]:
+    """Trim the ``limit + 1`` rows fetched for a page; return them and the next cursor."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, *key(rows[-1]))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def page(
+    rows: Sequence[Any],
+    limit: int,
+    kind: str,
+    key: Callable[[Any], Tuple[datetime, int]],
+    response: Response,
+) -> List[Any]:
+    """Trim the ``limit + 1`` rows fetched for a page and set the next cursor."""
+    rows, next_cursor = split_page(rows, limit, kind, key)
+    set_next_cursor(response, next_cursor)
+    return rows
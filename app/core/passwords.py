@@ -0,0 +1,127 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from .config import get_settings
+from .metrics import Histogram, register_stats
+
+
+@lru_cache
+def pwd_context():
+    # passlib loads its bcrypt backend on import; defer it to the first hash.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _timed(fn: Callable, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def hash_password(password: str) -> str:
+    return pwd_context().hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded executor instead of the event loop.
+
+    At most ``max_workers`` hashes run at once and up to ``max_queue`` more
+    wait for a worker; anything beyond that is rejected with a 503 so a
+    login burst cannot pile up unbounded work. A job counts until it leaves
+    the executor, even if the request waiting for it was cancelled.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, executor: str = "thread"):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password executor {executor!r}")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.hash_seconds = Histogram()
+        self.wait_seconds = Histogram()
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        job = self._get_executor().submit(_timed, fn, *args)
+        self.in_flight += 1
+        job.add_done_callback(lambda _: self._finished(loop))
+        result, elapsed = await asyncio.wrap_future(job)
+        self.hash_seconds.observe(elapsed)
+        self.wait_seconds.observe(max(0.0, time.perf_counter() - submitted - elapsed))
+        return result
+
+    def _finished(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Runs in the executor's thread once the job ran or was cancelled.
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # loop closed; nothing else touches the count
+            self._release()
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(check_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected_total": self.rejected,
+            "hash_seconds": self.hash_seconds.snapshot(),
+            "queue_wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+settings = get_settings()
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_limit,
+    executor=settings.password_hash_executor,
+)
+register_stats("password_hasher", password_hasher.stats)
@@ -0,0 +1,95 @@
+"""Connection pool sizing and telemetry.
+
+Engines built with ``pool_options`` get a pool class that times every
+checkout, including the wait for a free connection, and event listeners
+that count new connections and invalidations. ``PoolStats.snapshot``
+reports those next to the pool's live checked-out and overflow counts.
+"""
+import time
+from typing import Optional, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from .config import Settings
+from .metrics import Histogram
+
+# Checkouts are usually sub-millisecond; the tail is what sizing cares about.
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolStats:
+    def __init__(self):
+        self.engine: Optional[Engine] = None
+        self.checkout_seconds = Histogram(CHECKOUT_BUCKETS)
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def attach(self, engine: Engine) -> None:
+        self.engine = engine
+        # Listeners on the engine follow its pool across dispose().
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        stats = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                # Negative until the pool has opened pool_size connections.
+                overflow=pool.overflow(),
+                timeout_seconds=pool.timeout(),
+            )
+        stats.update(
+            connects_total=self.connects,
+            invalidations_total=self.invalidations,
+            timeouts_total=self.timeouts,
+            checkout_seconds=self.checkout_seconds.snapshot(),
+        )
+        return stats
+
+
+def _instrumented(base: Type[Pool], stats: PoolStats) -> Type[Pool]:
+    class InstrumentedPool(base):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.checkout_seconds.observe(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = base.__name__
+    return InstrumentedPool
+
+
+def pool_options(url: str, settings: Settings, stats: PoolStats, is_async: bool = False) -> dict:
+    """``create_engine`` keyword arguments for the configured pool.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, which takes
+    no sizing options.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    return {
+        "poolclass": _instrumented(base, stats),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
@@ -0,0 +1,84 @@
+"""Prometheus text exposition of the request metrics and stats providers.
+
+Route metrics are labelled by method and route template. Every provider
+registered with ``register_stats`` is flattened underneath ``app_<name>_``:
+numbers become gauges (counters when the key ends in ``_total``) and
+histogram snapshots become histograms. Strings and lists are left to the
+JSON metrics endpoint.
+"""
+import re
+from typing import Dict, List
+from .metrics import Histogram
+from .telemetry import RequestMetrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+_LABEL_ESCAPES = {"\\": r"\\", '"': r"\"", "\n": r"\n"}
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(
+        f'{key}="{"".join(_LABEL_ESCAPES.get(c, c) for c in str(value))}"'
+        for key, value in labels.items()
+    )
+
+
+def _histogram(lines: List[str], name: str, snapshot: dict, labels: str = "") -> None:
+    prefix = labels + "," if labels else ""
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+    lines.append(f"{name}_count{suffix} {snapshot['count']}")
+
+
+def _route_metrics(lines: List[str], metrics: RequestMetrics) -> None:
+    routes = sorted(metrics.routes.items())
+
+    lines.append("# HELP http_requests_total Responses by route and status code.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route), stats in routes:
+        for status, count in sorted(stats.responses.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}")
+
+    lines.append("# HELP http_requests_in_flight Requests currently being served.")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    for (method, route), stats in routes:
+        lines.append(f"http_requests_in_flight{{{_labels(method=method, route=route)}}} {stats.in_flight}")
+
+    histograms = (
+        ("http_request_duration_seconds", "Request latency.", "seconds"),
+        ("http_request_db_seconds", "Time spent in SQL per request.", "db_seconds"),
+        ("http_request_db_statements", "SQL statements per request.", "statements"),
+    )
+    for name, help_text, attribute in histograms:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), stats in routes:
+            histogram: Histogram = getattr(stats, attribute)
+            _histogram(lines, name, histogram.snapshot(), _labels(method=method, route=route))
+
+
+def _flatten(lines: List[str], name: str, value) -> None:
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    elif isinstance(value, dict):
+        if value.keys() == {"count", "sum", "buckets"}:
+            lines.append(f"# TYPE {name} histogram")
+            _histogram(lines, name, value)
+            return
+        for key, item in value.items():
+            _flatten(lines, f"{name}_{_NAME_CHARS.sub('_', str(key))}", item)
+
+
+def render(metrics: RequestMetrics, stats: Dict[str, dict]) -> str:
+    lines: List[str] = []
+    _route_metrics(lines, metrics)
+    for provider, provider_stats in stats.items():
+        _flatten(lines, f"app_{_NAME_CHARS.sub('_', provider)}", provider_stats)
+    return "\n".join(lines) + "\n"
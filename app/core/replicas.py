@@ -0,0 +1,76 @@
+"""Routing of read-only sessions to read replicas.
+
+``ReplicaSelector`` picks the replica for each read session, either in
+turn ("round_robin") or the one with the fewest open sessions from this
+worker ("least_loaded"). ``ReadYourWrites`` remembers clients that just
+wrote, by bearer token, so their reads go to the primary until the
+replicas have had time to catch up.
+"""
+import itertools
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+from starlette.requests import HTTPConnection
+from .cache import TTLCache
+
+POLICIES = ("round_robin", "least_loaded")
+
+
+class ReplicaSelector:
+    def __init__(self, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replica policy {policy!r}")
+        self.policy = policy
+        self._turn = itertools.count()
+        self.in_flight: Dict[int, int] = defaultdict(int)
+        self.reads: Dict[str, int] = defaultdict(int)
+
+    def pick(self, replicas: int) -> int:
+        if self.policy == "least_loaded":
+            # Ties go round-robin so idle replicas share the load.
+            start = next(self._turn)
+            return min(
+                ((start + offset) % replicas for offset in range(replicas)),
+                key=lambda index: self.in_flight[index],
+            )
+        return next(self._turn) % replicas
+
+    @contextmanager
+    def reading(self, replica: int):
+        self.in_flight[replica] += 1
+        self.reads[f"replica_{replica}"] += 1
+        try:
+            yield
+        finally:
+            self.in_flight[replica] -= 1
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "in_flight": {f"replica_{index}": count for index, count in sorted(self.in_flight.items())},
+            "reads_total": dict(sorted(self.reads.items())),
+        }
+
+
+class ReadYourWrites:
+    """Clients that wrote in the last ``window`` seconds, per worker."""
+
+    def __init__(self, window: float, maxsize: int = 100000):
+        self._recent = TTLCache(maxsize, window)
+
+    @staticmethod
+    def _token(connection: HTTPConnection) -> Optional[str]:
+        scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+        return token if scheme.lower() == "bearer" and token else None
+
+    def mark(self, connection: HTTPConnection) -> None:
+        token = self._token(connection)
+        if token is not None:
+            self._recent.set(token, True)
+
+    def recent(self, connection: HTTPConnection) -> bool:
+        token = self._token(connection)
+        return token is not None and token in self._recent
+
+    def clear(self) -> None:
+        self._recent.clear()
@@ -0,0 +1,128 @@
+"""Fast JSON responses for trusted rows.
+
+Endpoints that already hold ORM objects or rows shaped exactly like their
+response model can serialize them with a pre-built serializer and return
+a ``FastJSONResponse``. That skips FastAPI's validate-then-dump pass over
+``response_model``, which would otherwise rebuild every row (and nested
+event) as a Pydantic model. Set ``FAST_JSON_RESPONSES=false`` to go back
+to the validated path; ``etag_response`` then validates against the model
+it is given, as it builds its body itself to hash it.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Type
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+from .config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+settings = get_settings()
+
+# Headers of the injected Response that describe its (empty) body.
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+def _default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def row_serializer(
+    model: Type[BaseModel], **nested: Callable[[Any], Any]
+) -> Callable[[Any], dict]:
+    """Build a function turning a trusted object into ``model``'s JSON shape.
+
+    Fields are read by attribute; ``nested`` maps field names to serializers
+    for their values.
+    """
+    fields = [name for name in model.model_fields if name not in nested]
+    getter = attrgetter(*fields)
+
+    def serialize(row: Any) -> dict:
+        values = getter(row)
+        data = dict(zip(fields, values if len(fields) > 1 else (values,)))
+        for name, serializer in nested.items():
+            data[name] = serializer(getattr(row, name))
+        return data
+
+    return serialize
+
+
+def fast_response(content: Any, response: Response = None, serializer: Callable = None):
+    """Return ``content`` as a FastJSONResponse, keeping headers set on ``response``.
+
+    ``serializer`` is applied to each item of a list (or to a single object)
+    first. With fast responses disabled the content is returned unchanged
+    for FastAPI to validate against the route's response model.
+    """
+    if not settings.fast_json_responses:
+        return content
+    if serializer is not None:
+        if isinstance(content, list):
+            content = [serializer(item) for item in content]
+        else:
+            content = serializer(content)
+    return FastJSONResponse(content, headers=_carried_headers(response))
+
+
+def _carried_headers(response: Response = None) -> dict:
+    if response is None:
+        return {}
+    return {
+        key: value
+        for key, value in response.headers.items()
+        if key not in _BODY_HEADERS
+    }
+
+
+@lru_cache
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def validated(model: Any, content: Any) -> Any:
+    """``content`` validated against ``model`` and dumped to JSON-ready data,
+    as FastAPI does for a route's response model."""
+    adapter = _adapter(model)
+    return adapter.dump_python(adapter.validate_python(content), mode="json")
+
+
+def etag_response(request: Request, content: Any, response: Response = None, model: Any = None) -> Response:
+    """Return JSON-ready ``content`` with an ETag, or 304 if the client has it.
+
+    Meant for per-user reads: the response may be cached privately but must
+    be revalidated, which costs the client one round trip and no body. With
+    fast responses disabled, ``content`` is first validated against
+    ``model``, the route's response model.
+    """
+    if model is not None and not settings.fast_json_responses:
+        content = validated(model, content)
+    body = dumps(content)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = _carried_headers(response)
+    headers.update(
+        {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    )
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,65 +1,166 @@
-from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..models.user import User
-from dotenv import load_dotenv
-import os
+from .cache import TTLCache
+from .config import get_settings
+from .passwords import check_password, hash_password, password_hasher
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user as carried by the token's claims."""
+    id: int
+    email: str
+    is_admin: bool
+
+
+class IdentityCache:
+    """Token -> CurrentUser cache with per-user invalidation.
+
+    ``invalidate_user`` drops the user's cached identities and marks every
+    token issued up to now as stale, so those tokens are re-checked against
+    the database instead of trusting their claims.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._identities = TTLCache(maxsize, ttl)
+        self._tokens_by_user: Dict[int, Set[str]] = defaultdict(set)
+        self._stale_before: Dict[int, datetime] = {}
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        return self._identities.get(token)
+
+    def set(self, token: str, identity: CurrentUser, ttl: float) -> None:
+        self._identities.set(token, identity, ttl)
+        # Forget tokens the LRU has already evicted while we are here.
+        tokens = {
+            cached for cached in self._tokens_by_user[identity.id]
+            if cached in self._identities
+        }
+        tokens.add(token)
+        self._tokens_by_user[identity.id] = tokens
+
+    def is_stale(self, user_id: int, issued_at: Optional[datetime]) -> bool:
+        stale_before = self._stale_before.get(user_id)
+        if stale_before is None:
+            return False
+        return issued_at is None or issued_at <= stale_before
+
+    def invalidate_user(self, user_id: int) -> None:
+        for token in self._tokens_by_user.pop(user_id, ()):
+            self._identities.pop(token)
+        self._stale_before[user_id] = datetime.now()
+
+    def clear(self) -> None:
+        self._identities.clear()
+        self._tokens_by_user.clear()
+        self._stale_before.clear()
+
+
+settings = get_settings()
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+identity_cache = IdentityCache(settings.auth_cache_size, settings.auth_cache_ttl)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Call after changing or deleting a user so its tokens are re-checked."""
+    identity_cache.invalidate_user(user_id)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+
+def _claim_datetime(payload: dict, claim: str) -> Optional[datetime]:
+    # Tokens are encoded from naive local datetimes, which jose treats as UTC.
+    value = payload.get(claim)
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    # jose pulls in its crypto backends on import; load it on first use.
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now() + expires_delta
     else:
         expire = datetime.now() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "iat": datetime.now()})
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def create_user_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "admin": user.is_admin},
+        expires_delta=expires_delta,
+    )
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    identity = identity_cache.get(token)
+    if identity is not None:
+        return identity
+
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+
+    user_id = payload.get("uid")
+    is_admin = payload.get("admin")
+    if (
+        isinstance(user_id, int)
+        and isinstance(is_admin, bool)
+        and not identity_cache.is_stale(user_id, _claim_datetime(payload, "iat"))
+    ):
+        identity = CurrentUser(id=user_id, email=email, is_admin=is_admin)
+    else:
+        # Tokens without identity claims, or issued before the user changed.
+        user = await db.scalar(select(User).where(User.email == email))
+        if user is None:
+            raise credentials_exception
+        identity = CurrentUser(id=user.id, email=user.email, is_admin=user.is_admin)
+
+    expires_at = _claim_datetime(payload, "exp")
+    if expires_at is not None:
+        identity_cache.set(
+            token, identity, (expires_at - datetime.now()).total_seconds()
+        )
+    return identity
 
 def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
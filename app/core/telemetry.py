@@ -0,0 +1,190 @@
+"""Per-route request metrics and per-request database cost.
+
+``RequestMetricsMiddleware`` times every request under its route template
+and opens a ``RequestCost`` for it in a context variable. SQLAlchemy cursor
+hooks, installed on every engine, add each statement's count and duration
+to the current request's cost and log statements slower than
+``SLOW_QUERY_MS`` together with the route they came from.
+"""
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from .config import get_settings
+from .metrics import Histogram, register_stats
+
+logger = logging.getLogger(__name__)
+
+# Per-request statement counts, not seconds.
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestCost:
+    __slots__ = ("route", "statements", "db_seconds")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current_cost: ContextVar[Optional[RequestCost]] = ContextVar("request_cost", default=None)
+
+
+class RouteStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.responses: Dict[str, int] = {}
+        self.seconds = Histogram()
+        self.db_seconds = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+
+
+class RequestMetrics:
+    def __init__(self, slow_query_seconds: Optional[float], slow_query_log_size: int):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_queries: Deque[dict] = deque(maxlen=slow_query_log_size)
+        self.slow_queries_total = 0
+        # Statements run outside any request (startup, the hold sweeper).
+        self.background_statements = 0
+        self.background_db_seconds = 0.0
+
+    def route(self, method: str, route: str) -> RouteStats:
+        key = (method, route)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        return stats
+
+    def record_statement(self, statement: str, parameters: Any, executemany: bool, elapsed: float) -> None:
+        cost = _current_cost.get()
+        if cost is None:
+            self.background_statements += 1
+            self.background_db_seconds += elapsed
+        else:
+            cost.statements += 1
+            cost.db_seconds += elapsed
+
+        if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds:
+            entry = {
+                "route": cost.route if cost is not None else None,
+                "milliseconds": round(elapsed * 1000, 3),
+                "statement": " ".join(statement.split()),
+                "parameters": parameter_shape(parameters, executemany),
+            }
+            self.slow_queries_total += 1
+            self.slow_queries.append(entry)
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s; parameters %s",
+                entry["milliseconds"], entry["route"] or "background",
+                entry["statement"], entry["parameters"],
+            )
+
+    def reset(self) -> None:
+        self.routes.clear()
+        self.slow_queries.clear()
+        self.slow_queries_total = 0
+        self.background_statements = 0
+        self.background_db_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "slow_queries_total": self.slow_queries_total,
+            "recent_slow_queries": list(self.slow_queries),
+            "background_statements_total": self.background_statements,
+            "background_db_seconds_total": round(self.background_db_seconds, 6),
+        }
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe bound parameters by type only, so values never reach the log."""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _route_template(routes, scope) -> str:
+    # Same matching the router does next; paths are templates such as
+    # /api/v1/events/{event_id:int}, so label cardinality stays bounded.
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their end."""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope["app"].router.routes, scope)
+        stats = self.metrics.route(scope["method"], route)
+        cost = RequestCost(route)
+        token = _current_cost.set(cost)
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            stats.in_flight -= 1
+            stats.seconds.observe(time.perf_counter() - started)
+            stats.db_seconds.observe(cost.db_seconds)
+            stats.statements.observe(cost.statements)
+            stats.responses[status] = stats.responses.get(status, 0) + 1
+            _current_cost.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which a failed statement simply drops.
+    if context is not None:
+        context._telemetry_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_telemetry_started", None)
+    if started is not None:
+        request_metrics.record_statement(
+            statement, parameters, executemany, time.perf_counter() - started
+        )
+
+
+def install_sql_hooks() -> None:
+    """Attribute every statement on every engine to the current request."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+settings = get_settings()
+request_metrics = RequestMetrics(
+    slow_query_seconds=settings.slow_query_ms / 1000 if settings.slow_query_ms >= 0 else None,
+    slow_query_log_size=settings.slow_query_log_size,
+)
+register_stats("sql", request_metrics.stats)
@@ -1,27 +1,295 @@
+from functools import lru_cache, partial
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from starlette.concurrency import run_in_threadpool
+from .core.config import get_settings
+from .core.metrics import register_stats
+from .core.pool import PoolStats, pool_options
+from .core.replicas import ReadYourWrites, ReplicaSelector
 
-load_dotenv()
+settings = get_settings()
 
+# asyncio DBAPI used for each backend when DATABASE_URL names a sync driver.
+# Only these backends are supported: the booking path relies on
+# INSERT/UPDATE ... RETURNING and ON CONFLICT upserts (app.services.rollups).
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-print("Database connected")
+def async_database_url(url: str) -> str:
+    """Return ``url`` rewritten to use the backend's asyncio driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if url.get_driver_name() in ASYNC_DRIVERS.values():
+        return url.render_as_string(hide_password=False)
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def sync_database_url(url: str) -> str:
+    """Return ``url`` rewritten to use the backend's default sync driver."""
+    url = make_url(url)
+    if url.get_driver_name() in ASYNC_DRIVERS.values():
+        url = url.set(drivername=url.get_backend_name())
+    return url.render_as_string(hide_password=False)
+
+
+def _connect_args(url: str) -> dict:
+    # Sync sessions hop between threadpool threads, which pysqlite rejects
+    # unless the same-thread check is off.
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"check_same_thread": False}
+    return {}
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+replica_pool_stats = [PoolStats() for _ in settings.database_replica_urls]
+
+
+# Engines are built on first use rather than at import; neither connects
+# until a session needs it (the app's lifespan opens and warms the pool).
+@lru_cache
+def get_engine():
+    url = sync_database_url(settings.database_url)
+    engine = create_engine(
+        url, connect_args=_connect_args(url), **pool_options(url, settings, sync_pool_stats)
+    )
+    sync_pool_stats.attach(engine)
+    return engine
+
+
+@lru_cache
+def get_async_engine():
+    url = async_database_url(settings.database_url)
+    engine = create_async_engine(
+        url, **pool_options(url, settings, async_pool_stats, is_async=True)
+    )
+    async_pool_stats.attach(engine.sync_engine)
+    return engine
+
+
+@lru_cache
+def get_replica_engines() -> tuple:
+    """One engine per DATABASE_REPLICA_URLS entry, async or sync like the primary."""
+    engines = []
+    for url, stats in zip(settings.database_replica_urls, replica_pool_stats):
+        if settings.database_async:
+            url = async_database_url(url)
+            engine = create_async_engine(url, **pool_options(url, settings, stats, is_async=True))
+            stats.attach(engine.sync_engine)
+        else:
+            url = sync_database_url(url)
+            engine = create_engine(
+                url, connect_args=_connect_args(url), **pool_options(url, settings, stats)
+            )
+            stats.attach(engine)
+        engines.append(engine)
+    return tuple(engines)
+
+
+def pool_stats() -> dict:
+    """Telemetry of the engines created so far, keyed by kind."""
+    engines = [("async", async_pool_stats), ("sync", sync_pool_stats)]
+    engines += [(f"replica_{index}", stats) for index, stats in enumerate(replica_pool_stats)]
+    return {name: stats.snapshot() for name, stats in engines if stats.engine is not None}
+
+
+register_stats("db_pool", pool_stats)
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of whichever engines have been created."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        await run_in_threadpool(get_engine().dispose)
+    if get_replica_engines.cache_info().currsize:
+        for engine in get_replica_engines():
+            if settings.database_async:
+                await engine.dispose()
+            else:
+                await run_in_threadpool(engine.dispose)
+
+
+@lru_cache
+def _async_sessionmaker():
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+@lru_cache
+def _sync_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
 
 Base = declarative_base()
 
-from .models.user import User
-from .models.event import Event
-from .models.booking import Booking
+# Registers every model on Base. Module imports, so that importing a model
+# module first (which imports this one) doesn't hit a partial module.
+from .models import user, event, booking, hold, sales, outbox  # noqa: F401
+
+
+class _ThreadpoolResult:
+    """Minimal ``AsyncResult`` stand-in that fetches each partition of a
+    sync ``Result`` in the threadpool."""
+
+    def __init__(self, result, run):
+        self._result = result
+        self._run = run
+
+    async def partitions(self, size=None):
+        partitions = self._result.partitions(size)
+        while True:
+            rows = await self._run(next, partitions, None)
+            if rows is None:
+                break
+            yield rows
+
+
+class SyncSessionAdapter:
+    """Expose a sync ``Session`` through the ``AsyncSession`` methods the
+    endpoints use, running each database call in the threadpool so it never
+    blocks the event loop."""
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def _run(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance):
+        self.sync_session.expunge(instance)
 
-def get_db():
-    db = SessionLocal()
-    try:
+    def get_bind(self, *args, **kwargs):
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def stream(self, statement, params=None, **kwargs):
+        result = await self._run(self.sync_session.execute, statement, params, **kwargs)
+        return _ThreadpoolResult(result, self._run)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await self._run(fn, self.sync_session, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance, attribute_names=None):
+        await self._run(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self, objects=None):
+        await self._run(self.sync_session.flush, objects)
+
+    async def commit(self):
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self):
+        await self._run(self.sync_session.rollback)
+
+    async def close(self):
+        await self._run(self.sync_session.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _sync_session(maker) -> SyncSessionAdapter:
+    return SyncSessionAdapter(maker(expire_on_commit=False))
+
+
+def SyncSessionLocal() -> SyncSessionAdapter:
+    return _sync_session(_sync_sessionmaker())
+
+
+def get_session_factory():
+    if settings.database_async:
+        return _async_sessionmaker()
+    return SyncSessionLocal
+
+
+@lru_cache
+def _replica_sessionmakers() -> tuple:
+    if settings.database_async:
+        return tuple(
+            async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            for engine in get_replica_engines()
+        )
+    return tuple(
+        partial(_sync_session, sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        for engine in get_replica_engines()
+    )
+
+
+def get_replica_session_factories() -> tuple:
+    return _replica_sessionmakers()
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+replica_selector = ReplicaSelector(settings.replica_policy)
+read_your_writes = ReadYourWrites(settings.read_your_writes_seconds)
+register_stats("db_replicas", replica_selector.stats)
+
+
+async def get_db(request: Request, session_factory=Depends(get_session_factory)):
+    """Session on the primary, for requests that write."""
+    if request.method not in SAFE_METHODS:
+        read_your_writes.mark(request)
+    async with session_factory() as db:
+        yield db
+
+
+async def get_read_db(
+    request: Request,
+    session_factory=Depends(get_session_factory),
+    replicas=Depends(get_replica_session_factories),
+):
+    """Session for read-only endpoints.
+
+    Uses a replica when any are configured, except for a client that wrote
+    within READ_YOUR_WRITES_SECONDS, which reads from the primary.
+    """
+    if replicas and not read_your_writes.recent(request):
+        index = replica_selector.pick(len(replicas))
+        with replica_selector.reading(index):
+            async with replicas[index]() as db:
+                yield db
+        return
+    if replicas:
+        replica_selector.reads["read_your_writes"] += 1
+        request.state.reads_own_writes = True
+    async with session_factory() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+def reads_own_writes(request: Request) -> bool:
+    """Whether get_read_db sent this request to the primary so the client
+    sees its own writes; such reads should not be served from a cache
+    that replica reads fill."""
+    return getattr(request.state, "reads_own_writes", False)
@@ -1,27 +1,140 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
-from .api.v1.router import api_router
-from .database import engine, Base
 from fastapi.middleware.cors import CORSMiddleware
+from .api import health, metrics
+from .api.v1.router import api_router
+from .core.config import Settings, get_settings
+from .core.metrics import register_stats
+from .core.overload import LoadSheddingMiddleware, limiter_from_settings
+from .core.pagination import NEXT_CURSOR_HEADER
+from .core.passwords import password_hasher
+from .core.telemetry import RequestMetricsMiddleware, install_sql_hooks, request_metrics
+from .database import dispose_engines, get_session_factory
+from .services.holds import run_sweeper
+from .services.outbox import run_outbox_worker
+from .startup import precompile, verify_schema, warm_pool
+
+logger = logging.getLogger(__name__)
+
+
+# The settings create_app applies per app. Everything else (the database,
+# auth, caches, page sizes, ...) is read from the environment through
+# get_settings() when the modules are imported.
+APP_SETTINGS = frozenset({
+    "verify_schema_on_startup",
+    "db_pool_warm_connections",
+    "precompile_statements",
+    "outbox_worker_in_process",
+    "overload_limit_mode",
+    "overload_max_concurrency",
+    "overload_min_concurrency",
+    "overload_queue_limit",
+    "overload_queue_timeout_ms",
+    "overload_latency_target_ms",
+    "overload_retry_after",
+    "cors_origins",
+    "metrics_enabled",
+})
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the application; ``uvicorn --factory app.main:create_app`` works too.
+
+    Nothing touches the database until the lifespan starts, which warms the
+    pool, checks the schema revision and precompiles the hot statements
+    before the first request is served.
+
+    ``settings`` may only differ from the environment's in APP_SETTINGS;
+    other differences raise ValueError rather than being ignored. Point an
+    app at another database by overriding ``get_session_factory``.
+    """
+    if settings is None:
+        settings = get_settings()
+    else:
+        environment = get_settings()
+        ignored = sorted(
+            name for name in type(settings).model_fields
+            if name not in APP_SETTINGS and getattr(settings, name) != getattr(environment, name)
+        )
+        if ignored:
+            raise ValueError(
+                f"create_app() cannot apply {', '.join(ignored)}; "
+                "these settings come from the environment"
+            )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = time.perf_counter()
+        session_factory = app.dependency_overrides.get(get_session_factory, get_session_factory)()
+        try:
+            if settings.verify_schema_on_startup:
+                revision = await verify_schema(session_factory)
+                logger.info("Database schema at revision %d", revision)
+            if settings.db_pool_warm_connections:
+                await warm_pool(
+                    session_factory,
+                    min(settings.db_pool_warm_connections, settings.db_pool_size),
+                )
+            if settings.precompile_statements:
+                await precompile(session_factory)
+            logger.info("Startup finished in %.1f ms", (time.perf_counter() - started) * 1000)
+
+            stop_background = asyncio.Event()
+            background = [asyncio.create_task(run_sweeper(session_factory, stop_background))]
+            if settings.outbox_worker_in_process:
+                background.append(
+                    asyncio.create_task(run_outbox_worker(session_factory, stop_background))
+                )
+            app.state.ready = True
+            try:
+                yield
+            finally:
+                # Fail readiness first so load balancers stop sending traffic.
+                app.state.ready = False
+                stop_background.set()
+                await asyncio.gather(*background)
+                password_hasher.shutdown()
+        finally:
+            # Pooled aiosqlite connections keep worker threads alive.
+            await dispose_engines()
+
+    app = FastAPI(title="Event Booking System", lifespan=lifespan)
+
+    if settings.overload_limit_mode != "off":
+        # Innermost, so shed responses still get CORS headers and are
+        # counted by the request metrics.
+        limiter = limiter_from_settings(settings)
+        register_stats("load_shedding", limiter.stats)
+        app.add_middleware(
+            LoadSheddingMiddleware, limiter=limiter, retry_after=settings.overload_retry_after
+        )
 
-origins = [
-    "http://localhost:5173",
-]
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
 
-Base.metadata.create_all(bind=engine)
+    app.include_router(api_router, prefix="/api/v1")
+    app.include_router(health.router, tags=["health"])
 
-app = FastAPI(title="Event Booking System")
+    if settings.metrics_enabled:
+        install_sql_hooks()
+        app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+        app.include_router(metrics.router, tags=["metrics"])
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    @app.get("/")
+    async def main():
+        return {"msg": "Event management system"}
 
-app.include_router(api_router, prefix="/api/v1")
+    return app
 
 
-@app.get("/")
-async def main():
-    return {"msg": "Event management system"}
+app = create_app()
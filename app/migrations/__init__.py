@@ -0,0 +1,91 @@
+"""Versioned schema migrations.
+
+Each module in ``app/migrations/versions`` defines an integer ``revision``,
+a one-line ``description`` and ``upgrade(conn)`` / ``downgrade(conn)``
+functions taking a SQLAlchemy ``Connection``. The applied revision is kept
+in the single-row ``schema_version`` table. Run them with
+``python -m app.cli db upgrade``.
+"""
+import importlib
+import pkgutil
+from types import ModuleType
+from typing import List, Optional
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select
+from sqlalchemy.engine import Connection
+
+VERSION_TABLE = "schema_version"
+
+_version_metadata = MetaData()
+schema_version = Table(
+    VERSION_TABLE,
+    _version_metadata,
+    Column("version_num", Integer, nullable=False),
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+def load_migrations() -> List[ModuleType]:
+    from . import versions
+
+    migrations = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+        if not info.name.startswith("_")
+    ]
+    migrations.sort(key=lambda module: module.revision)
+    revisions = [module.revision for module in migrations]
+    if revisions != list(range(1, len(revisions) + 1)):
+        raise MigrationError(f"Migration revisions must be 1..N without gaps, got {revisions}")
+    return migrations
+
+
+def head() -> int:
+    return len(load_migrations())
+
+
+def current_revision(conn: Connection) -> int:
+    if not inspect(conn).has_table(VERSION_TABLE):
+        return 0
+    return conn.execute(select(schema_version.c.version_num)).scalar() or 0
+
+
+def _set_revision(conn: Connection, revision: int) -> None:
+    _version_metadata.create_all(conn, checkfirst=True)
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version_num=revision))
+
+
+def upgrade(conn: Connection, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: head)."""
+    migrations = load_migrations()
+    target = len(migrations) if target is None else target
+    if not 0 <= target <= len(migrations):
+        raise MigrationError(f"Unknown revision {target}")
+    current = current_revision(conn)
+
+    applied = []
+    for migration in migrations[current:target]:
+        migration.upgrade(conn)
+        _set_revision(conn, migration.revision)
+        applied.append(migration.revision)
+    return applied
+
+
+def downgrade(conn: Connection, target: int) -> List[int]:
+    """Revert applied migrations down to ``target`` (0 removes everything)."""
+    migrations = load_migrations()
+    current = current_revision(conn)
+    if not 0 <= target <= current:
+        raise MigrationError(f"Cannot downgrade from {current} to {target}")
+
+    reverted = []
+    for migration in reversed(migrations[target:current]):
+        migration.downgrade(conn)
+        reverted.append(migration.revision)
+        _set_revision(conn, migration.revision - 1)
+    if target == 0:
+        schema_version.drop(conn, checkfirst=True)
+    return reverted
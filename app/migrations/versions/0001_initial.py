@@ -0,0 +1,48 @@
+from datetime import datetime
+import sqlalchemy as sa
+
+revision = 1
+description = "users, events and bookings"
+
+metadata = sa.MetaData()
+
+users = sa.Table(
+    "users",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("email", sa.String, unique=True, index=True),
+    sa.Column("hashed_password", sa.String),
+    sa.Column("is_admin", sa.Boolean, default=False),
+)
+
+events = sa.Table(
+    "events",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("title", sa.String, index=True),
+    sa.Column("description", sa.String),
+    sa.Column("date", sa.DateTime),
+    sa.Column("venue", sa.String),
+    sa.Column("total_tickets", sa.Integer),
+    sa.Column("available_tickets", sa.Integer),
+    sa.Column("price", sa.Float),
+)
+
+bookings = sa.Table(
+    "bookings",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+    sa.Column("event_id", sa.Integer, sa.ForeignKey("events.id", ondelete="CASCADE")),
+    sa.Column("booking_date", sa.DateTime, default=datetime.now),
+    sa.Column("number_of_tickets", sa.Integer),
+)
+
+
+def upgrade(conn):
+    # checkfirst adopts databases created by the old import-time create_all.
+    metadata.create_all(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    metadata.drop_all(conn, checkfirst=True)
@@ -0,0 +1,29 @@
+import sqlalchemy as sa
+
+revision = 2
+description = "indexes for event listings, booking lookups and history"
+
+# (name, table, columns)
+INDEXES = [
+    ("ix_events_date_available_tickets", "events", ["date", "available_tickets"]),
+    # Also serves lookups by event_id alone (admin event bookings, cancel).
+    ("ix_bookings_event_id_booking_date", "bookings", ["event_id", "booking_date"]),
+    # Also serves lookups by user_id alone.
+    ("ix_bookings_user_id_booking_date", "bookings", ["user_id", "booking_date"]),
+    ("ix_bookings_booking_date", "bookings", ["booking_date"]),
+]
+
+
+def _index(conn, name, table, columns):
+    table = sa.Table(table, sa.MetaData(), autoload_with=conn)
+    return sa.Index(name, *(table.c[column] for column in columns))
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        _index(conn, name, table, columns).create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    for name, table, columns in reversed(INDEXES):
+        _index(conn, name, table, columns).drop(conn, checkfirst=True)
@@ -0,0 +1,20 @@
+import sqlalchemy as sa
+
+revision = 3
+description = "flash-sale flag on events"
+
+
+def _has_column(conn):
+    return "flash_sale" in {column["name"] for column in sa.inspect(conn).get_columns("events")}
+
+
+def upgrade(conn):
+    if not _has_column(conn):
+        conn.execute(
+            sa.text("ALTER TABLE events ADD COLUMN flash_sale BOOLEAN NOT NULL DEFAULT false")
+        )
+
+
+def downgrade(conn):
+    if _has_column(conn):
+        conn.execute(sa.text("ALTER TABLE events DROP COLUMN flash_sale"))
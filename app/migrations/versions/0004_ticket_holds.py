@@ -0,0 +1,31 @@
+from datetime import datetime
+import sqlalchemy as sa
+
+revision = 4
+description = "ticket holds"
+
+metadata = sa.MetaData()
+
+# Stand-ins so the foreign keys resolve; only ticket_holds is created here.
+sa.Table("users", metadata, sa.Column("id", sa.Integer, primary_key=True))
+sa.Table("events", metadata, sa.Column("id", sa.Integer, primary_key=True))
+
+ticket_holds = sa.Table(
+    "ticket_holds",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    sa.Column("event_id", sa.Integer, sa.ForeignKey("events.id", ondelete="CASCADE"), nullable=False),
+    sa.Column("number_of_tickets", sa.Integer, nullable=False),
+    sa.Column("created_at", sa.DateTime, default=datetime.now, nullable=False),
+    sa.Column("expires_at", sa.DateTime, nullable=False),
+    sa.Index("ix_ticket_holds_expires_at", "expires_at"),
+)
+
+
+def upgrade(conn):
+    ticket_holds.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    ticket_holds.drop(conn, checkfirst=True)
@@ -0,0 +1,70 @@
+revision = 5
+description = "full-text search index over event title, description and venue"
+
+# PostgreSQL: an expression GIN index; app.services.search repeats the
+# expression verbatim so the planner can use it.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(venue, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+# SQLite: an external-content FTS5 table kept in sync by triggers. The
+# update trigger only fires for the indexed columns, so ticket counter
+# updates on the booking path do not touch the index.
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, venue,
+        content='events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, venue)
+        VALUES (new.id, new.title, new.description, new.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, venue)
+        VALUES ('delete', old.id, old.title, old.description, old.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_update
+    AFTER UPDATE OF title, description, venue ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, venue)
+        VALUES ('delete', old.id, old.title, old.description, old.venue);
+        INSERT INTO events_fts(rowid, title, description, venue)
+        VALUES (new.id, new.title, new.description, new.venue);
+    END
+    """,
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS events_fts_update",
+    "DROP TRIGGER IF EXISTS events_fts_delete",
+    "DROP TRIGGER IF EXISTS events_fts_insert",
+    "DROP TABLE IF EXISTS events_fts",
+]
+
+
+def upgrade(conn):
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            conn.exec_driver_sql(statement)
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_events_search ON events USING GIN (({POSTGRES_DOCUMENT}))"
+        )
+
+
+def downgrade(conn):
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            conn.exec_driver_sql(statement)
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_events_search")
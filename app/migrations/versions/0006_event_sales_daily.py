@@ -0,0 +1,38 @@
+import sqlalchemy as sa
+
+revision = 6
+description = "per-event daily sales rollups"
+
+metadata = sa.MetaData()
+
+# Stand-in so the foreign key resolves; only event_sales_daily is created here.
+sa.Table("events", metadata, sa.Column("id", sa.Integer, primary_key=True))
+
+event_sales_daily = sa.Table(
+    "event_sales_daily",
+    metadata,
+    sa.Column("event_id", sa.Integer, sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+    sa.Column("day", sa.Date, primary_key=True),
+    sa.Column("tickets_sold", sa.Integer, nullable=False, default=0),
+    sa.Column("revenue", sa.Float, nullable=False, default=0.0),
+    sa.Column("bookings", sa.Integer, nullable=False, default=0),
+    sa.Index("ix_event_sales_daily_day", "day"),
+)
+
+
+def upgrade(conn):
+    if not sa.inspect(conn).has_table("event_sales_daily"):
+        event_sales_daily.create(conn)
+        conn.exec_driver_sql(
+            """
+            INSERT INTO event_sales_daily (event_id, day, tickets_sold, revenue, bookings)
+            SELECT b.event_id, date(b.booking_date), sum(b.number_of_tickets),
+                   sum(b.number_of_tickets * e.price), count(*)
+            FROM bookings b JOIN events e ON e.id = b.event_id
+            GROUP BY b.event_id, date(b.booking_date)
+            """
+        )
+
+
+def downgrade(conn):
+    event_sales_daily.drop(conn, checkfirst=True)
@@ -0,0 +1,26 @@
+import sqlalchemy as sa
+
+revision = 7
+description = "idempotency keys"
+
+metadata = sa.MetaData()
+
+idempotency_keys = sa.Table(
+    "idempotency_keys",
+    metadata,
+    sa.Column("key", sa.String(64), primary_key=True),
+    sa.Column("fingerprint", sa.String(64), nullable=False),
+    sa.Column("status_code", sa.Integer, nullable=True),
+    sa.Column("headers", sa.Text, nullable=True),
+    sa.Column("body", sa.LargeBinary, nullable=True),
+    sa.Column("expires_at", sa.DateTime, nullable=False),
+    sa.Index("ix_idempotency_keys_expires_at", "expires_at"),
+)
+
+
+def upgrade(conn):
+    idempotency_keys.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    idempotency_keys.drop(conn, checkfirst=True)
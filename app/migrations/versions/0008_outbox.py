@@ -0,0 +1,28 @@
+import sqlalchemy as sa
+
+revision = 8
+description = "outbox"
+
+metadata = sa.MetaData()
+
+outbox = sa.Table(
+    "outbox",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("topic", sa.String(100), nullable=False),
+    sa.Column("payload", sa.Text, nullable=False),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("available_at", sa.DateTime, nullable=False),
+    sa.Column("attempts", sa.Integer, nullable=False, default=0),
+    sa.Column("last_error", sa.Text, nullable=True),
+    sa.Column("dead_at", sa.DateTime, nullable=True),
+    sa.Index("ix_outbox_available_at", "available_at"),
+)
+
+
+def upgrade(conn):
+    outbox.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    outbox.drop(conn, checkfirst=True)
@@ -0,0 +1,25 @@
+import sqlalchemy as sa
+
+revision = 9
+description = "unit price on bookings"
+
+
+def _has_column(conn):
+    return "unit_price" in {column["name"] for column in sa.inspect(conn).get_columns("bookings")}
+
+
+def upgrade(conn):
+    if not _has_column(conn):
+        conn.execute(sa.text("ALTER TABLE bookings ADD COLUMN unit_price FLOAT"))
+        # Existing bookings are priced as the rollups priced them so far.
+        conn.execute(
+            sa.text(
+                "UPDATE bookings SET unit_price = "
+                "(SELECT price FROM events WHERE events.id = bookings.event_id)"
+            )
+        )
+
+
+def downgrade(conn):
+    if _has_column(conn):
+        conn.execute(sa.text("ALTER TABLE bookings DROP COLUMN unit_price"))
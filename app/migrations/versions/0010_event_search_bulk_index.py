@@ -0,0 +1,41 @@
+revision = 10
+description = "bulk imports index events for search once per chunk"
+
+# SQLite only. While events_fts_bulk has a row the per-row insert trigger
+# is skipped; app.services.search.insert_events adds the row, inserts a
+# chunk and indexes it with one INSERT ... SELECT in the same transaction,
+# which holds the write lock throughout, so no other insert sees the flag.
+SQLITE_UPGRADE = [
+    "CREATE TABLE IF NOT EXISTS events_fts_bulk (active INTEGER NOT NULL)",
+    "DROP TRIGGER IF EXISTS events_fts_insert",
+    """
+    CREATE TRIGGER events_fts_insert AFTER INSERT ON events
+    WHEN NOT EXISTS (SELECT 1 FROM events_fts_bulk) BEGIN
+        INSERT INTO events_fts(rowid, title, description, venue)
+        VALUES (new.id, new.title, new.description, new.venue);
+    END
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS events_fts_insert",
+    """
+    CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, venue)
+        VALUES (new.id, new.title, new.description, new.venue);
+    END
+    """,
+    "DROP TABLE IF EXISTS events_fts_bulk",
+]
+
+
+def upgrade(conn):
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            conn.exec_driver_sql(statement)
+
+
+def downgrade(conn):
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            conn.exec_driver_sql(statement)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
@@ -11,6 +11,14 @@ class Booking(Base):
     event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"))
     booking_date = Column(DateTime, default=datetime.now)
     number_of_tickets = Column(Integer)
+    # The event's price when booked; sales rollups are kept in it.
+    unit_price = Column(Float)
     
     user = relationship("User", back_populates="bookings")
-    event = relationship("Event", back_populates="bookings")
\ No newline at end of file
+    event = relationship("Event", back_populates="bookings")
+
+    __table_args__ = (
+        Index("ix_bookings_event_id_booking_date", "event_id", "booking_date"),
+        Index("ix_bookings_user_id_booking_date", "user_id", "booking_date"),
+        Index("ix_bookings_booking_date", "booking_date"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, Index, false
 from sqlalchemy.orm import relationship
 from ..database import Base
 
@@ -13,5 +13,11 @@ class Event(Base):
     total_tickets = Column(Integer)
     available_tickets = Column(Integer)
     price = Column(Float)
+    # Bookings for flash-sale events go through the group-commit queue.
+    flash_sale = Column(Boolean, nullable=False, default=False, server_default=false())
     
     bookings = relationship("Booking", back_populates="event")
+
+    __table_args__ = (
+        Index("ix_events_date_available_tickets", "date", "available_tickets"),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime, Index
+from ..database import Base
+
+class IdempotencyRecord(Base):
+    """A write request's response, stored under its Idempotency-Key.
+
+    ``status_code`` is NULL while the first request with the key is still
+    running; ``expires_at`` then bounds how long it may hold the key.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
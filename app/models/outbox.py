@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from ..database import Base
+
+class OutboxMessage(Base):
+    """A side effect of a committed write, waiting for the outbox worker.
+
+    Rows are inserted in the same transaction as the write they describe
+    and deleted once delivered. ``available_at`` is when the row may next
+    be claimed: a claim moves it past the lease, a failure past the
+    backoff. Rows that used up their attempts get ``dead_at`` and stay for
+    inspection.
+    """
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    available_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    dead_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_available_at", "available_at"),
+    )
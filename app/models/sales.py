@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, Float, Index
+from ..database import Base
+
+class EventSalesDaily(Base):
+    """Tickets, revenue and bookings per event and booking day.
+
+    Maintained incrementally in the same transaction as every booking and
+    cancellation; ``python -m app.cli stats rebuild`` recomputes it.
+    """
+    __tablename__ = "event_sales_daily"
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    tickets_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    bookings = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_event_sales_daily_day", "day"),
+    )
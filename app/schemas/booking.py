@@ -1,17 +1,23 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Dict, List
 from app.schemas.user import User
-from app.schemas.event import Event
+from app.schemas.event import Event, serialize_event
+from app.core.responses import row_serializer
 
 
 class BookingBase(BaseModel):
-    number_of_tickets: int
+    number_of_tickets: int = Field(gt=0)
 
 
 class BookingCreate(BookingBase):
     event_id: int
 
 
+class BookingBatchCreate(BaseModel):
+    bookings: List[BookingCreate] = Field(min_length=1, max_length=100)
+
+
 class Booking(BookingBase):
     id: int
     user_id: int
@@ -34,3 +40,27 @@ class BookingWithDetails(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BookingCompact(BaseModel):
+    id: int
+    event_id: int
+    user_id: int
+    num_tickets: int
+    total_price: float
+    booking_date: datetime
+
+
+class BookingPage(BaseModel):
+    """Bookings with each referenced event and user email included once."""
+    bookings: List[BookingCompact]
+    events: Dict[int, Event]
+    users: Dict[int, str]
+
+
+serialize_booking = row_serializer(Booking)
+
+
+def serialize_booking_details(booking: dict) -> dict:
+    """Serialize a dict built from a booking-details row; ``event`` is an ORM object."""
+    return {**booking, "event": serialize_event(booking["event"])}
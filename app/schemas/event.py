@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from ..core.responses import row_serializer
 
 class EventBase(BaseModel):
     title: str
@@ -9,6 +10,7 @@ class EventBase(BaseModel):
     venue: str
     total_tickets: int
     price: float
+    flash_sale: bool = False
 
 class EventCreate(EventBase):
     pass
@@ -20,6 +22,7 @@ class EventUpdate(BaseModel):
     venue: Optional[str] = None
     total_tickets: Optional[int] = None
     price: Optional[float] = None
+    flash_sale: Optional[bool] = None
 
 class Event(EventBase):
     id: int
@@ -27,3 +30,13 @@ class Event(EventBase):
 
     class Config:
         from_attributes = True
+
+serialize_event = row_serializer(Event)
+
+class EventImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class EventImportResult(BaseModel):
+    created: int
+    errors: List[EventImportError]
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class HoldCreate(BaseModel):
+    number_of_tickets: int = Field(gt=0)
+
+
+class Hold(HoldCreate):
+    id: int
+    user_id: int
+    event_id: int
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
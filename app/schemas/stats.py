@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+
+class DailySales(BaseModel):
+    day: date
+    tickets_sold: int
+    revenue: float
+    bookings: int
+
+    class Config:
+        from_attributes = True
+
+
+class EventSales(BaseModel):
+    event_id: int
+    tickets_sold: int
+    revenue: float
+    bookings: int
+    daily: List[DailySales]
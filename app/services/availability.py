@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+from sqlalchemy import select
+from ..core.config import get_settings
+from ..core.metrics import register_stats
+from ..core.responses import dumps
+from ..models.event import Event
+
+logger = logging.getLogger(__name__)
+
+# Subscriber.value before the first read.
+_UNSET = object()
+
+
+class Subscription:
+    """One client's view of an event's available tickets.
+
+    Only the latest value is kept, so a slow client skips intermediate
+    counts instead of queueing them.
+    """
+
+    def __init__(self):
+        self.value = _UNSET
+        self._changed = asyncio.Event()
+
+    def _deliver(self, value: Optional[int]) -> None:
+        self.value = value
+        self._changed.set()
+
+    async def next(self, timeout: float) -> Optional[int]:
+        """Wait for the next count; None once the event is deleted.
+
+        Raises ``asyncio.TimeoutError`` when nothing changed for ``timeout``
+        seconds, so callers can send a keepalive.
+        """
+        await asyncio.wait_for(self._changed.wait(), timeout)
+        self._changed.clear()
+        return self.value
+
+
+class _Channel:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.subscriptions: Set[Subscription] = set()
+        self.dirty = asyncio.Event()
+        self.value = _UNSET
+        self.task: Optional[asyncio.Task] = None
+
+
+class AvailabilityHub:
+    """In-process pub/sub of events' available tickets.
+
+    Writers call ``notify`` after changing an event's inventory, which only
+    sets a flag. Each event with subscribers has one fan-out task that
+    reads the count once and hands it to every subscriber, then waits at
+    least ``interval`` seconds before reading again, so a burst of bookings
+    costs one query and at most one message per subscriber per interval.
+    Inventory changed by other workers is picked up by re-reading every
+    ``poll_interval`` seconds. The task exits with its last subscriber.
+    """
+
+    def __init__(self, interval: float, poll_interval: float, max_subscribers: int):
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self._channels: Dict[int, _Channel] = {}
+        self.subscribers = 0
+        self.notifications = 0
+        self.reads = 0
+        self.messages = 0
+
+    def notify(self, event_id: int) -> None:
+        self.notifications += 1
+        channel = self._channels.get(event_id)
+        if channel is not None:
+            channel.dirty.set()
+
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    @asynccontextmanager
+    async def subscribe(self, session_factory, event_id: int) -> AsyncIterator[Subscription]:
+        channel = self._channels.get(event_id)
+        if channel is None:
+            channel = self._channels[event_id] = _Channel(session_factory)
+            channel.task = asyncio.create_task(self._fan_out(event_id, channel))
+        subscription = Subscription()
+        if channel.value is not _UNSET:
+            subscription._deliver(channel.value)
+        channel.subscriptions.add(subscription)
+        self.subscribers += 1
+        try:
+            yield subscription
+        finally:
+            channel.subscriptions.discard(subscription)
+            self.subscribers -= 1
+            if not channel.subscriptions:
+                channel.dirty.set()  # let the fan-out task exit now
+
+    async def _read(self, channel: _Channel, event_id: int) -> Optional[int]:
+        self.reads += 1
+        async with channel.session_factory() as db:
+            return await db.scalar(select(Event.available_tickets).where(Event.id == event_id))
+
+    async def _fan_out(self, event_id: int, channel: _Channel) -> None:
+        try:
+            while channel.subscriptions:
+                channel.dirty.clear()
+                try:
+                    value = await self._read(channel, event_id)
+                except Exception:
+                    logger.exception("Reading availability of event %s failed", event_id)
+                else:
+                    if value != channel.value:
+                        channel.value = value
+                        for subscription in channel.subscriptions:
+                            subscription._deliver(value)
+                        self.messages += len(channel.subscriptions)
+
+                await asyncio.sleep(self.interval)
+                if channel.subscriptions and not channel.dirty.is_set():
+                    try:
+                        await asyncio.wait_for(channel.dirty.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            # No await since the loop's last check, so nobody joined meanwhile.
+            if self._channels.get(event_id) is channel:
+                del self._channels[event_id]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": self.subscribers,
+            "notifications_total": self.notifications,
+            "reads_total": self.reads,
+            "messages_total": self.messages,
+        }
+
+
+settings = get_settings()
+availability = AvailabilityHub(
+    settings.availability_stream_interval,
+    settings.availability_poll_interval,
+    settings.availability_max_subscribers,
+)
+register_stats("availability", availability.stats)
+
+
+def availability_message(event_id: int, available_tickets: Optional[int]) -> dict:
+    if available_tickets is None:
+        return {"event_id": event_id, "deleted": True}
+    return {"event_id": event_id, "available_tickets": available_tickets}
+
+
+async def sse_stream(session_factory, event_id: int):
+    """Server-Sent Events for one event until it is deleted or the client leaves."""
+    async with availability.subscribe(session_factory, event_id) as subscription:
+        while True:
+            try:
+                value = await subscription.next(settings.availability_keepalive)
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle stream.
+                yield b": keepalive\n\n"
+                continue
+            message = dumps(availability_message(event_id, value))
+            yield b"event: availability\ndata: " + message + b"\n\n"
+            if value is None:
+                return
@@ -0,0 +1,41 @@
+from ..core.cache import MemoryCacheBackend, ReadThroughCache
+from ..core.config import get_settings
+from ..core.metrics import register_stats
+from .availability import availability
+
+settings = get_settings()
+
+# Every listing page depends on every event, so listings share one namespace.
+EVENT_LISTINGS = "events:list"
+
+event_cache = ReadThroughCache(
+    MemoryCacheBackend(settings.cache_max_entries, settings.cache_ttl),
+    settings.cache_ttl,
+    enabled=settings.cache_enabled,
+)
+register_stats("event_cache", event_cache.stats)
+
+
+def event_namespace(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+async def invalidate_event(event_id: int) -> None:
+    """Drop the cached detail of one event and every cached listing page,
+    and tell the event's availability subscribers."""
+    await event_cache.invalidate(event_namespace(event_id), EVENT_LISTINGS)
+    availability.notify(event_id)
+
+
+async def invalidate_availability(event_id: int) -> None:
+    """Like ``invalidate_event``, for writes that only move tickets.
+
+    Listings are left to expire after ``cache_ttl``: dropping them on every
+    booking would empty the listing cache exactly when a sale loads it.
+    """
+    await event_cache.invalidate(event_namespace(event_id))
+    availability.notify(event_id)
+
+
+async def invalidate_listings() -> None:
+    await event_cache.invalidate(EVENT_LISTINGS)
@@ -0,0 +1,187 @@
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..schemas.event import EventCreate
+from .search import insert_events
+
+
+class MalformedImport(ValueError):
+    pass
+
+
+# What decides where a CSV record ends: quotes, and line breaks outside them.
+_CSV_MARKS = re.compile(r'"|\r\n?|\n')
+
+
+async def _decode(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+async def json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield the elements of a JSON array as they arrive."""
+    decoder = json.JSONDecoder()
+    text = _decode(chunks)
+    buffer, pos, started, done = "", 0, False, False
+
+    async def more() -> bool:
+        nonlocal buffer, pos
+        try:
+            buffer = buffer[pos:] + await text.__anext__()
+        except StopAsyncIteration:
+            return False
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            if buffer[pos] == "," and not started:
+                raise MalformedImport("Expected a JSON array")
+            pos += 1
+        if pos == len(buffer):
+            if await more():
+                continue
+            if not done:
+                raise MalformedImport("Unterminated JSON array")
+            return
+        if done:
+            raise MalformedImport("Unexpected data after the JSON array")
+        if not started:
+            if buffer[pos] != "[":
+                raise MalformedImport("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            done = True
+            pos += 1
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as exc:
+            if await more():
+                continue
+            raise MalformedImport(f"Invalid JSON: {exc.msg}")
+        if end == len(buffer) and await more():
+            # A number or literal may continue in the next chunk.
+            continue
+        pos = end
+        yield record
+
+
+async def csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, str]]:
+    """Yield CSV rows as dicts keyed by the header row, record by record.
+
+    Input is cut only at newlines outside quoted fields, so descriptions may
+    contain line breaks. Each chunk is scanned once: the quote state is
+    carried over, so a long quoted field costs no rescans.
+    """
+    header = None
+    pending = ""
+    # pending[:scanned] has been scanned and ends inside a quoted field
+    # if quoted is set.
+    scanned = 0
+    quoted = False
+    async for text in _decode(chunks):
+        pending += text
+        complete = 0
+        for mark in _CSV_MARKS.finditer(pending, scanned):
+            if mark.group() == '"':
+                quoted = not quoted
+            elif not quoted:
+                complete = mark.end()
+        scanned = len(pending)
+        if not complete:
+            continue
+        rows = csv.reader(io.StringIO(pending[:complete], newline=""))
+        pending = pending[complete:]
+        scanned -= complete
+        for row in rows:
+            if header is None:
+                header = [column.strip() for column in row]
+            elif any(row):
+                yield dict(zip(header, row))
+    if pending.strip():
+        for row in csv.reader(io.StringIO(pending, newline="")):
+            if header is None:
+                header = [column.strip() for column in row]
+            elif any(row):
+                yield dict(zip(header, row))
+
+
+def _errors(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+async def import_events(
+    db: AsyncSession, records: AsyncIterator[Any], chunk_size: int
+) -> dict:
+    """Validate events one by one and insert the valid ones chunk by chunk.
+
+    Each chunk is one executemany INSERT and its own commit, so a bad row,
+    or a chunk the database rejects, never aborts the rest of the import.
+    Rows are numbered from 1 in input order.
+    """
+    created = 0
+    errors = []
+    chunk = []
+    rows = []
+
+    async def flush():
+        nonlocal created
+        try:
+            # A Core executemany reuses one prepared statement per chunk; a
+            # literal multi-VALUES insert recompiles its SQL on every chunk
+            # and is several times slower.
+            await insert_events(db, chunk)
+            await db.commit()
+            created += len(chunk)
+        except Exception as e:
+            await db.rollback()
+            errors.extend({"row": row, "errors": ["Error inserting event"]} for row in rows)
+        chunk.clear()
+        rows.clear()
+
+    row = 0
+    now = datetime.now()
+    try:
+        async for record in records:
+            row += 1
+            # CSV leaves optional columns as empty strings.
+            if isinstance(record, dict):
+                record = {key: value for key, value in record.items() if value != ""}
+            try:
+                event = EventCreate.model_validate(record)
+            except ValidationError as exc:
+                errors.append({"row": row, "errors": _errors(exc)})
+                continue
+            if event.date.tzinfo is not None:
+                # Stored dates are naive local time, like datetime.now().
+                event.date = event.date.astimezone().replace(tzinfo=None)
+            if event.date < now:
+                errors.append({"row": row, "errors": ["date: Event date must be in the future"]})
+                continue
+            chunk.append({**event.model_dump(), "available_tickets": event.total_tickets})
+            rows.append(row)
+            if len(chunk) >= chunk_size:
+                await flush()
+    except MalformedImport as exc:
+        errors.append({"row": row + 1, "errors": [str(exc)]})
+    if chunk:
+        await flush()
+    return {"created": created, "errors": errors}
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from sqlalchemy import select
+from ..models.booking import Booking
+from ..models.event import Event
+from ..models.user import User
+
+EXPORT_COLUMNS = (
+    "id",
+    "event_id",
+    "event_title",
+    "user_id",
+    "user_email",
+    "num_tickets",
+    "total_price",
+    "booking_date",
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_query(
+    event_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """Flat booking rows for finance exports, in (booking_date, id) order."""
+    stmt = (
+        select(
+            Booking.id,
+            Booking.event_id,
+            Event.title.label("event_title"),
+            Booking.user_id,
+            User.email.label("user_email"),
+            Booking.number_of_tickets.label("num_tickets"),
+            (Booking.number_of_tickets * Booking.unit_price).label("total_price"),
+            Booking.booking_date,
+        )
+        .join(User, Booking.user_id == User.id)
+        .join(Event, Booking.event_id == Event.id)
+        .order_by(Booking.booking_date, Booking.id)
+    )
+    if event_id is not None:
+        stmt = stmt.where(Booking.event_id == event_id)
+    if date_from is not None:
+        stmt = stmt.where(Booking.booking_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Booking.booking_date < date_to)
+    return stmt
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(
+            {
+                column: value.isoformat() if isinstance(value, datetime) else value
+                for column, value in zip(EXPORT_COLUMNS, row)
+            },
+            separators=(",", ":"),
+        ) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_export(
+    session_factory, stmt, export_format: str, batch_size: int
+) -> AsyncIterator[str]:
+    """Yield encoded chunks of ``batch_size`` rows from a server-side cursor.
+
+    The generator owns its session because the response body is sent after
+    the request's own dependencies have been torn down.
+    """
+    if export_format == "csv":
+        encode = _encode_csv
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    else:
+        encode = _encode_ndjson
+
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield encode(rows)
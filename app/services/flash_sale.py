@@ -0,0 +1,194 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..core.metrics import Histogram, register_stats
+from ..models.booking import Booking
+from ..models.event import Event
+from .event_cache import invalidate_availability
+from .inventory import insert_bookings, reserve_tickets
+
+
+@dataclass
+class _Request:
+    user_id: int
+    number_of_tickets: int
+    future: asyncio.Future
+
+    def fail(self, status_code: int, detail: str) -> None:
+        if not self.future.done():
+            self.future.set_exception(HTTPException(status_code=status_code, detail=detail))
+
+
+class FlashSaleQueue:
+    """Per-event admission queue that books in group-committed batches.
+
+    Booking requests for a flash-sale event wait in the event's queue while
+    a single worker per event takes up to ``batch_size`` of them at a time,
+    admits them in arrival order against one read of the inventory, and
+    books the whole batch with one inventory UPDATE, one bulk INSERT and one
+    commit. The worker exits once the queue is empty.
+    """
+
+    def __init__(self, batch_size: int, max_wait: float, max_queue: int, flag_ttl: float):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._flags = TTLCache(10000, flag_ttl)
+        self._queues: Dict[int, List[_Request]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self.batches = 0
+        self.booked = 0
+        self.sold_out = 0
+        self.rejected = 0
+        self.batch_seconds = Histogram()
+
+    async def is_flash_sale(self, db, event_id: int) -> bool:
+        flag = self._flags.get(event_id)
+        if flag is None:
+            flag = bool(
+                await db.scalar(select(Event.flash_sale).where(Event.id == event_id))
+            )
+            self._flags.set(event_id, flag)
+        return flag
+
+    def forget(self, event_id: Optional[int] = None) -> None:
+        """Re-read the flag of one event (or all) on its next booking."""
+        if event_id is None:
+            self._flags.clear()
+        else:
+            self._flags.pop(event_id)
+
+    async def book(self, session_factory, event_id: int, user_id: int, number_of_tickets: int) -> Booking:
+        queue = self._queues.setdefault(event_id, [])
+        if len(queue) >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(_Request(user_id, number_of_tickets, future))
+        if event_id not in self._workers:
+            self._workers[event_id] = asyncio.create_task(
+                self._drain(session_factory, event_id)
+            )
+        # A cancelled request cancels its future, and the worker skips it.
+        return await future
+
+    async def _drain(self, session_factory, event_id: int) -> None:
+        queue = self._queues[event_id]
+        try:
+            while queue:
+                if self.max_wait and len(queue) < self.batch_size:
+                    await asyncio.sleep(self.max_wait)
+                batch = [r for r in queue[: self.batch_size] if not r.future.done()]
+                del queue[: self.batch_size]
+                if batch:
+                    await self._book_batch(session_factory, event_id, batch)
+        finally:
+            del self._workers[event_id]
+            if not queue:
+                del self._queues[event_id]
+
+    async def _book_batch(self, session_factory, event_id: int, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        admitted = []
+        async with session_factory() as db:
+            try:
+                event = (
+                    await db.execute(
+                        select(Event.available_tickets, Event.date)
+                        .where(Event.id == event_id)
+                        .with_for_update()
+                    )
+                ).first()
+                if event is None:
+                    for request in batch:
+                        request.fail(status.HTTP_404_NOT_FOUND, "Event not found")
+                    return
+                if event.date < datetime.now():
+                    for request in batch:
+                        request.fail(
+                            status.HTTP_400_BAD_REQUEST, "Cannot book tickets for past events"
+                        )
+                    return
+
+                remaining = event.available_tickets
+                for request in batch:
+                    if request.number_of_tickets <= remaining:
+                        admitted.append(request)
+                        remaining -= request.number_of_tickets
+                    else:
+                        self.sold_out += 1
+                        request.fail(status.HTTP_400_BAD_REQUEST, "Not enough tickets available")
+                if not admitted:
+                    return
+
+                total = sum(request.number_of_tickets for request in admitted)
+                price = await reserve_tickets(db, event_id, total)
+                if price is None:
+                    # A booking outside the queue got in between the read and
+                    # the UPDATE (no row locks on SQLite); retry these first.
+                    await db.rollback()
+                    self._queues[event_id][:0] = admitted
+                    admitted = []
+                    return
+
+                bookings = await insert_bookings(
+                    db,
+                    [
+                        {
+                            "user_id": request.user_id,
+                            "event_id": event_id,
+                            "number_of_tickets": request.number_of_tickets,
+                        }
+                        for request in admitted
+                    ],
+                    {event_id: price},
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                for request in batch:
+                    request.fail(status.HTTP_500_INTERNAL_SERVER_ERROR, "Error creating booking")
+                return
+            finally:
+                self.batches += 1
+                self.batch_seconds.observe(time.perf_counter() - started)
+
+        self.booked += len(admitted)
+        await invalidate_availability(event_id)
+        for request, booking in zip(admitted, bookings):
+            if not request.future.done():
+                request.future.set_result(booking)
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_size,
+            "max_wait_seconds": self.max_wait,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "active_events": len(self._workers),
+            "batches_total": self.batches,
+            "booked_total": self.booked,
+            "sold_out_total": self.sold_out,
+            "rejected_total": self.rejected,
+            "batch_seconds": self.batch_seconds.snapshot(),
+        }
+
+
+settings = get_settings()
+flash_sales = FlashSaleQueue(
+    batch_size=settings.flash_sale_batch_size,
+    max_wait=settings.flash_sale_max_wait_ms / 1000,
+    max_queue=settings.flash_sale_queue_limit,
+    flag_ttl=settings.flash_sale_flag_ttl,
+)
+register_stats("flash_sale", flash_sales.stats)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, func, select
+from ..core.config import get_settings
+from ..core.metrics import register_stats
+from ..models.hold import TicketHold
+from .event_cache import invalidate_availability
+from .inventory import release_many
+
+logger = logging.getLogger(__name__)
+
+
+class HoldStats:
+    def __init__(self):
+        self.created = 0
+        self.confirmed = 0
+        self.released = 0
+        self.expired = 0
+        self.sweeps = 0
+        # Refreshed by every sweep; holds can be created by any worker.
+        self.active = None
+
+    def stats(self) -> dict:
+        ended = self.confirmed + self.released + self.expired
+        return {
+            "active": self.active,
+            "created_total": self.created,
+            "confirmed_total": self.confirmed,
+            "released_total": self.released,
+            "expired_total": self.expired,
+            "expiry_ratio": round(self.expired / ended, 4) if ended else None,
+            "sweeps_total": self.sweeps,
+        }
+
+
+hold_stats = HoldStats()
+register_stats("ticket_holds", hold_stats.stats)
+
+
+async def sweep_expired_holds(db, batch_size: int) -> int:
+    """Delete up to ``batch_size`` expired holds and return their tickets.
+
+    One DELETE ... RETURNING removes the holds and one UPDATE returns the
+    tickets of every affected event, in a single transaction. A hold that
+    is confirmed concurrently is deleted by exactly one of the two.
+    """
+    expired = (
+        await db.execute(
+            delete(TicketHold)
+            .where(
+                TicketHold.id.in_(
+                    select(TicketHold.id)
+                    .where(TicketHold.expires_at <= datetime.now())
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+            )
+            .returning(TicketHold.event_id, TicketHold.number_of_tickets)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    tickets = defaultdict(int)
+    for event_id, number_of_tickets in expired:
+        tickets[event_id] += number_of_tickets
+    if tickets:
+        await release_many(db, tickets)
+    await db.commit()
+
+    hold_stats.expired += len(expired)
+    for event_id in tickets:
+        await invalidate_availability(event_id)
+    return len(expired)
+
+
+async def run_sweeper(session_factory, stop: Optional[asyncio.Event] = None) -> None:
+    """Sweep expired holds every HOLD_SWEEP_INTERVAL seconds until ``stop`` is set.
+
+    Stopping between sweeps, rather than cancelling the task, never leaves
+    a sweep's transaction (and on SQLite, the write lock) half-finished.
+    """
+    settings = get_settings()
+    stop = stop or asyncio.Event()
+    while not stop.is_set():
+        try:
+            async with session_factory() as db:
+                hold_stats.sweeps += 1
+                while await sweep_expired_holds(db, settings.hold_sweep_batch_size) == settings.hold_sweep_batch_size:
+                    pass
+                hold_stats.active = await db.scalar(select(func.count()).select_from(TicketHold))
+        except Exception:
+            logger.exception("Expired hold sweep failed")
+        try:
+            await asyncio.wait_for(stop.wait(), settings.hold_sweep_interval)
+        except asyncio.TimeoutError:
+            pass
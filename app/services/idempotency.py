@@ -0,0 +1,56 @@
+from contextvars import ContextVar
+from typing import Callable, Optional
+from fastapi import Depends, Header, Request
+from ..core.config import get_settings
+from ..core.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyKeys,
+    MemoryIdempotencyStore,
+)
+from ..core.metrics import register_stats
+from ..core.security import CurrentUser, get_current_user
+from ..database import get_session_factory
+
+settings = get_settings()
+
+# The session factory of the request being run, so the database store uses
+# the request's database (dependency overrides included) rather than the
+# default one. Set by ``idempotent``; the route handler that stores the
+# response runs in the same context.
+_session_factory: ContextVar[Optional[Callable]] = ContextVar("idempotency_session_factory", default=None)
+
+
+def _request_session_factory():
+    return _session_factory.get() or get_session_factory()
+
+
+def _store():
+    if settings.idempotency_backend == "database":
+        return DatabaseIdempotencyStore(_request_session_factory)
+    if settings.idempotency_backend == "memory":
+        return MemoryIdempotencyStore(settings.idempotency_max_entries, settings.idempotency_ttl)
+    raise ValueError(f"Unknown idempotency backend {settings.idempotency_backend!r}")
+
+
+idempotency_keys = IdempotencyKeys(
+    _store(),
+    settings.idempotency_ttl,
+    settings.idempotency_lock_ttl,
+    settings.idempotency_wait_timeout,
+)
+register_stats("idempotency", idempotency_keys.stats)
+
+
+async def idempotent(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+    current_user: CurrentUser = Depends(get_current_user),
+    session_factory=Depends(get_session_factory),
+) -> None:
+    """Run a request with an Idempotency-Key once per user and key.
+
+    Only takes effect on routes using ``IdempotentRoute``.
+    """
+    if idempotency_key is not None:
+        _session_factory.set(session_factory)
+        await idempotency_keys.enter(request, str(current_user.id), idempotency_key)
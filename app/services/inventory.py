@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.booking import Booking
+from ..models.event import Event
+from .outbox import BOOKING_CREATED, booking_message, outbox
+from .rollups import record_sales
+
+
+async def reserve_tickets(db: AsyncSession, event_id: int, number_of_tickets: int) -> Optional[float]:
+    """Take tickets from an event with a single guarded UPDATE.
+
+    The availability and date checks live in the WHERE clause, so two
+    concurrent callers can never both succeed on the last tickets. Returns
+    the event's price as of the reservation, or None when the guard
+    rejected it (a price may be 0, so compare with None); the caller owns
+    the surrounding transaction.
+    """
+    return await db.scalar(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            Event.available_tickets >= number_of_tickets,
+            Event.date > datetime.now(),
+        )
+        .values(available_tickets=Event.available_tickets - number_of_tickets)
+        .returning(Event.price)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def release_tickets(db: AsyncSession, event_id: int, number_of_tickets: int) -> bool:
+    """Return tickets to a future event with a single guarded UPDATE."""
+    result = await db.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.date > datetime.now())
+        .values(available_tickets=Event.available_tickets + number_of_tickets)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def reserve_many(db: AsyncSession, tickets: Dict[int, int]) -> bool:
+    """Take tickets from several events with one guarded UPDATE.
+
+    ``tickets`` maps event id to the number of tickets wanted. Returns True
+    only if every event had enough tickets; on False some rows may have been
+    updated, so the caller must roll back.
+    """
+    wanted = case(tickets, value=Event.id)
+    result = await db.execute(
+        update(Event)
+        .where(
+            Event.id.in_(tickets),
+            Event.available_tickets >= wanted,
+            Event.date > datetime.now(),
+        )
+        .values(available_tickets=Event.available_tickets - wanted)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(tickets)
+
+
+async def release_many(db: AsyncSession, tickets: Dict[int, int]) -> None:
+    """Return tickets to several events with one UPDATE.
+
+    Unlike release_tickets there is no date guard: this returns held
+    tickets, which never left the event's inventory for good.
+    """
+    await db.execute(
+        update(Event)
+        .where(Event.id.in_(tickets))
+        .values(available_tickets=Event.available_tickets + case(tickets, value=Event.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def booking_failure(db: AsyncSession, event_id: int) -> HTTPException:
+    """Explain why a guarded reservation for ``event_id`` was rejected."""
+    event = await db.scalar(select(Event).where(Event.id == event_id))
+    if not event:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+        )
+    if event.date < datetime.now():
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot book tickets for past events",
+        )
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Not enough tickets available",
+    )
+
+
+async def insert_bookings(
+    db: AsyncSession, bookings: List[dict], prices: Optional[Dict[int, float]] = None
+) -> List[Booking]:
+    """Insert bookings with one bulk INSERT and return them in input order.
+
+    Every new booking goes through here, so this also prices them, adds
+    them to the daily sales rollups and writes their outbox messages in the
+    same transaction. ``prices`` maps event id to the price the tickets
+    were reserved at; without it the events' current prices are read.
+    """
+    now = datetime.now()
+    if prices is None:
+        prices = dict(
+            (
+                await db.execute(
+                    select(Event.id, Event.price).where(
+                        Event.id.in_({booking["event_id"] for booking in bookings})
+                    )
+                )
+            ).all()
+        )
+    inserted = (
+        await db.scalars(
+            insert(Booking).returning(Booking, sort_by_parameter_order=True),
+            [
+                {"booking_date": now, "unit_price": prices.get(booking["event_id"]), **booking}
+                for booking in bookings
+            ],
+        )
+    ).all()
+    await record_sales(
+        db,
+        (
+            (b.event_id, now.date(), b.number_of_tickets, b.number_of_tickets * b.unit_price, 1)
+            for b in inserted
+        ),
+    )
+    await outbox.enqueue(db, BOOKING_CREATED, (booking_message(b) for b in inserted))
+    return inserted
@@ -0,0 +1,355 @@
+"""Transactional outbox for the side effects of bookings.
+
+A write that has side effects (confirmation emails, webhooks, analytics)
+inserts a message describing them with ``enqueue``, in its own transaction,
+so the message exists exactly when the write committed and the request
+pays for one INSERT instead of the side effects themselves. The worker
+(``run_outbox_worker``, started with the app or by
+``python -m app.cli outbox run``) claims messages in batches and hands each
+to the handlers registered for its topic. Messages are only written while
+some handler is configured, in ``outbox_handler_modules`` or registered in
+this process.
+
+Delivery is at least once: a message is deleted after its handlers succeed,
+and a worker that dies mid-batch leaves its messages to be claimed again
+when their lease runs out, so handlers must tolerate repeats. A worker only
+claims topics it has handlers for; messages of other topics stay pending
+for a worker that has them, and are purged once older than
+``unhandled_retention`` seconds.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+from ..core.config import get_settings
+from ..core.metrics import Histogram, register_stats
+from ..models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+BOOKING_CREATED = "booking.created"
+BOOKING_CANCELLED = "booking.cancelled"
+
+# From commit to delivery, in seconds.
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0, 3600.0)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def booking_message(booking) -> dict:
+    return {
+        "booking_id": booking.id,
+        "user_id": booking.user_id,
+        "event_id": booking.event_id,
+        "number_of_tickets": booking.number_of_tickets,
+        "booking_date": booking.booking_date.isoformat(),
+    }
+
+
+class Outbox:
+    """Handler registry and batch delivery of outbox messages.
+
+    A claim moves a message's ``available_at`` ``lease`` seconds ahead and
+    counts an attempt; a failed delivery moves it ahead by an exponential
+    backoff with jitter instead, until ``max_attempts`` marks it dead.
+    ``handler_modules`` are the modules a worker imports for its handlers;
+    with none of them and no handler registered, nothing is enqueued.
+    """
+
+    # Seconds between refreshes of the pending count and lag.
+    STATS_INTERVAL = 5.0
+    # Seconds between purges of messages without a handler.
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, enabled: bool, batch_size: int, lease: float, handler_timeout: float,
+                 max_attempts: int, backoff_base: float, backoff_max: float,
+                 unhandled_retention: float, handler_modules: Iterable[str] = ()):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.lease = lease
+        self.handler_timeout = handler_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.unhandled_retention = unhandled_retention
+        self.handler_modules = list(handler_modules)
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        # Set while a worker runs in this process, so commits can wake it.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats_at = 0.0
+        self._purged_at = 0.0
+        # Refreshed by the worker; messages can be written by any worker.
+        self.pending = None
+        self.dead = None
+        self.lag = None
+        self.claimed = 0
+        self.delivered = 0
+        self.failed = 0
+        self.given_up = 0
+        self.purged = 0
+        self.delivery_lag = Histogram(LAG_BUCKETS)
+
+    def handler(self, topic: str) -> Callable[[Handler], Handler]:
+        """Decorator registering an async ``handler(payload)`` for ``topic``."""
+        def register(fn: Handler) -> Handler:
+            self._handlers[topic].append(fn)
+            return fn
+        return register
+
+    def remove_handlers(self, topic: str) -> None:
+        self._handlers.pop(topic, None)
+
+    def _topics(self) -> List[str]:
+        return [topic for topic, handlers in self._handlers.items() if handlers]
+
+    @property
+    def active(self) -> bool:
+        """Whether messages are written: enabled, with a handler to read them."""
+        return self.enabled and bool(self.handler_modules or self._topics())
+
+    async def enqueue(self, db, topic: str, payloads: Iterable[dict]) -> None:
+        """Add messages to ``db``'s transaction with one INSERT."""
+        if not self.active:
+            return
+        now = datetime.now()
+        rows = [
+            {
+                "topic": topic,
+                "payload": json.dumps(payload),
+                "created_at": now,
+                "available_at": now,
+                "attempts": 0,
+            }
+            for payload in payloads
+        ]
+        if rows:
+            await db.execute(insert(OutboxMessage), rows)
+            db.sync_session.info["outbox_pending"] = True
+
+    def _after_commit(self, session) -> None:
+        # Sync sessions commit in the threadpool, hence call_soon_threadsafe.
+        if session.info.pop("outbox_pending", False) and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _after_rollback(self, session) -> None:
+        session.info.pop("outbox_pending", None)
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def process_batch(self, session_factory) -> int:
+        """Claim and deliver up to ``batch_size`` due messages; return how many."""
+        topics = self._topics()
+        if not topics:
+            return 0
+        now = datetime.now()
+        async with session_factory() as db:
+            claimed = (
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(
+                        OutboxMessage.id.in_(
+                            select(OutboxMessage.id)
+                            .where(
+                                OutboxMessage.dead_at.is_(None),
+                                OutboxMessage.available_at <= now,
+                                OutboxMessage.topic.in_(topics),
+                            )
+                            .order_by(OutboxMessage.available_at)
+                            .limit(self.batch_size)
+                            .with_for_update(skip_locked=True)
+                            .scalar_subquery()
+                        )
+                    )
+                    .values(
+                        available_at=now + timedelta(seconds=self.lease),
+                        attempts=OutboxMessage.attempts + 1,
+                    )
+                    .returning(
+                        OutboxMessage.id,
+                        OutboxMessage.topic,
+                        OutboxMessage.payload,
+                        OutboxMessage.created_at,
+                        OutboxMessage.attempts,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await db.commit()
+        if not claimed:
+            return 0
+        self.claimed += len(claimed)
+
+        errors = await asyncio.gather(*(self._deliver(message) for message in claimed))
+        now = datetime.now()
+        delivered = [message.id for message, error in zip(claimed, errors) if error is None]
+        async with session_factory() as db:
+            if delivered:
+                await db.execute(
+                    delete(OutboxMessage)
+                    .where(OutboxMessage.id.in_(delivered))
+                    .execution_options(synchronize_session=False)
+                )
+            for message, error in zip(claimed, errors):
+                if error is None:
+                    self.delivery_lag.observe((now - message.created_at).total_seconds())
+                    continue
+                dead = message.attempts >= self.max_attempts
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id == message.id)
+                    .values(
+                        available_at=now + timedelta(seconds=self.backoff(message.attempts)),
+                        last_error=error[:1000],
+                        dead_at=now if dead else None,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if dead:
+                    self.given_up += 1
+                    logger.error(
+                        "Giving up on outbox message %s (%s) after %d attempts: %s",
+                        message.id, message.topic, message.attempts, error,
+                    )
+            await db.commit()
+        self.delivered += len(delivered)
+        self.failed += len(claimed) - len(delivered)
+        return len(claimed)
+
+    async def _deliver(self, message) -> Optional[str]:
+        """Run the topic's handlers; return the error, or None on success."""
+        # Copied, as handlers may be removed while the batch is delivered.
+        handlers = list(self._handlers.get(message.topic, ()))
+        payload = json.loads(message.payload)
+        try:
+            if not handlers:
+                raise LookupError(f"No handler for topic {message.topic!r}")
+            for handler in handlers:
+                await asyncio.wait_for(handler(payload), self.handler_timeout)
+        except Exception as exc:
+            logger.warning(
+                "Outbox message %s (%s) failed on attempt %d: %r",
+                message.id, message.topic, message.attempts, exc,
+            )
+            return f"{type(exc).__name__}: {exc}"
+        return None
+
+    async def purge_unhandled(self, session_factory) -> int:
+        """Delete pending messages of topics this worker has no handler for
+        that are older than ``unhandled_retention``; return how many."""
+        cutoff = datetime.now() - timedelta(seconds=self.unhandled_retention)
+        async with session_factory() as db:
+            result = await db.execute(
+                delete(OutboxMessage)
+                .where(
+                    OutboxMessage.dead_at.is_(None),
+                    # Never claimed, so available_at is created_at; indexed.
+                    OutboxMessage.available_at < cutoff,
+                    OutboxMessage.created_at < cutoff,
+                    OutboxMessage.topic.not_in(self._topics()),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        self._purged_at = time.monotonic()
+        if result.rowcount:
+            logger.warning("Purged %d outbox messages without a handler", result.rowcount)
+            self.purged += result.rowcount
+        return result.rowcount
+
+    async def refresh_stats(self, session_factory) -> None:
+        pending = OutboxMessage.dead_at.is_(None)
+        async with session_factory() as db:
+            row = (
+                await db.execute(
+                    select(
+                        func.count().filter(pending),
+                        func.min(OutboxMessage.created_at).filter(pending),
+                        func.count().filter(OutboxMessage.dead_at.is_not(None)),
+                    ).select_from(OutboxMessage)
+                )
+            ).one()
+        self.pending, oldest, self.dead = row
+        self.lag = (datetime.now() - oldest).total_seconds() if oldest else 0.0
+        self._stats_at = time.monotonic()
+
+    async def run(self, session_factory, stop: asyncio.Event, poll_interval: float) -> None:
+        """Deliver messages until ``stop`` is set.
+
+        A full batch is followed by the next one straight away; otherwise
+        the worker waits up to ``poll_interval`` seconds, or until a session
+        in this process commits a message. Stopping between batches lets
+        the current batch finish delivering.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while not stop.is_set():
+                self._wakeup.clear()
+                claimed = 0
+                try:
+                    claimed = await self.process_batch(session_factory)
+                    if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+                        await self.purge_unhandled(session_factory)
+                    if time.monotonic() - self._stats_at >= self.STATS_INTERVAL:
+                        await self.refresh_stats(session_factory)
+                except Exception:
+                    logger.exception("Outbox batch failed")
+                if claimed == self.batch_size:
+                    continue
+                waits = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(self._wakeup.wait())]
+                try:
+                    await asyncio.wait(waits, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waits:
+                        waiter.cancel()
+        finally:
+            self._loop = self._wakeup = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self.pending,
+            "dead": self.dead,
+            "lag_seconds": None if self.lag is None else round(self.lag, 3),
+            "claimed_total": self.claimed,
+            "delivered_total": self.delivered,
+            "failed_total": self.failed,
+            "dead_total": self.given_up,
+            "purged_total": self.purged,
+            "delivery_lag_seconds": self.delivery_lag.snapshot(),
+        }
+
+
+settings = get_settings()
+outbox = Outbox(
+    enabled=settings.outbox_enabled,
+    batch_size=settings.outbox_batch_size,
+    lease=settings.outbox_lease,
+    handler_timeout=settings.outbox_handler_timeout,
+    max_attempts=settings.outbox_max_attempts,
+    backoff_base=settings.outbox_backoff_base,
+    backoff_max=settings.outbox_backoff_max,
+    unhandled_retention=settings.outbox_unhandled_retention,
+    handler_modules=settings.outbox_handler_modules,
+)
+register_stats("outbox", outbox.stats)
+sa_event.listen(Session, "after_commit", outbox._after_commit)
+sa_event.listen(Session, "after_rollback", outbox._after_rollback)
+
+
+async def run_outbox_worker(session_factory, stop: Optional[asyncio.Event] = None) -> None:
+    """Import the configured handler modules, then deliver until ``stop`` is set."""
+    for module in outbox.handler_modules:
+        importlib.import_module(module)
+    await outbox.run(session_factory, stop or asyncio.Event(), settings.outbox_poll_interval)
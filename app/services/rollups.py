@@ -0,0 +1,69 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.booking import Booking
+from ..models.sales import EventSalesDaily
+
+# One per backend in app.database.ASYNC_DRIVERS.
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# (event_id, day, tickets, revenue, bookings); negative values undo a sale.
+Sale = Tuple[int, date, int, float, int]
+
+
+async def record_sales(db: AsyncSession, sales: Iterable[Sale]) -> None:
+    """Add sales to the daily rollups inside the caller's transaction.
+
+    One upsert per (event, day). Revenue comes from the bookings' own
+    ``unit_price``, so a cancellation takes back exactly what its booking
+    added even if the event was repriced in between.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    for event_id, day, tickets, revenue, bookings in sales:
+        totals[event_id, day][0] += tickets
+        totals[event_id, day][1] += revenue
+        totals[event_id, day][2] += bookings
+
+    insert = _INSERTS[db.get_bind().dialect.name]
+    for (event_id, day), (tickets, revenue, bookings) in totals.items():
+        stmt = insert(EventSalesDaily).values(
+            event_id=event_id,
+            day=day,
+            tickets_sold=tickets,
+            revenue=revenue,
+            bookings=bookings,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EventSalesDaily.event_id, EventSalesDaily.day],
+                set_={
+                    "tickets_sold": EventSalesDaily.tickets_sold + stmt.excluded.tickets_sold,
+                    "revenue": EventSalesDaily.revenue + stmt.excluded.revenue,
+                    "bookings": EventSalesDaily.bookings + stmt.excluded.bookings,
+                },
+            )
+        )
+
+
+def rebuild_rollups(conn: Connection) -> int:
+    """Recompute every rollup row from ``bookings`` with one INSERT ... SELECT."""
+    day = func.date(Booking.booking_date)
+    conn.execute(delete(EventSalesDaily))
+    result = conn.execute(
+        EventSalesDaily.__table__.insert().from_select(
+            ["event_id", "day", "tickets_sold", "revenue", "bookings"],
+            select(
+                Booking.event_id,
+                day,
+                func.sum(Booking.number_of_tickets),
+                func.sum(Booking.number_of_tickets * Booking.unit_price),
+                func.count(),
+            )
+            .group_by(Booking.event_id, day),
+        )
+    )
+    return result.rowcount
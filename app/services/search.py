@@ -0,0 +1,108 @@
+import re
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Select, column, delete, func, insert, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.event import Event
+
+# Must match the expression indexed by migration 0005.
+POSTGRES_DOCUMENT = literal_column(
+    "(setweight(to_tsvector('english', coalesce(events.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(events.venue, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(events.description, '')), 'C'))"
+)
+
+events_fts = table("events_fts", column("rowid"), column("title"), column("description"), column("venue"))
+# A row here makes the FTS insert trigger skip rows (migration 0010).
+events_fts_bulk = table("events_fts_bulk", column("active"))
+
+# bm25 column weights for (title, description, venue).
+FTS_WEIGHTS = (10.0, 1.0, 4.0)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+async def insert_events(db: AsyncSession, rows: List[dict]) -> None:
+    """Insert events with one executemany in the caller's transaction.
+
+    On SQLite the per-row FTS trigger is suspended for the chunk, which is
+    then indexed with one INSERT ... SELECT, several times faster. Writing
+    the flag row takes the write lock first, so no other insert can
+    happen while it is set.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        await db.execute(insert(Event.__table__), rows)
+        return
+    await db.execute(insert(events_fts_bulk).values(active=1))
+    last_id = await db.scalar(select(func.coalesce(func.max(Event.id), 0)))
+    await db.execute(insert(Event.__table__), rows)
+    await db.execute(
+        insert(events_fts).from_select(
+            ["rowid", "title", "description", "venue"],
+            select(Event.id, Event.title, Event.description, Event.venue).where(Event.id > last_id),
+        )
+    )
+    await db.execute(delete(events_fts_bulk))
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a user query into plain words; operators are never passed through."""
+    return _TERM.findall(q.lower())
+
+
+def search_events(
+    dialect: str,
+    q: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    venue: Optional[str] = None,
+) -> Select:
+    """Upcoming events matching every term of ``q`` as a prefix, best first.
+
+    Uses the FTS5 table on SQLite and the tsvector index on PostgreSQL;
+    other dialects fall back to LIKE scans.
+    """
+    terms = search_terms(q)
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        rank = func.bm25(literal_column("events_fts"), *FTS_WEIGHTS)
+        stmt = (
+            select(Event)
+            .join(events_fts, events_fts.c.rowid == Event.id)
+            .where(literal_column("events_fts").op("MATCH")(match))
+            .order_by(rank, Event.id)
+        )
+    elif dialect == "postgresql":
+        query = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        rank = func.ts_rank(POSTGRES_DOCUMENT, query)
+        stmt = (
+            select(Event)
+            .where(POSTGRES_DOCUMENT.op("@@")(query))
+            .order_by(rank.desc(), Event.id)
+        )
+    else:
+        stmt = select(Event).order_by(Event.date, Event.id)
+        for term in terms:
+            pattern = f"%{term}%"
+            stmt = stmt.where(
+                or_(
+                    Event.title.ilike(pattern),
+                    Event.description.ilike(pattern),
+                    Event.venue.ilike(pattern),
+                )
+            )
+
+    stmt = stmt.where(Event.available_tickets > 0, Event.date > datetime.now())
+    if date_from is not None:
+        stmt = stmt.where(Event.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Event.date <= date_to)
+    if min_price is not None:
+        stmt = stmt.where(Event.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Event.price <= max_price)
+    if venue is not None:
+        stmt = stmt.where(func.lower(Event.venue) == venue.lower())
+    return stmt
@@ -0,0 +1,77 @@
+"""Work done by the application's lifespan before it accepts requests."""
+import asyncio
+from datetime import datetime
+from sqlalchemy import select
+from . import migrations
+from .core.pagination import keyset
+from .models.event import Event
+from .models.user import User
+from .services.inventory import reserve_tickets
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+async def warm_pool(session_factory, connections: int) -> None:
+    """Open ``connections`` pooled connections at once and check each one.
+
+    Connections beyond the engine's pool size are closed again on return,
+    so this should not exceed it.
+    """
+    async def ping():
+        async with session_factory() as db:
+            await db.execute(select(1))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def verify_schema(session_factory) -> int:
+    """Return the applied revision, refusing to start if it is not head."""
+    async with session_factory() as db:
+        current = await db.run_sync(
+            lambda session: migrations.current_revision(session.connection())
+        )
+    head = migrations.head()
+    if current != head:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {current}, the code expects {head}; "
+            "run `python -m app.cli db upgrade`"
+        )
+    return current
+
+
+def hot_statements():
+    """Statements shaped like the busiest request paths.
+
+    SQLAlchemy caches compiled SQL by statement structure, not by values, so
+    running these once with ids that match nothing warms the cache for the
+    real requests.
+    """
+    return [
+        # GET /events/{id}
+        select(Event).where(Event.id == 0),
+        # GET /events, first page
+        keyset(
+            select(Event).where(Event.available_tickets > 0, Event.date > datetime.now()),
+            "events",
+            Event.date,
+            Event.id,
+            None,
+        ).limit(1),
+        # Flash-sale flag checked by every booking
+        select(Event.flash_sale).where(Event.id == 0),
+        # Login and registration
+        select(User).where(User.email == ""),
+    ]
+
+
+async def precompile(session_factory) -> int:
+    """Run the hot statements (and the booking UPDATE) once; nothing is kept."""
+    statements = hot_statements()
+    async with session_factory() as db:
+        for stmt in statements:
+            await db.execute(stmt)
+        await reserve_tickets(db, 0, 1)
+        await db.rollback()
+    return len(statements) + 1
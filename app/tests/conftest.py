@@ -2,9 +2,16 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from ..database import Base, get_db
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from ..core.security import identity_cache
+from ..services.event_cache import event_cache
+from ..services.flash_sale import flash_sales
+from ..services.idempotency import idempotency_keys
+from ..database import async_database_url, get_session_factory, read_your_writes
+from ..migrations import downgrade, upgrade
 from ..main import app
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -12,26 +19,32 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL_TEST")
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on a fresh event loop, so async connections
+# must not be pooled across requests.
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool
+)
+TestingSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 
 @pytest.fixture
 def test_db():
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        upgrade(conn)
     try:
-        db = TestingSessionLocal()
-        yield db
+        yield TestingSessionLocal
     finally:
-        db.close()
-        Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            downgrade(conn, 0)
 
 @pytest.fixture
 def client(test_db):
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            test_db.close()
-    
-    app.dependency_overrides[get_db] = override_get_db
+    identity_cache.clear()
+    asyncio.run(event_cache.clear())
+    flash_sales.forget()
+    asyncio.run(idempotency_keys.clear())
+    read_your_writes.clear()
+    app.dependency_overrides[get_session_factory] = lambda: test_db
     return TestClient(app)
 
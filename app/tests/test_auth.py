@@ -1,4 +1,14 @@
+import asyncio
+import threading
 import pytest
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy import event, update
+from ..core.passwords import PasswordHasher
+from ..core.security import create_access_token, invalidate_user
+from ..models.user import User as UserModel
+from .conftest import async_engine, engine
+from .test_events import create_test_admin, get_admin_token
 
 @pytest.mark.parametrize("email, password, is_admin, expected_status", [
     ("test1@example.com", "testpassword123", False, 201),
@@ -92,3 +102,128 @@ def test_login_wrong_password(client, email, password, wrong_password, expected_
         }
     )
     assert response.status_code == expected_status
+
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [
+            asyncio.ensure_future(hasher.run(release.wait)),
+            asyncio.ensure_future(hasher.run(release.wait)),
+        ]
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["queue_depth"] == 1
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    stats = hasher.stats()
+    assert stats["rejected_total"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["hash_seconds"]["count"] == 2
+
+def test_password_hasher_counts_jobs_of_cancelled_requests():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        request = asyncio.ensure_future(hasher.run(release.wait))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.sleep(0.05)
+        # The job still holds the only worker.
+        assert hasher.in_flight == 1
+        with pytest.raises(HTTPException):
+            await hasher.run(release.wait)
+        release.set()
+        await asyncio.sleep(0.05)
+        assert hasher.in_flight == 0
+        assert await hasher.run(lambda: "done") == "done"
+
+    asyncio.run(scenario())
+    hasher.shutdown()
+
+def test_metrics_report_password_hashing(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+
+    response = client.get(
+        "/api/v1/admin/metrics",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    hasher = response.json()["password_hasher"]
+    assert hasher["hash_seconds"]["count"] >= 2
+    assert "queue_depth" in hasher
+
+def register_and_login(client, email="claims@example.com", is_admin=False):
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "secret123", "is_admin": is_admin}
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": email, "password": "secret123"}
+    )
+    return response.json()["access_token"]
+
+def test_token_carries_identity_claims(client):
+    token = register_and_login(client, is_admin=True)
+    claims = jwt.get_unverified_claims(token)
+    assert claims["sub"] == "claims@example.com"
+    assert isinstance(claims["uid"], int)
+    assert claims["admin"] is True
+
+def test_me_does_not_query_database(client):
+    token = register_and_login(client)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            response = client.get(
+                "/api/v1/auth/me",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200
+            assert response.json()["email"] == "claims@example.com"
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert statements == []
+
+def test_legacy_token_falls_back_to_database(client):
+    register_and_login(client)
+    legacy_token = create_access_token(data={"sub": "claims@example.com"})
+
+    response = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": f"Bearer {legacy_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "claims@example.com"
+
+def test_invalidate_user_rechecks_token(client, test_db):
+    token = register_and_login(client, email="demoted@example.com", is_admin=True)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/admin/events", headers=headers).status_code == 200
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(UserModel)
+            .where(UserModel.email == "demoted@example.com")
+            .values(is_admin=False)
+        )
+    user_id = jwt.get_unverified_claims(token)["uid"]
+    invalidate_user(user_id)
+
+    assert client.get("/api/v1/admin/events", headers=headers).status_code == 403
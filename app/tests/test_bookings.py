@@ -1,4 +1,7 @@
 #app/tests/test_bookings.py
+import csv
+import io
+import json
 from datetime import datetime, timedelta
 import pytest
 from .test_events import create_test_admin, get_admin_token
@@ -104,3 +107,873 @@ def test_cancel_booking(client, number_of_tickets, expected_status):
     event_response = client.get(f"/api/v1/events/{event['id']}")
     updated_event = event_response.json()
     assert updated_event["available_tickets"] == event["total_tickets"]
+
+def test_book_event_not_enough_tickets(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    event = create_test_event(client, admin_token)
+
+    create_test_user(client)
+    user_token = get_user_token(client)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 60, "event_id": event["id"]},
+        headers=headers
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 41, "event_id": event["id"]},
+        headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough tickets available"
+
+    event_response = client.get(f"/api/v1/events/{event['id']}")
+    assert event_response.json()["available_tickets"] == 40
+
+def test_book_nonexistent_event(client):
+    create_test_user(client)
+    user_token = get_user_token(client)
+
+    response = client.post(
+        "/api/v1/events/99999/book",
+        json={"number_of_tickets": 1, "event_id": 99999},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 404
+
+@pytest.mark.parametrize("number_of_tickets", [0, -5])
+def test_book_event_invalid_ticket_count(client, number_of_tickets):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    event = create_test_event(client, admin_token)
+
+    create_test_user(client)
+    user_token = get_user_token(client)
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": number_of_tickets, "event_id": event["id"]},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 422
+
+def test_cancel_booking_twice(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    event = create_test_event(client, admin_token)
+
+    create_test_user(client)
+    user_token = get_user_token(client)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 3, "event_id": event["id"]},
+        headers=headers
+    )
+
+    first = client.delete(f"/api/v1/events/{event['id']}/cancel", headers=headers)
+    assert first.status_code == 200
+    assert first.json()["number_of_tickets"] == 3
+
+    second = client.delete(f"/api/v1/events/{event['id']}/cancel", headers=headers)
+    assert second.status_code == 404
+
+    event_response = client.get(f"/api/v1/events/{event['id']}")
+    assert event_response.json()["available_tickets"] == event["total_tickets"]
+
+def test_booking_history_cursor_pagination(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    events = [create_test_event(client, admin_token) for _ in range(3)]
+
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    for event in events:
+        client.post(
+            f"/api/v1/events/{event['id']}/book",
+            json={"number_of_tickets": 1, "event_id": event["id"]},
+            headers=headers
+        )
+
+    first = client.post("/api/v1/events/history?limit=2", headers=headers)
+    assert first.status_code == 200
+    assert [b["event_id"] for b in first.json()] == [events[2]["id"], events[1]["id"]]
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.post(f"/api/v1/events/history?limit=2&cursor={cursor}", headers=headers)
+    assert [b["event_id"] for b in second.json()] == [events[0]["id"]]
+    assert "X-Next-Cursor" not in second.headers
+
+def book_events_for_export(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    events = [create_test_event(client, admin_token) for _ in range(2)]
+
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    for event, tickets in zip(events, (2, 3)):
+        client.post(
+            f"/api/v1/events/{event['id']}/book",
+            json={"number_of_tickets": tickets, "event_id": event["id"]},
+            headers=headers
+        )
+    return events, {"Authorization": f"Bearer {admin_token}"}
+
+def test_export_bookings_ndjson(client):
+    events, admin_headers = book_events_for_export(client)
+
+    response = client.get("/api/v1/admin/booking/export", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["num_tickets"] for row in rows] == [2, 3]
+    assert rows[1]["total_price"] == 2700
+    assert rows[0]["user_email"] == "user@example.com"
+
+    filtered = client.get(
+        f"/api/v1/admin/booking/export?event_id={events[1]['id']}",
+        headers=admin_headers
+    )
+    assert [json.loads(line)["event_id"] for line in filtered.text.splitlines()] == [events[1]["id"]]
+
+def test_export_bookings_csv(client):
+    events, admin_headers = book_events_for_export(client)
+
+    response = client.get(
+        "/api/v1/admin/booking/export?format=csv&date_to=2000-01-01T00:00:00",
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "id,event_id,event_title,user_id,user_email,num_tickets,total_price,booking_date"
+    ]
+
+    response = client.get("/api/v1/admin/booking/export?format=csv", headers=admin_headers)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["event_id"]) for row in rows] == [event["id"] for event in events]
+
+def test_export_bookings_requires_admin(client):
+    create_test_user(client)
+    response = client.get(
+        "/api/v1/admin/booking/export",
+        headers={"Authorization": f"Bearer {get_user_token(client)}"}
+    )
+    assert response.status_code == 403
+
+def test_flash_sale_booking(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    event = create_test_event(client, admin_token)
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.put(
+        f"/api/v1/admin/events/{event['id']}",
+        json={"flash_sale": True},
+        headers=admin_headers,
+    )
+    assert response.json()["flash_sale"] is True
+
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 60, "event_id": event["id"]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert response.json()["number_of_tickets"] == 60
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 41, "event_id": event["id"]},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough tickets available"
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 40
+
+def test_flash_sale_queue_group_commits(test_db):
+    import asyncio
+    from fastapi import HTTPException
+    from sqlalchemy import func, select
+    from ..models.booking import Booking as BookingModel
+    from ..models.event import Event as EventModel
+    from ..services.flash_sale import FlashSaleQueue
+
+    queue = FlashSaleQueue(batch_size=50, max_wait=0.01, max_queue=1000, flag_ttl=5)
+
+    async def run():
+        async with test_db() as db:
+            event = EventModel(
+                title="Flash", description="sale", venue="here", price=10.0,
+                date=datetime.now() + timedelta(days=1),
+                total_tickets=100, available_tickets=100, flash_sale=True,
+            )
+            db.add(event)
+            await db.commit()
+
+        results = await asyncio.gather(
+            *(queue.book(test_db, event.id, user_id, 5) for user_id in range(1, 31)),
+            return_exceptions=True,
+        )
+        async with test_db() as db:
+            available = await db.scalar(
+                select(EventModel.available_tickets).where(EventModel.id == event.id)
+            )
+            sold = await db.scalar(select(func.sum(BookingModel.number_of_tickets)))
+        return results, available, sold
+
+    results, available, sold = asyncio.run(run())
+    booked = [r for r in results if isinstance(r, BookingModel)]
+    refused = [r for r in results if isinstance(r, HTTPException)]
+    assert len(booked) == 20 and len(refused) == 10
+    assert [b.user_id for b in booked] == list(range(1, 21))
+    assert available == 0 and sold == 100
+    assert queue.batches == 1
+
+def test_book_events_batch(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    first = create_test_event(client, admin_token)
+    second = create_test_event(client, admin_token)
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    response = client.post(
+        "/api/v1/bookings/batch",
+        json={"bookings": [
+            {"event_id": second["id"], "number_of_tickets": 3},
+            {"event_id": first["id"], "number_of_tickets": 2},
+            {"event_id": second["id"], "number_of_tickets": 1},
+        ]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert [(b["event_id"], b["number_of_tickets"]) for b in response.json()] == [
+        (second["id"], 3), (first["id"], 2), (second["id"], 1)
+    ]
+    assert client.get(f"/api/v1/events/{first['id']}").json()["available_tickets"] == 98
+    assert client.get(f"/api/v1/events/{second['id']}").json()["available_tickets"] == 96
+
+@pytest.mark.parametrize("extra, expected_status, detail", [
+    ({"event_id": 999, "number_of_tickets": 1}, 404, "Event 999 not found"),
+    (None, 400, "Not enough tickets available"),
+])
+def test_book_events_batch_all_or_nothing(client, extra, expected_status, detail):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    first = create_test_event(client, admin_token)
+    second = create_test_event(client, admin_token)
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    bookings = [
+        {"event_id": first["id"], "number_of_tickets": 5},
+        extra or {"event_id": second["id"], "number_of_tickets": 101},
+    ]
+    response = client.post(
+        "/api/v1/bookings/batch", json={"bookings": bookings}, headers=headers
+    )
+    assert response.status_code == expected_status
+    assert response.json()["detail"] == detail
+    assert client.get(f"/api/v1/events/{first['id']}").json()["available_tickets"] == 100
+
+def test_hold_confirm_and_release(client):
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    held = client.post(
+        f"/api/v1/events/{event['id']}/hold", json={"number_of_tickets": 30}, headers=headers
+    )
+    assert held.status_code == 201
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 70
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/hold", json={"number_of_tickets": 71}, headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough tickets available"
+
+    confirmed = client.post(f"/api/v1/holds/{held.json()['id']}/confirm", headers=headers)
+    assert confirmed.status_code == 201
+    assert confirmed.json()["number_of_tickets"] == 30
+    assert client.post(f"/api/v1/holds/{held.json()['id']}/confirm", headers=headers).status_code == 404
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 70
+
+    second = client.post(
+        f"/api/v1/events/{event['id']}/hold", json={"number_of_tickets": 5}, headers=headers
+    ).json()
+    assert client.delete(f"/api/v1/holds/{second['id']}", headers=headers).status_code == 204
+    assert client.delete(f"/api/v1/holds/{second['id']}", headers=headers).status_code == 404
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 70
+
+def test_sweep_expired_holds(client, test_db):
+    import asyncio
+    from sqlalchemy import update
+    from ..models.hold import TicketHold
+    from ..services.holds import hold_stats, sweep_expired_holds
+
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    first = create_test_event(client, admin_token)
+    second = create_test_event(client, admin_token)
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    holds = [
+        client.post(f"/api/v1/events/{event_id}/hold", json={"number_of_tickets": n}, headers=headers).json()
+        for event_id, n in [(first["id"], 10), (first["id"], 5), (second["id"], 7), (second["id"], 1)]
+    ]
+
+    async def sweep():
+        async with test_db() as db:
+            await db.execute(
+                update(TicketHold)
+                .where(TicketHold.id != holds[3]["id"])
+                .values(expires_at=datetime.now() - timedelta(seconds=1))
+            )
+            await db.commit()
+            expired_before = hold_stats.expired
+            assert await sweep_expired_holds(db, batch_size=2) == 2
+            assert await sweep_expired_holds(db, batch_size=2) == 1
+            assert await sweep_expired_holds(db, batch_size=2) == 0
+            assert hold_stats.expired - expired_before == 3
+
+    asyncio.run(sweep())
+    assert client.get(f"/api/v1/events/{first['id']}").json()["available_tickets"] == 100
+    assert client.get(f"/api/v1/events/{second['id']}").json()["available_tickets"] == 99
+    response = client.post(f"/api/v1/holds/{holds[0]['id']}/confirm", headers=headers)
+    assert response.status_code == 404
+    assert client.post(f"/api/v1/holds/{holds[3]['id']}/confirm", headers=headers).status_code == 201
+
+def test_sales_rollups(client):
+    from datetime import date
+    from ..services.rollups import rebuild_rollups
+    from .conftest import engine
+
+    create_test_admin(client)
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    first = create_test_event(client, admin_headers["Authorization"][7:])
+    second = create_test_event(client, admin_headers["Authorization"][7:])
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    client.post(f"/api/v1/events/{first['id']}/book", json={"event_id": first["id"], "number_of_tickets": 2}, headers=headers)
+    client.post(
+        "/api/v1/bookings/batch",
+        json={"bookings": [{"event_id": first["id"], "number_of_tickets": 3},
+                           {"event_id": second["id"], "number_of_tickets": 1}]},
+        headers=headers,
+    )
+    hold = client.post(f"/api/v1/events/{second['id']}/hold", json={"number_of_tickets": 4}, headers=headers).json()
+    client.post(f"/api/v1/holds/{hold['id']}/confirm", headers=headers)
+    cancelled = client.delete(f"/api/v1/events/{first['id']}/cancel", headers=headers)
+    sold = 5 - cancelled.json()["number_of_tickets"]
+
+    stats = client.get(f"/api/v1/admin/events/{first['id']}/stats", headers=admin_headers).json()
+    today = date.today().isoformat()
+    assert stats == {
+        "event_id": first["id"], "tickets_sold": sold, "revenue": sold * 900, "bookings": 1,
+        "daily": [{"day": today, "tickets_sold": sold, "revenue": sold * 900, "bookings": 1}],
+    }
+    daily = client.get("/api/v1/admin/stats/daily", headers=admin_headers).json()
+    assert daily == [{"day": today, "tickets_sold": sold + 5, "revenue": (sold + 5) * 900, "bookings": 3}]
+    assert client.get("/api/v1/admin/stats/daily", headers=headers).status_code == 403
+
+    with engine.begin() as conn:
+        assert rebuild_rollups(conn) == 2
+    assert client.get(f"/api/v1/admin/events/{first['id']}/stats", headers=admin_headers).json() == stats
+    assert client.get("/api/v1/admin/stats/daily", headers=admin_headers).json() == daily
+
+def test_sales_rollups_keep_booked_prices(client):
+    from ..services.rollups import rebuild_rollups
+    from .conftest import engine
+
+    create_test_admin(client)
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    event = create_test_event(client, admin_headers["Authorization"][7:])
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    stats_url = f"/api/v1/admin/events/{event['id']}/stats"
+
+    client.post(f"/api/v1/events/{event['id']}/book", json={"event_id": event["id"], "number_of_tickets": 2}, headers=headers)
+    client.put(f"/api/v1/admin/events/{event['id']}", json={"price": 50}, headers=admin_headers)
+    stats = client.get(stats_url, headers=admin_headers).json()
+    assert (stats["tickets_sold"], stats["revenue"]) == (2, 1800)
+    with engine.begin() as conn:
+        rebuild_rollups(conn)
+    assert client.get(stats_url, headers=admin_headers).json() == stats
+    # History and exports agree with the rollups.
+    history = client.get("/api/v1/events/history", headers=headers).json()
+    normalized = client.get("/api/v1/events/history?view=normalized", headers=headers).json()
+    export = client.get("/api/v1/admin/booking/export", headers=admin_headers).text
+    assert history[0]["total_price"] == normalized["bookings"][0]["total_price"] == 1800
+    assert json.loads(export)["total_price"] == 1800
+
+    assert client.delete(f"/api/v1/events/{event['id']}/cancel", headers=headers).status_code == 200
+    stats = client.get(stats_url, headers=admin_headers).json()
+    assert (stats["tickets_sold"], stats["revenue"], stats["bookings"]) == (0, 0, 0)
+
+def test_fast_responses_match_validated_responses(client, monkeypatch):
+    from typing import List
+    from ..core import responses
+    from ..schemas.booking import BookingPage, BookingWithDetails
+
+    create_test_admin(client)
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    event = create_test_event(client, admin_headers["Authorization"][7:])
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    for n in (1, 2, 3):
+        client.post(f"/api/v1/events/{event['id']}/book", json={"event_id": event["id"], "number_of_tickets": n}, headers=headers)
+
+    paths = [
+        ("/api/v1/events/history?limit=2", "POST", headers),
+        ("/api/v1/events/history?view=normalized", "GET", headers),
+        ("/api/v1/admin/booking?limit=2", "GET", admin_headers),
+        (f"/api/v1/admin/events/{event['id']}/booking?limit=2", "GET", admin_headers),
+        ("/api/v1/admin/events", "GET", admin_headers),
+        ("/api/v1/events", "GET", {}),
+        (f"/api/v1/events/{event['id']}", "GET", {}),
+    ]
+
+    def fetch():
+        results = []
+        for path, method, path_headers in paths:
+            response = client.request(method, path, headers=path_headers)
+            assert response.status_code == 200
+            results.append((response.json(), response.headers.get("X-Next-Cursor")))
+        return results
+
+    fast = fetch()
+    monkeypatch.setattr(responses.settings, "fast_json_responses", False)
+    validations = []
+    validated = responses.validated
+    monkeypatch.setattr(responses, "validated", lambda *args: validations.append(args) or validated(*args))
+    assert fetch() == fast
+    assert fast[0][1] is not None
+    # The ETag responses (history) are validated against their models too.
+    assert [model for model, _ in validations] == [List[BookingWithDetails], BookingPage]
+
+
+def test_booking_history_get_normalized_and_etag(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    first = create_test_event(client, admin_token)
+    second = create_test_event(client, admin_token)
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+    for event_id in (first["id"], second["id"], first["id"]):
+        client.post(f"/api/v1/events/{event_id}/book", json={"event_id": event_id, "number_of_tickets": 2}, headers=headers)
+
+    full = client.get("/api/v1/events/history", headers=headers)
+    assert full.status_code == 200
+    assert full.json() == client.post("/api/v1/events/history", headers=headers).json()
+    etag = full.headers["ETag"]
+    cached = client.get("/api/v1/events/history", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+    normalized = client.get("/api/v1/events/history?view=normalized", headers=headers).json()
+    assert sorted(normalized["events"]) == sorted([str(first["id"]), str(second["id"])])
+    assert list(normalized["users"].values()) == ["user@example.com"]
+    assert [
+        {**booking, "user_email": normalized["users"][str(booking["user_id"])],
+         "event": normalized["events"][str(booking["event_id"])]}
+        for booking in normalized["bookings"]
+    ] == full.json()
+
+    page = client.get("/api/v1/events/history?view=normalized&limit=2", headers=headers)
+    rest = client.get(
+        f"/api/v1/events/history?view=normalized&cursor={page.headers['X-Next-Cursor']}", headers=headers
+    ).json()
+    assert page.json()["bookings"] + rest["bookings"] == normalized["bookings"]
+
+    client.post(f"/api/v1/events/{second['id']}/book", json={"event_id": second["id"], "number_of_tickets": 1}, headers=headers)
+    assert client.get("/api/v1/events/history", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    admin = client.get("/api/v1/admin/booking?view=normalized", headers=admin_headers).json()
+    assert len(admin["bookings"]) == 4 and len(admin["events"]) == 2
+
+def test_idempotent_booking_is_replayed(client):
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}", "Idempotency-Key": "retry-1"}
+    url = f"/api/v1/events/{event['id']}/book"
+    booking = {"number_of_tickets": 3, "event_id": event["id"]}
+
+    first = client.post(url, json=booking, headers=headers)
+    retry = client.post(url, json=booking, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 97
+
+    reused = client.post(url, json={**booking, "number_of_tickets": 4}, headers=headers)
+    assert reused.status_code == 422
+
+    cancel_url = f"/api/v1/events/{event['id']}/cancel"
+    headers["Idempotency-Key"] = "cancel-1"
+    assert client.delete(cancel_url, headers=headers).status_code == 200
+    replayed = client.delete(cancel_url, headers=headers)
+    assert replayed.status_code == 200 and replayed.json()["id"] == first.json()["id"]
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 100
+
+def test_concurrent_duplicate_bookings_run_once(client, test_db, monkeypatch):
+    import asyncio
+    import httpx
+    from sqlalchemy import func, select
+    from ..api.v1.endpoints import booking as booking_endpoints
+    from ..main import app
+    from ..models.booking import Booking as BookingModel
+
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}", "Idempotency-Key": "tap-tap"}
+    reserve = booking_endpoints.reserve_tickets
+
+    async def slow_reserve(*args):
+        await asyncio.sleep(0.1)
+        return await reserve(*args)
+
+    monkeypatch.setattr(booking_endpoints, "reserve_tickets", slow_reserve)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            responses = await asyncio.gather(*(
+                http.post(
+                    f"/api/v1/events/{event['id']}/book",
+                    json={"number_of_tickets": 2, "event_id": event["id"]},
+                    headers=headers,
+                )
+                for _ in range(5)
+            ))
+        async with test_db() as db:
+            return responses, await db.scalar(select(func.count()).select_from(BookingModel))
+
+    responses, bookings = asyncio.run(run())
+    assert [r.status_code for r in responses] == [201] * 5
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum("Idempotent-Replayed" in r.headers for r in responses) == 4
+    assert bookings == 1
+
+def test_database_idempotency_store_uses_request_database(client, test_db, monkeypatch):
+    import asyncio
+    from sqlalchemy import func, select
+    from ..core.idempotency import DatabaseIdempotencyStore
+    from ..models.idempotency import IdempotencyRecord
+    from ..services import idempotency
+
+    monkeypatch.setattr(
+        idempotency.idempotency_keys, "store",
+        DatabaseIdempotencyStore(idempotency._request_session_factory),
+    )
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}", "Idempotency-Key": "db-1"}
+    url = f"/api/v1/events/{event['id']}/book"
+    body = {"number_of_tickets": 2, "event_id": event["id"]}
+    first = client.post(url, json=body, headers=headers)
+    second = client.post(url, json=body, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+
+    async def stored():
+        async with test_db() as db:
+            return await db.scalar(
+                select(func.count()).select_from(IdempotencyRecord).where(IdempotencyRecord.status_code == 201)
+            )
+
+    # In the database the request used (the test override), not the default one.
+    assert asyncio.run(stored()) == 1
+
+def test_database_idempotency_store(test_db):
+    import asyncio
+    from ..core.idempotency import DatabaseIdempotencyStore, StoredResponse
+
+    store = DatabaseIdempotencyStore(lambda: test_db)
+    response = StoredResponse(201, [("content-type", "application/json")], b'{"id":1}')
+
+    async def run():
+        assert await store.claim("a", "fp", lock_ttl=60) is None
+        pending = await store.claim("a", "other", lock_ttl=60)
+        assert pending.fingerprint == "fp" and pending.response is None
+
+        await store.complete("a", "fp", response, ttl=60)
+        assert (await store.claim("a", "fp", lock_ttl=60)).response == response
+        await store.release("a")  # only frees unfinished keys
+        assert (await store.claim("a", "fp", lock_ttl=60)).response == response
+
+        # An abandoned or expired claim no longer holds the key.
+        assert await store.claim("b", "fp", lock_ttl=60) is None
+        await store.release("b")
+        assert await store.claim("b", "fp", lock_ttl=0) is None
+        assert await store.claim("b", "fp", lock_ttl=60) is None
+
+    asyncio.run(run())
+
+def test_availability_hub_coalesces_updates(test_db):
+    import asyncio
+    from sqlalchemy import delete, update
+    from ..models.event import Event as EventModel
+    from ..services.availability import AvailabilityHub
+
+    hub = AvailabilityHub(interval=0.05, poll_interval=10, max_subscribers=10)
+
+    async def run():
+        async with test_db() as db:
+            event = EventModel(
+                title="Live", description="sale", venue="here", price=10.0,
+                date=datetime.now() + timedelta(days=1), total_tickets=100, available_tickets=100,
+            )
+            db.add(event)
+            await db.commit()
+
+        async with hub.subscribe(test_db, event.id) as first, hub.subscribe(test_db, event.id) as second:
+            assert await first.next(1) == 100 and await second.next(1) == 100
+
+            # Five bookings land before the fan-out task wakes up: one read,
+            # one message per subscriber.
+            for _ in range(5):
+                async with test_db() as db:
+                    await db.execute(update(EventModel).values(available_tickets=EventModel.available_tickets - 1))
+                    await db.commit()
+                hub.notify(event.id)
+            assert await first.next(1) == 95 and await second.next(1) == 95
+            with pytest.raises(asyncio.TimeoutError):
+                await first.next(0.1)
+
+            async with test_db() as db:
+                await db.execute(delete(EventModel))
+                await db.commit()
+            hub.notify(event.id)
+            assert await first.next(1) is None
+
+        await asyncio.sleep(0.1)
+        return hub.stats()
+
+    stats = asyncio.run(run())
+    assert stats["reads_total"] == 3 and stats["messages_total"] == 6
+    assert stats["channels"] == 0 and stats["subscribers"] == 0
+
+def test_availability_sse_and_websocket(test_db):
+    import asyncio
+    from fastapi.testclient import TestClient
+    from ..database import get_session_factory
+    from ..main import app
+    from ..services.availability import availability, sse_stream
+
+    app.dependency_overrides[get_session_factory] = lambda: test_db
+    with TestClient(app) as client:
+        create_test_admin(client)
+        event = create_test_event(client, get_admin_token(client))
+        create_test_user(client)
+        headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+        assert client.get("/api/v1/events/9999/availability/stream").status_code == 404
+        with client.websocket_connect(f"/api/v1/events/{event['id']}/availability/ws") as ws:
+            assert ws.receive_json() == {"event_id": event["id"], "available_tickets": 100}
+            client.post(
+                f"/api/v1/events/{event['id']}/book",
+                json={"event_id": event["id"], "number_of_tickets": 3},
+                headers=headers,
+            )
+            assert ws.receive_json() == {"event_id": event["id"], "available_tickets": 97}
+
+    async def first_message():
+        stream = sse_stream(test_db, event["id"])
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    message = asyncio.run(first_message())
+    assert message == b'event: availability\ndata: {"event_id":%d,"available_tickets":97}\n\n' % event["id"]
+    assert availability.subscribers == 0
+
+def test_bookings_write_outbox_messages(client, test_db, monkeypatch):
+    import asyncio
+    from sqlalchemy import func, select
+    from ..models.outbox import OutboxMessage
+    from ..services.outbox import outbox
+
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    async def count():
+        async with test_db() as db:
+            return await db.scalar(select(func.count()).select_from(OutboxMessage))
+
+    # Without a handler to deliver them, messages aren't written at all.
+    client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 1, "event_id": event["id"]},
+        headers=headers,
+    )
+    assert client.delete(f"/api/v1/events/{event['id']}/cancel", headers=headers).status_code == 200
+    assert asyncio.run(count()) == 0
+
+    monkeypatch.setattr(outbox, "handler_modules", ["myapp.notifications"])
+    booking = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 2, "event_id": event["id"]},
+        headers=headers,
+    ).json()
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 99, "event_id": event["id"]},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert client.delete(f"/api/v1/events/{event['id']}/cancel", headers=headers).status_code == 200
+
+    async def messages():
+        async with test_db() as db:
+            rows = await db.execute(select(OutboxMessage.topic, OutboxMessage.payload).order_by(OutboxMessage.id))
+            return [(topic, json.loads(payload)) for topic, payload in rows]
+
+    created, cancelled = asyncio.run(messages())
+    assert [created[0], cancelled[0]] == ["booking.created", "booking.cancelled"]
+    for _, payload in (created, cancelled):
+        assert payload["booking_id"] == booking["id"]
+        assert payload["event_id"] == event["id"]
+        assert payload["number_of_tickets"] == 2
+
+def test_outbox_retries_with_backoff(test_db, monkeypatch):
+    import asyncio
+    from sqlalchemy import select, update
+    from ..models.outbox import OutboxMessage
+    from ..services.outbox import outbox
+
+    monkeypatch.setattr(outbox, "max_attempts", 2)
+    monkeypatch.setattr(outbox, "backoff_base", 60)
+    calls = []
+
+    @outbox.handler("test.flaky")
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("mail server down")
+
+    @outbox.handler("test.broken")
+    async def broken(payload):
+        raise RuntimeError("always fails")
+
+    async def rows():
+        async with test_db() as db:
+            return {row.topic: row for row in await db.scalars(select(OutboxMessage))}
+
+    async def make_due():
+        async with test_db() as db:
+            await db.execute(update(OutboxMessage).values(available_at=datetime.now()))
+            await db.commit()
+
+    async def run():
+        async with test_db() as db:
+            await outbox.enqueue(db, "test.flaky", [{"n": 1}])
+            await outbox.enqueue(db, "test.broken", [{"n": 2}])
+            await db.commit()
+
+        assert await outbox.process_batch(test_db) == 2
+        retried = await rows()
+        for row in retried.values():
+            assert row.attempts == 1 and row.dead_at is None
+            # Backed off by 30-60 seconds, not due again yet.
+            assert row.available_at > datetime.now() + timedelta(seconds=25)
+        assert retried["test.flaky"].last_error == "RuntimeError: mail server down"
+        assert await outbox.process_batch(test_db) == 0
+
+        await make_due()
+        assert await outbox.process_batch(test_db) == 2
+        remaining = await rows()
+        assert list(remaining) == ["test.broken"]
+        assert remaining["test.broken"].attempts == 2
+        assert remaining["test.broken"].dead_at is not None
+
+        await make_due()
+        assert await outbox.process_batch(test_db) == 0
+        await outbox.refresh_stats(test_db)
+        assert (outbox.pending, outbox.dead, outbox.lag) == (0, 1, 0.0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        outbox.remove_handlers("test.flaky")
+        outbox.remove_handlers("test.broken")
+    assert calls == [{"n": 1}, {"n": 1}]
+
+def test_outbox_leaves_unhandled_topics_pending(test_db):
+    import asyncio
+    from sqlalchemy import select, update
+    from ..models.outbox import OutboxMessage
+    from ..services.outbox import outbox
+
+    @outbox.handler("test.other")
+    async def handle(payload):
+        pass
+
+    async def run():
+        async with test_db() as db:
+            await outbox.enqueue(db, "test.orphan", [{}])
+            await db.commit()
+        assert await outbox.process_batch(test_db) == 0
+        async with test_db() as db:
+            message = await db.scalar(select(OutboxMessage))
+        assert (message.topic, message.attempts, message.dead_at) == ("test.orphan", 0, None)
+
+        # Purged once past the retention, unless a handler serves the topic.
+        assert await outbox.purge_unhandled(test_db) == 0
+        async with test_db() as db:
+            await outbox.enqueue(db, "test.other", [{}])
+            old = datetime.now() - timedelta(seconds=outbox.unhandled_retention + 1)
+            await db.execute(update(OutboxMessage).values(created_at=old, available_at=old))
+            await db.commit()
+        assert await outbox.purge_unhandled(test_db) == 1
+        async with test_db() as db:
+            assert await db.scalar(select(OutboxMessage.topic)) == "test.other"
+
+    try:
+        asyncio.run(run())
+    finally:
+        outbox.remove_handlers("test.other")
+
+def test_outbox_worker_wakes_on_commit(test_db):
+    import asyncio
+    from ..services.outbox import outbox
+
+    async def run():
+        delivered = asyncio.Event()
+
+        @outbox.handler("test.wake")
+        async def handle(payload):
+            delivered.set()
+
+        stop = asyncio.Event()
+        worker = asyncio.create_task(outbox.run(test_db, stop, poll_interval=60))
+        await asyncio.sleep(0.1)
+        async with test_db() as db:
+            await outbox.enqueue(db, "test.wake", [{}])
+            await db.commit()
+        # Well before the next poll.
+        await asyncio.wait_for(delivered.wait(), 5)
+        stop.set()
+        await asyncio.wait_for(worker, 5)
+
+    try:
+        asyncio.run(run())
+    finally:
+        outbox.remove_handlers("test.wake")
@@ -0,0 +1,231 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from ..database import (
+    SyncSessionAdapter,
+    async_database_url,
+    get_replica_session_factories,
+    get_session_factory,
+    read_your_writes,
+    replica_selector,
+    sync_database_url,
+)
+from ..core.config import get_settings
+from ..core.pool import PoolStats, pool_options
+from ..main import app, create_app
+from ..migrations import downgrade, upgrade
+from ..startup import SchemaOutOfDate
+from .conftest import SQLALCHEMY_DATABASE_URL, engine
+from .test_bookings import create_test_event, create_test_user, get_user_token
+from .test_events import create_test_admin, get_admin_token
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+    ("postgresql://u:p@localhost:5432/db", "postgresql+asyncpg://u:p@localhost:5432/db"),
+    ("postgresql+asyncpg://u:p@localhost/db", "postgresql+asyncpg://u:p@localhost/db"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+@pytest.mark.parametrize("url", ["mysql://u:p@localhost/db", "mysql+aiomysql://u:p@localhost/db"])
+def test_async_database_url_rejects_unsupported_backends(url):
+    with pytest.raises(ValueError, match="mysql"):
+        async_database_url(url)
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite+aiosqlite:///./app.db", "sqlite:///./app.db"),
+    ("postgresql://u:p@localhost/db", "postgresql://u:p@localhost/db"),
+])
+def test_sync_database_url(url, expected):
+    assert sync_database_url(url) == expected
+
+def test_sync_session_path(test_db):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    )
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = (
+        lambda: lambda: SyncSessionAdapter(SessionLocal())
+    )
+    client = TestClient(app)
+
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    create_test_user(client)
+    headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+
+    response = client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"number_of_tickets": 4, "event_id": event["id"]},
+        headers=headers
+    )
+    assert response.status_code == 201
+
+    event_response = client.get(f"/api/v1/events/{event['id']}")
+    assert event_response.json()["available_tickets"] == event["total_tickets"] - 4
+
+    export = client.get(
+        "/api/v1/admin/booking/export",
+        headers={"Authorization": f"Bearer {get_admin_token(client)}"}
+    )
+    assert export.status_code == 200
+    assert len(export.text.splitlines()) == 1
+    engine.dispose()
+
+@pytest.mark.parametrize("sync_sessions", [False, True])
+def test_lifespan_warms_up_before_serving(test_db, sync_sessions):
+    factory = test_db
+    if sync_sessions:
+        SessionLocal = sessionmaker(bind=create_engine(SQLALCHEMY_DATABASE_URL))
+        factory = lambda: SyncSessionAdapter(SessionLocal())
+    application = create_app(get_settings().model_copy(update={"db_pool_warm_connections": 2}))
+    application.dependency_overrides[get_session_factory] = lambda: factory
+
+    with TestClient(application) as client:
+        assert client.get("/api/v1/events").status_code == 200
+
+def test_create_app_rejects_settings_it_cannot_apply():
+    settings = get_settings().model_copy(update={"database_url": "sqlite:///elsewhere.db", "cache_ttl": 1.0})
+    with pytest.raises(ValueError, match="cache_ttl, database_url"):
+        create_app(settings)
+
+def test_lifespan_refuses_outdated_schema(test_db):
+    with engine.begin() as conn:
+        downgrade(conn, 1)
+    application = create_app()
+    application.dependency_overrides[get_session_factory] = lambda: test_db
+
+    with pytest.raises(SchemaOutOfDate):
+        with TestClient(application):
+            pass
+
+def test_health_ready(test_db):
+    application = create_app()
+    application.dependency_overrides[get_session_factory] = lambda: test_db
+
+    # Not ready until the lifespan has run.
+    response = TestClient(application).get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"startup": "pending", "database": "ok"}
+
+    with TestClient(application) as client:
+        response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+def test_pool_stats_count_checkouts_and_timeouts():
+    settings = get_settings().model_copy(
+        update={"db_pool_size": 1, "db_max_overflow": 0, "db_pool_timeout": 0.05}
+    )
+    stats = PoolStats()
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL, settings, stats)
+    )
+    stats.attach(engine)
+
+    with engine.connect():
+        snapshot = stats.snapshot()
+        assert (snapshot["size"], snapshot["checked_out"], snapshot["overflow"]) == (1, 1, 0)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = stats.snapshot()
+    assert snapshot["checked_out"] == 0
+    assert snapshot["connects_total"] == 1
+    assert snapshot["timeouts_total"] == 1
+    assert snapshot["checkout_seconds"]["count"] == 2
+    engine.dispose()
+
+def test_route_metrics_and_sql_cost(client):
+    from ..core.telemetry import request_metrics
+
+    request_metrics.reset()
+    create_test_admin(client)
+    event = create_test_event(client, get_admin_token(client))
+    request_metrics.slow_query_seconds = 0
+    try:
+        assert client.get(f"/api/v1/events/{event['id']}").status_code == 200
+    finally:
+        request_metrics.slow_query_seconds = get_settings().slow_query_ms / 1000
+
+    route = ("GET", "/api/v1/events/{event_id:int}")
+    stats = request_metrics.routes[route]
+    assert stats.responses == {"200": 1}
+    assert stats.in_flight == 0
+    assert stats.statements.sum >= 1
+
+    slow = request_metrics.slow_queries[-1]
+    assert slow["route"] == route[1]
+    assert slow["parameters"].startswith("(int")
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/v1/events/{event_id:int}",status="200"} 1' in body
+    assert 'http_request_db_statements_count{method="GET",route="/api/v1/events/{event_id:int}"} 1' in body
+    assert "\napp_sql_slow_queries_total " in body
+
+def test_reads_go_to_replicas_except_right_after_a_write(client, tmp_path):
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+    from ..models.event import Event
+
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    event = create_test_event(client, admin_token)
+
+    # Each SQLite file stands in for a replica that has not caught up yet.
+    replicas = []
+    for index in range(2):
+        url = f"sqlite:///{tmp_path}/replica{index}.db"
+        sync_engine = create_engine(url)
+        with sync_engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(insert(Event).values(
+                id=event["id"], title=f"replica {index}", description="stale", venue="v",
+                date=datetime.now() + timedelta(days=1), total_tickets=100,
+                available_tickets=100, price=1.0,
+            ))
+        sync_engine.dispose()
+        replicas.append(async_sessionmaker(
+            create_async_engine(async_database_url(url), poolclass=NullPool), expire_on_commit=False
+        ))
+    app.dependency_overrides[get_replica_session_factories] = lambda: tuple(replicas)
+    read_your_writes.clear()  # forget that the admin just created the event
+    try:
+        titles = [
+            client.get("/api/v1/admin/events", headers=admin_headers).json()[0]["title"]
+            for _ in range(4)
+        ]
+        assert sorted(titles) == ["replica 0", "replica 0", "replica 1", "replica 1"]
+        assert titles[0] != titles[1] and titles[::2] == titles[:1] * 2
+
+        create_test_user(client)
+        user_headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+        assert client.post(
+            f"/api/v1/events/{event['id']}/book",
+            json={"event_id": event["id"], "number_of_tickets": 3},
+            headers=user_headers,
+        ).status_code == 201
+
+        # The booker sees the booking; everyone else reads a replica.
+        url = f"/api/v1/events/{event['id']}"
+        assert client.get(url, headers=user_headers).json()["available_tickets"] == 97
+        assert client.get(url).json()["title"].startswith("replica")
+        stats = replica_selector.stats()
+        assert stats["reads_total"]["read_your_writes"] >= 1
+    finally:
+        app.dependency_overrides.pop(get_replica_session_factories)
+
+def test_least_loaded_replica_selection():
+    from ..core.replicas import ReplicaSelector
+
+    selector = ReplicaSelector("least_loaded")
+    first = selector.pick(3)
+    with selector.reading(first):
+        second = selector.pick(3)
+        with selector.reading(second):
+            assert {first, second, selector.pick(3)} == {0, 1, 2}
+    assert selector.stats()["reads_total"] == {f"replica_{first}": 1, f"replica_{second}": 1}
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pytest
 from fastapi import status
 
@@ -148,6 +148,31 @@ def test_update_event_success(client, update_data, expected_status):
     for key, value in update_data.items():
         assert data[key] == value
 
+def test_update_event_total_tickets_keeps_bookings(client):
+    from .test_bookings import create_test_user, get_user_token
+
+    create_test_admin(client)
+    admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    event = create_test_event(client, admin_headers["Authorization"][7:])
+    create_test_user(client)
+    client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"event_id": event["id"], "number_of_tickets": 30},
+        headers={"Authorization": f"Bearer {get_user_token(client)}"},
+    )
+
+    url = f"/api/v1/admin/events/{event['id']}"
+    response = client.put(url, json={"total_tickets": 120}, headers=admin_headers)
+    assert response.status_code == 200
+    assert (response.json()["total_tickets"], response.json()["available_tickets"]) == (120, 90)
+
+    response = client.put(url, json={"total_tickets": 20}, headers=admin_headers)
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 90
+    response = client.put(url, json={"total_tickets": 30}, headers=admin_headers)
+    assert response.json()["available_tickets"] == 0
+    assert client.put(url, json={}, headers=admin_headers).json()["total_tickets"] == 30
+
 def test_update_nonexistent_event(client):
     create_test_admin(client)
     admin_token = get_admin_token(client)
@@ -267,4 +292,259 @@ def test_events_pagination(client):
     assert len(data2) == 2
     
     # Ensure different pages return different events
-    assert data1[0]["id"] != data2[0]["id"]
\ No newline at end of file
+    assert data1[0]["id"] != data2[0]["id"]
+
+def test_events_cursor_pagination(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    created = [create_test_event(client, admin_token)["id"] for _ in range(5)]
+
+    seen = []
+    response = client.get("/api/v1/events?limit=2")
+    while True:
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(event["id"] for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/api/v1/events?limit=2&cursor={cursor}")
+
+    assert seen == created
+
+def test_events_invalid_cursor(client):
+    response = client.get("/api/v1/events?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_events_page_size_cap(client):
+    response = client.get("/api/v1/events?limit=100000")
+    assert response.status_code == 422
+
+def test_event_details_cached_until_booking(client):
+    create_test_admin(client)
+    admin_token = get_admin_token(client)
+    event = create_test_event(client, admin_token)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 100
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 100
+    listing = client.get("/api/v1/events").json()
+    assert client.get("/api/v1/events").json() == listing
+
+    client.post(
+        f"/api/v1/events/{event['id']}/book",
+        json={"event_id": event["id"], "number_of_tickets": 3},
+        headers=headers,
+    )
+    assert client.get(f"/api/v1/events/{event['id']}").json()["available_tickets"] == 97
+    # Bookings leave listings to expire after CACHE_TTL.
+    assert client.get("/api/v1/events").json() == listing
+
+    client.put(
+        f"/api/v1/admin/events/{event['id']}",
+        json={"title": "Renamed"},
+        headers=headers,
+    )
+    assert client.get(f"/api/v1/events/{event['id']}").json()["title"] == "Renamed"
+
+    client.delete(f"/api/v1/admin/events/{event['id']}", headers=headers)
+    assert client.get(f"/api/v1/events/{event['id']}").status_code == 404
+    assert client.get("/api/v1/events").json() == []
+
+    stats = client.get("/api/v1/admin/metrics", headers=headers).json()["event_cache"]
+    assert stats["hits"] >= 2
+    assert stats["invalidations"] >= 3
+
+def test_cache_coalesces_concurrent_misses():
+    import asyncio
+    from ..core.cache import MemoryCacheBackend, ReadThroughCache
+
+    cache = ReadThroughCache(MemoryCacheBackend(100, 60), 60)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    async def run():
+        results = await asyncio.gather(
+            *(cache.get_or_load("ns", "key", load) for _ in range(20))
+        )
+        assert results == [{"value": 1}] * 20
+        assert await cache.get_or_load("ns", "key", load) == {"value": 1}
+        await cache.invalidate("ns")
+        assert await cache.get_or_load("ns", "key", load) == {"value": 2}
+
+    asyncio.run(run())
+    assert calls == 2
+    assert cache.stats()["coalesced"] == 19
+
+def test_cache_survives_cancelled_loader():
+    import asyncio
+    from ..core.cache import MemoryCacheBackend, ReadThroughCache
+
+    cache = ReadThroughCache(MemoryCacheBackend(100, 60), 60)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls}
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_load("ns", "key", load))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_load("ns", "key", load)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        # One waiter takes over the load and the rest share it.
+        assert await asyncio.gather(*waiters) == [{"value": 2}] * 5
+        assert leader.cancelled()
+
+    asyncio.run(run())
+    assert calls == 2
+
+def test_bulk_import_events_json(client):
+    create_test_admin(client)
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    date = (datetime.now() + timedelta(days=7)).isoformat()
+    events = [
+        {"title": f"Day {i}", "description": "Festival", "date": date,
+         "venue": "Park", "total_tickets": 50, "price": 10}
+        for i in range(5)
+    ]
+    events[2]["total_tickets"] = "many"
+    events[3]["date"] = (datetime.now() - timedelta(days=1)).isoformat()
+
+    response = client.post("/api/v1/admin/events/bulk", json=events, headers=headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 3
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+    assert result["errors"][0]["errors"][0].startswith("total_tickets")
+
+    listed = client.get("/api/v1/events").json()
+    assert [event["title"] for event in listed] == ["Day 0", "Day 1", "Day 4"]
+    assert all(event["available_tickets"] == 50 for event in listed)
+
+def test_bulk_import_events_with_utc_dates(client):
+    create_test_admin(client)
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    events = [
+        {"title": title, "description": "Festival", "date": date,
+         "venue": "Park", "total_tickets": 50, "price": 10}
+        for title, date in [("Future", "2030-01-01T10:00:00Z"), ("Past", "2000-01-01T10:00:00+02:00")]
+    ]
+
+    response = client.post("/api/v1/admin/events/bulk", json=events, headers=headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 1
+    assert result["errors"] == [{"row": 2, "errors": ["date: Event date must be in the future"]}]
+
+    (event,) = client.get("/api/v1/events").json()
+    expected = datetime(2030, 1, 1, 10, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert event["date"] == expected.isoformat()
+
+def test_bulk_import_events_csv(client):
+    create_test_admin(client)
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    date = (datetime.now() + timedelta(days=7)).isoformat()
+    body = (
+        "title,description,date,venue,total_tickets,price\r\n"
+        f'Opening,"Doors at 6,\nshow at 8",{date},Hall,100,25.5\r\n'
+        f"Closing,Encore,{date},Hall,-,25.5\r\n"
+    )
+    response = client.post(
+        "/api/v1/admin/events/bulk",
+        files={"file": ("events.csv", body, "text/csv")},
+        headers=headers,
+    )
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0]["row"] == 2
+
+    response = client.post(
+        "/api/v1/admin/events/bulk",
+        content=body,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert response.json()["created"] == 1
+    events = client.get("/api/v1/events").json()
+    assert events[0]["description"] == "Doors at 6,\nshow at 8"
+
+def test_bulk_import_events_malformed_json(client):
+    create_test_admin(client)
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}", "Content-Type": "application/json"}
+    response = client.post("/api/v1/admin/events/bulk", content='{"title": "x"}', headers=headers)
+    assert response.json() == {"created": 0, "errors": [{"row": 1, "errors": ["Expected a JSON array"]}]}
+
+def test_import_parsers_handle_split_chunks():
+    import asyncio
+    from ..services.event_import import csv_records, json_records
+
+    async def chunks(data, size=3):
+        for i in range(0, len(data), size):
+            yield data[i:i + size]
+
+    async def collect(records):
+        return [record async for record in records]
+
+    data = '[{"a": 1, "b": "x\\u00e9"}, 12345, {"c": [1, 2]}]'.encode()
+    assert asyncio.run(collect(json_records(chunks(data)))) == [
+        {"a": 1, "b": "xé"}, 12345, {"c": [1, 2]}
+    ]
+    data = 'a,b\n1,"two\nlines, é"\n3,4'.encode()
+    assert asyncio.run(collect(csv_records(chunks(data)))) == [
+        {"a": "1", "b": "two\nlines, é"}, {"a": "3", "b": "4"}
+    ]
+    data = 'a,b\r\n"x ""q""\r\ny",2\r\n\r\n3,"4\n"\r\n'.encode()
+    for size in (1, 2, 5):
+        assert asyncio.run(collect(csv_records(chunks(data, size)))) == [
+            {"a": 'x "q"\r\ny', "b": "2"}, {"a": "3", "b": "4\n"}
+        ]
+
+def test_search_events(client):
+    create_test_admin(client)
+    headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+    date = datetime.now() + timedelta(days=10)
+    for title, description, venue, price in [
+        ("Jazz Night", "Smooth saxophone", "Blue Note", 40),
+        ("Rock Festival", "Loud guitars and jazz fusion", "Stadium", 90),
+        ("Poetry Reading", "Quiet evening", "Library", 5),
+    ]:
+        client.post(
+            "/api/v1/admin/events",
+            json={"title": title, "description": description, "date": date.isoformat(),
+                  "venue": venue, "total_tickets": 10, "price": price},
+            headers=headers,
+        )
+
+    def search(**params):
+        response = client.get("/api/v1/events/search", params=params)
+        assert response.status_code == 200
+        return [event["title"] for event in response.json()]
+
+    # Title matches outrank description matches.
+    assert search(q="jazz") == ["Jazz Night", "Rock Festival"]
+    assert search(q="gui") == ["Rock Festival"]
+    assert search(q="jazz", max_price=50) == ["Jazz Night"]
+    assert search(q="jazz", venue="stadium") == ["Rock Festival"]
+    assert search(q="jazz", date_from=(date + timedelta(days=1)).isoformat()) == []
+    assert search(q='"; DROP TABLE events; --') == []
+    assert client.get("/api/v1/events/search", params={"q": "!!"}).status_code == 400
+
+    library = client.get("/api/v1/events/search", params={"q": "poetry"}).json()[0]
+    client.put(f"/api/v1/admin/events/{library['id']}", json={"title": "Slam Night"}, headers=headers)
+    assert search(q="poetry") == []
+    assert search(q="slam") == ["Slam Night"]
+    client.delete(f"/api/v1/admin/events/{library['id']}", headers=headers)
+    assert search(q="slam") == []
+
+    # Bulk imports index their chunk at once; single inserts index again after.
+    event = {"description": "Sunday", "date": date.isoformat(), "venue": "Cafe", "total_tickets": 10, "price": 20}
+    client.post("/api/v1/admin/events/bulk", json=[{**event, "title": "Brunch Jazz"}], headers=headers)
+    client.post("/api/v1/admin/events", json={**event, "title": "Brunch Club"}, headers=headers)
+    assert sorted(search(q="brunch")) == ["Brunch Club", "Brunch Jazz"]
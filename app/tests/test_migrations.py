@@ -0,0 +1,79 @@
+from sqlalchemy import event, inspect
+from ..database import Base
+from ..migrations import current_revision, downgrade, head, upgrade
+from .conftest import async_engine, engine
+from .test_bookings import create_test_event, create_test_user, get_user_token
+from .test_events import create_test_admin, get_admin_token
+
+def test_migrations_match_models(test_db):
+    with engine.connect() as conn:
+        assert current_revision(conn) == head()
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            assert inspector.has_table(table.name)
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            assert columns == set(table.columns.keys())
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= indexes
+
+def test_downgrade_and_upgrade_round_trip(test_db):
+    with engine.begin() as conn:
+        assert downgrade(conn, 1) == list(range(head(), 1, -1))
+        assert "ix_bookings_user_id_booking_date" not in {
+            index["name"] for index in inspect(conn).get_indexes("bookings")
+        }
+        assert upgrade(conn) == list(range(2, head() + 1))
+        assert current_revision(conn) == head()
+
+def capture_statements(client):
+    """Run the booking and browsing flows and return every SQL statement."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        create_test_admin(client)
+        admin_headers = {"Authorization": f"Bearer {get_admin_token(client)}"}
+        created = create_test_event(client, admin_headers["Authorization"][7:])
+        create_test_user(client)
+        headers = {"Authorization": f"Bearer {get_user_token(client)}"}
+        event_id = created["id"]
+
+        client.get("/api/v1/events")
+        cursor = client.get("/api/v1/events?limit=1").headers.get("X-Next-Cursor")
+        client.get(f"/api/v1/events?limit=1&cursor={cursor}")
+        client.get(f"/api/v1/events/{event_id}")
+        client.post(
+            f"/api/v1/events/{event_id}/book",
+            json={"number_of_tickets": 1, "event_id": event_id},
+            headers=headers
+        )
+        client.post("/api/v1/events/history", headers=headers)
+        client.get("/api/v1/admin/booking", headers=admin_headers)
+        client.get(f"/api/v1/admin/events/{event_id}/booking", headers=admin_headers)
+        client.get("/api/v1/admin/events", headers=admin_headers)
+        client.delete(f"/api/v1/events/{event_id}/cancel", headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return statements
+
+def test_hot_queries_use_indexes(client):
+    statements = capture_statements(client)
+    checked = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            plan = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, tuple(parameters)
+            ).all()
+            for row in plan:
+                detail = row[-1]
+                # A SCAN without USING INDEX is a full table scan.
+                assert not detail.startswith("SCAN") or "USING" in detail, (
+                    f"{statement!r} does a full scan: {detail}"
+                )
+            checked += 1
+    assert checked >= 10
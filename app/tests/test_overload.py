@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+import pytest
+from ..core.overload import (
+    BROWSE,
+    CRITICAL,
+    NORMAL,
+    WINDOW,
+    ConcurrencyLimiter,
+    LoadSheddingMiddleware,
+    Shed,
+    classify,
+)
+
+
+def make_limiter(mode="static", limit=1, queue=1, timeout=1.0, target=1.0):
+    return ConcurrencyLimiter(mode, limit, 1, queue, timeout, target)
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/api/v1/events", BROWSE),
+    ("GET", "/api/v1/events/3", BROWSE),
+    ("GET", "/api/v1/events/search", BROWSE),
+    ("GET", "/api/v1/events/history", NORMAL),
+    ("POST", "/api/v1/events/3/book", CRITICAL),
+    ("DELETE", "/api/v1/events/3/cancel", CRITICAL),
+    ("POST", "/api/v1/bookings/batch", CRITICAL),
+    ("POST", "/api/v1/auth/login", CRITICAL),
+    ("GET", "/api/v1/admin/booking", NORMAL),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+def test_full_queue_evicts_browse_for_bookings():
+    async def scenario():
+        limiter = make_limiter()
+        await limiter.acquire(NORMAL)
+        browse = asyncio.create_task(limiter.acquire(BROWSE))
+        await asyncio.sleep(0)
+
+        # Another browse request is shed outright...
+        with pytest.raises(Shed, match="queue_full"):
+            await limiter.acquire(BROWSE)
+        # ...but a booking takes the queued browse request's place.
+        booking = asyncio.create_task(limiter.acquire(CRITICAL))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed, match="evicted"):
+            await browse
+
+        limiter.release(0.01)
+        await booking
+        assert limiter.in_flight == 1
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["shed_total"] == {"browse_queue_full": 1, "browse_evicted": 1}
+    assert stats["admitted_total"] == {"critical": 1, "normal": 1, "browse": 0}
+
+def test_queued_request_is_shed_at_its_deadline():
+    async def scenario():
+        limiter = make_limiter(timeout=0.01)
+        await limiter.acquire(NORMAL)
+        with pytest.raises(Shed, match="deadline"):
+            await limiter.acquire(NORMAL)
+        assert limiter.stats()["queued"]["normal"] == 0
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_returns_a_slot_it_was_handed():
+    async def scenario():
+        limiter = make_limiter(queue=2)
+        await limiter.acquire(NORMAL)
+        first = asyncio.create_task(limiter.acquire(NORMAL))
+        second = asyncio.create_task(limiter.acquire(NORMAL))
+        await asyncio.sleep(0)
+
+        # The client goes away in the same loop iteration as the slot frees
+        # up. Depending on the Python version, wait_for either completes the
+        # acquire or raises CancelledError; the slot must not leak either way.
+        limiter.release(0.01)
+        first.cancel()
+        try:
+            await first
+            limiter.release(0.01)
+        except asyncio.CancelledError:
+            pass
+        await second
+        assert limiter.in_flight == 1
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_adaptive_limit_backs_off_and_recovers():
+    limiter = make_limiter(mode="adaptive", limit=10, target=0.1)
+    for _ in range(WINDOW):
+        limiter.in_flight += 1
+        limiter.release(0.5)
+    assert limiter.limit == 8
+
+    limiter._saturated = True
+    for _ in range(WINDOW):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert limiter.limit == 9
+
+def test_middleware_sheds_with_retry_after():
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        app = LoadSheddingMiddleware(slow_app, make_limiter(queue=0), retry_after=2)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/api/v1/events"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/api/v1/events")
+            health = asyncio.create_task(client.get("/health/ready"))
+            stream = asyncio.create_task(client.get("/api/v1/events/1/availability/stream"))
+            await asyncio.sleep(0.01)  # both arrive while the only slot is taken
+            release.set()
+            return shed, await first, await health, await stream
+
+    shed, first, health, stream = asyncio.run(scenario())
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+    assert first.status_code == 200
+    assert health.status_code == 200
+    assert stream.status_code == 200
@@ -0,0 +1,164 @@
+"""Concurrent-request throughput of one worker per database session mode.
+
+Drives the ASGI app in-process with many concurrent clients and compares:
+
+* ``blocking`` - the old behaviour: a sync Session called inline from the
+  ``async def`` handlers, stalling the event loop on every query;
+* ``threadpool`` - ``DATABASE_ASYNC=false``: the sync Session run through
+  ``SyncSessionAdapter`` in the threadpool;
+* ``async`` - the default AsyncSession on an asyncio driver.
+
+``--db-latency-ms`` adds a fixed delay to every statement to stand in for a
+network round trip to a real database server.
+
+    python -m benchmarks.bench_async_db --concurrency 50 --requests 2000 --db-latency-ms 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, SyncSessionAdapter, async_database_url, get_session_factory
+from app.main import app
+from app.models.event import Event
+
+
+class BlockingSessionAdapter(SyncSessionAdapter):
+    """Runs the sync Session on the event loop thread, like the old get_db."""
+
+    async def _run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+def add_latency(sync_engine, seconds):
+    """Sleep inside SQLite's statement trace hook.
+
+    The hook runs wherever the DBAPI executes: the calling thread for
+    pysqlite and aiosqlite's own worker thread for the async driver, which
+    is where a network round trip would be spent too.
+    """
+    if seconds <= 0:
+        return
+
+    def _sleep(statement):
+        time.sleep(seconds)
+
+    @event.listens_for(sync_engine, "connect")
+    def _install(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, "await_"):
+            dbapi_connection.await_(dbapi_connection._connection.set_trace_callback(_sleep))
+        else:
+            dbapi_connection.set_trace_callback(_sleep)
+
+
+def seed(url, events):
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    date = datetime.now() + timedelta(days=30)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Event),
+            [
+                {
+                    "title": f"Event {i}",
+                    "description": "benchmark",
+                    "date": date,
+                    "venue": "bench",
+                    "total_tickets": 100,
+                    "available_tickets": 100,
+                    "price": 10.0,
+                }
+                for i in range(events)
+            ],
+        )
+    engine.dispose()
+
+
+def session_factory(mode, url, latency):
+    if mode == "async":
+        engine = create_async_engine(async_database_url(url), pool_size=64)
+        add_latency(engine.sync_engine, latency)
+        return engine, async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=64)
+    add_latency(engine, latency)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    adapter = BlockingSessionAdapter if mode == "blocking" else SyncSessionAdapter
+    return engine, lambda: adapter(SessionLocal())
+
+
+async def drive(args, events):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    remaining = args.requests
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def client_loop(n):
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                path = f"/api/v1/events/{(n % events) + 1}" if n % 2 else "/api/v1/events?limit=20"
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                n += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 4),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+async def run_mode(mode, url, args):
+    engine, factory = session_factory(mode, url, args.db_latency_ms / 1000)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    try:
+        return await drive(args, args.events)
+    finally:
+        if mode == "async":
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--modes", default="blocking,threadpool,async")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url, args.events)
+
+    report = {"concurrency": args.concurrency, "db_latency_ms": args.db_latency_ms}
+    for mode in args.modes.split(","):
+        report[mode] = asyncio.run(run_mode(mode, url, args))
+    app.dependency_overrides.clear()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Latency of authenticated requests with and without the auth fast path.
+
+``legacy`` authenticates with a subject-only token and no identity cache,
+so every request decodes the JWT and looks the user up by email, as
+get_current_user used to. ``fast`` uses a token carrying the id/admin
+claims and the per-token identity cache, so authentication runs no SQL.
+
+    python -m benchmarks.bench_auth_fast_path --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import security
+from app.core.security import IdentityCache, create_access_token, create_user_token
+from app.database import Base, async_database_url, get_session_factory
+from app.main import app
+from app.models.event import Event
+from app.models.user import User
+
+
+def seed(url):
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).returning(User.id),
+            {"email": "bench@example.com", "hashed_password": "x", "is_admin": False},
+        ).scalar_one()
+        event_id = conn.execute(
+            insert(Event).returning(Event.id),
+            {
+                "title": "Bench",
+                "description": "benchmark",
+                "date": datetime.now() + timedelta(days=30),
+                "venue": "bench",
+                "total_tickets": 10_000_000,
+                "available_tickets": 10_000_000,
+                "price": 10.0,
+            },
+        ).scalar_one()
+    engine.dispose()
+    return User(id=user_id, email="bench@example.com", is_admin=False), event_id
+
+
+def percentile(values, fraction):
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 3)
+
+
+async def measure(client, method, path, token, requests, body=None):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.request(method, path, headers=headers, json=body)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    latencies.sort()
+    return {
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+async def run(url, user, event_id, args):
+    engine = create_async_engine(async_database_url(url))
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    tokens = {
+        "legacy": create_access_token(data={"sub": user.email}, expires_delta=timedelta(hours=1)),
+        "fast": create_user_token(user, expires_delta=timedelta(hours=1)),
+    }
+    caches = {"legacy": IdentityCache(0, 0), "fast": IdentityCache(10_000, 300)}
+
+    report = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("legacy", "fast"):
+            security.identity_cache = caches[mode]
+            statements = 0
+            me = await measure(client, "GET", "/api/v1/auth/me", tokens[mode], args.requests)
+            me["sql_per_request"] = round(statements / args.requests, 2)
+            statements = 0
+            book = await measure(
+                client,
+                "POST",
+                f"/api/v1/events/{event_id}/book",
+                tokens[mode],
+                args.requests,
+                body={"event_id": event_id, "number_of_tickets": 1},
+            )
+            book["sql_per_request"] = round(statements / args.requests, 2)
+            report[mode] = {"/auth/me": me, "/events/{id}/book": book}
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    user, event_id = seed(url)
+    print(json.dumps(asyncio.run(run(url, user, event_id, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Watching one event's availability: polling GET /events/{id} vs the stream.
+
+``--watchers`` clients follow one event for ``--seconds`` while bookings
+arrive at ``--bookings-per-sec``. Pollers request the event detail every
+``--poll-interval`` seconds; streamers consume the SSE stream. Reports
+requests served, SQL statements and CPU time for each.
+
+    python -m benchmarks.bench_availability_stream --watchers 1000 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.services.availability import availability, sse_stream
+from app.services.event_cache import event_cache
+
+from benchmarks.suite.scenarios import API, Context, book
+from benchmarks.suite.seed import seed
+
+
+async def run(url, dataset, mode, args):
+    engine = create_async_engine(async_database_url(url), pool_size=20)
+    statements = {"count": 0}
+
+    @sa_event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    await event_cache.clear()
+    event_id = 1
+    received = {"messages": 0, "requests": 0, "failed": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        ctx = Context(client, dataset, random.Random(0))
+        ctx.event = lambda: event_id
+
+        async def poller():
+            await asyncio.sleep(random.random() * args.poll_interval)
+            while time.perf_counter() < deadline:
+                response = await client.get(f"{API}/events/{event_id}")
+                received["requests" if response.status_code == 200 else "failed"] += 1
+                await asyncio.sleep(args.poll_interval)
+
+        async def streamer():
+            # Runs until cancelled at the deadline, like a client going away.
+            async for _ in sse_stream(factory, event_id):
+                received["messages"] += 1
+
+        async def booker():
+            while time.perf_counter() < deadline:
+                await book(ctx)
+                await asyncio.sleep(1 / args.bookings_per_sec)
+
+        cpu = time.process_time()
+        statements["count"] = 0
+        if mode == "poll":
+            await asyncio.gather(booker(), *(poller() for _ in range(args.watchers)))
+        else:
+            streams = [asyncio.create_task(streamer()) for _ in range(args.watchers)]
+            await booker()
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+        cpu = time.process_time() - cpu
+
+    await engine.dispose()
+    return {
+        "requests": received["requests"],
+        "failed_requests": received["failed"],
+        "stream_messages": received["messages"],
+        "sql_statements": statements["count"],
+        "cpu_seconds": round(cpu, 2),
+        "hub": availability.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--watchers", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--bookings-per-sec", type=float, default=20)
+    parser.add_argument("--modes", default="poll,stream")
+    args = parser.parse_args()
+
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    results = {}
+    for mode in args.modes.split(","):
+        dataset = seed(url, 1000, 10, 100)
+        results[mode] = asyncio.run(run(url, dataset, mode, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
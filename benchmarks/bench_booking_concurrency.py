@@ -0,0 +1,160 @@
+"""Concurrent-bookers benchmark for the booking inventory path.
+
+Runs the same flash-sale workload against the old read-modify-write
+booking logic and the shipped ``book_event`` endpoint (guarded UPDATE,
+booking insert, sales rollup and outbox message), then checks that tickets
+sold never exceed the event's inventory.
+
+    python -m benchmarks.bench_booking_concurrency --workers 16 --tickets 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.endpoints.booking import book_event
+from app.core.security import CurrentUser
+from app.database import async_database_url
+from app.migrations import downgrade, upgrade
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.schemas.booking import BookingCreate
+
+
+async def legacy_book(db, user_id, event_id, number_of_tickets, session_factory):
+    """The pre-atomic book_event logic: load, check in Python, write back."""
+    event = await db.scalar(select(Event).where(Event.id == event_id))
+    if event is None or event.date < datetime.now():
+        return False
+    if event.available_tickets < number_of_tickets:
+        return False
+    event.available_tickets -= number_of_tickets
+    db.add(Booking(user_id=user_id, event_id=event_id, number_of_tickets=number_of_tickets))
+    await db.commit()
+    return True
+
+
+async def atomic_book(db, user_id, event_id, number_of_tickets, session_factory):
+    """The endpoint itself, called without the HTTP layer."""
+    try:
+        await book_event(
+            event_id,
+            BookingCreate(event_id=event_id, number_of_tickets=number_of_tickets),
+            current_user=CurrentUser(id=user_id, email=f"bench{user_id}@example.com", is_admin=False),
+            db=db,
+            session_factory=session_factory,
+        )
+    except HTTPException as exc:
+        if exc.status_code != 400:
+            raise
+        return False
+    return True
+
+
+async def seed(engine, tickets, users):
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: downgrade(sync_conn, 0))
+        await conn.run_sync(upgrade)
+        await conn.execute(
+            insert(User),
+            [
+                {"email": f"bench{i}@example.com", "hashed_password": "x", "is_admin": False}
+                for i in range(users)
+            ],
+        )
+        event_id = (await conn.execute(
+            insert(Event).returning(Event.id),
+            {
+                "title": "Flash sale",
+                "description": "benchmark",
+                "date": datetime.now() + timedelta(days=1),
+                "venue": "bench",
+                "total_tickets": tickets,
+                "available_tickets": tickets,
+                "price": 10.0,
+            },
+        )).scalar_one()
+    return event_id
+
+
+async def run(engine, book, args):
+    event_id = await seed(engine, args.tickets, args.workers)
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    attempts = 0
+    errors = 0
+
+    async def worker(user_id):
+        nonlocal attempts, errors
+        async with Session() as db:
+            for _ in range(args.attempts):
+                try:
+                    await book(db, user_id, event_id, args.per_booking, Session)
+                except Exception:
+                    await db.rollback()
+                    errors += 1
+                attempts += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user_id) for user_id in range(1, args.workers + 1)))
+    elapsed = time.perf_counter() - started
+
+    async with engine.connect() as conn:
+        sold = (await conn.execute(
+            select(func.coalesce(func.sum(Booking.number_of_tickets), 0))
+        )).scalar_one()
+        bookings = (await conn.execute(select(func.count(Booking.id)))).scalar_one()
+        available = (await conn.execute(
+            select(Event.available_tickets).where(Event.id == event_id)
+        )).scalar_one()
+
+    return {
+        "bookings": bookings,
+        "attempts": attempts,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "bookings_per_sec": round(bookings / elapsed, 1) if elapsed else None,
+        "tickets_sold": sold,
+        "inventory_decrement": args.tickets - available,
+        "oversold": max(0, sold - args.tickets),
+        "lost_updates": sold - (args.tickets - available),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="booking attempts per worker")
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--per-booking", type=int, default=1)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    connect_args = {"timeout": 30} if url.startswith("sqlite") else {}
+    engine = create_async_engine(async_database_url(url), connect_args=connect_args)
+
+    report = {
+        "workers": args.workers,
+        "attempts_per_worker": args.attempts,
+        "tickets": args.tickets,
+        "legacy": await run(engine, legacy_book, args),
+        "atomic": await run(engine, atomic_book, args),
+    }
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+    if report["atomic"]["oversold"] or report["atomic"]["lost_updates"]:
+        raise SystemExit("atomic booking path oversold")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""Memory and time-to-first-byte of the streaming booking export.
+
+For each row count, measures the streaming ``/admin/booking/export`` endpoint
+against materializing the same joined rows and validating them as
+``BookingWithDetails``, the way ``/admin/booking`` builds its response.
+Peak memory is measured with tracemalloc.
+
+    python -m benchmarks.bench_booking_export --rows 10000,100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from typing import List
+
+from app.api.v1.endpoints.booking import _bookings_with_details, _with_details
+from app.core.security import create_user_token
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.migrations import upgrade
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.schemas.booking import BookingWithDetails
+
+EVENTS = 100
+USERS = 1000
+
+
+def seed(url, rows):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(delete(Booking))
+        conn.execute(delete(Event))
+        conn.execute(delete(User))
+        conn.execute(
+            insert(User),
+            [{"id": i, "email": f"user{i}@example.com", "hashed_password": "x", "is_admin": i == 1}
+             for i in range(1, USERS + 1)],
+        )
+        date = datetime.now() + timedelta(days=30)
+        conn.execute(
+            insert(Event),
+            [{"id": i, "title": f"Event {i}", "description": "benchmark", "date": date,
+              "venue": "bench", "total_tickets": 10**6, "available_tickets": 10**6, "price": 25.0}
+             for i in range(1, EVENTS + 1)],
+        )
+        booked = datetime.now()
+        for start in range(0, rows, 50_000):
+            conn.execute(
+                insert(Booking),
+                [{"user_id": i % USERS + 1, "event_id": i % EVENTS + 1, "number_of_tickets": 1 + i % 4,
+                  "booking_date": booked + timedelta(seconds=i)}
+                 for i in range(start, min(rows, start + 50_000))],
+            )
+    engine.dispose()
+
+
+async def streaming(headers):
+    """Call the ASGI app directly; httpx's ASGI transport buffers the body."""
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/admin/booking/export",
+        "raw_path": b"/api/v1/admin/booking/export",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # The client never disconnects; park Starlette's disconnect listener.
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(message["body"])
+
+    await app(scope, receive, send)
+    return first_byte, time.perf_counter() - started, size
+
+
+async def materialized(factory):
+    started = time.perf_counter()
+    async with factory() as db:
+        rows = (await db.execute(_bookings_with_details())).all()
+        validated = TypeAdapter(List[BookingWithDetails]).validate_python(_with_details(rows))
+        body = TypeAdapter(List[BookingWithDetails]).dump_json(validated)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, len(body)
+
+
+async def measure(coroutine):
+    tracemalloc.start()
+    first_byte, total, size = await coroutine
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "time_to_first_byte_ms": round(first_byte * 1000, 1),
+        "total_seconds": round(total, 3),
+        "bytes": size,
+        "peak_python_mb": round(peak / 2**20, 2),
+    }
+
+
+async def run(url, rows):
+    engine = create_async_engine(async_database_url(url))
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    admin = User(id=1, email="user1@example.com", is_admin=True)
+    headers = {"Authorization": f"Bearer {create_user_token(admin, timedelta(hours=1))}"}
+
+    report = {
+        "streaming_export": await measure(streaming(headers)),
+        "materialized_list": await measure(materialized(factory)),
+    }
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--rows", default="10000,100000", help="comma-separated booking counts")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    report = {}
+    for rows in (int(value) for value in args.rows.split(",")):
+        seed(url, rows)
+        report[rows] = asyncio.run(run(url, rows))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Booking history payload size and latency: full vs normalized view.
+
+Seeds one user with many bookings spread over a few events and fetches
+``GET /events/history`` with ``view=full`` (every row carries its event)
+and ``view=normalized`` (compact rows plus each event once).
+
+    python -m benchmarks.bench_booking_history --bookings 500 --events 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.security import create_user_token
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.migrations import upgrade
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+
+
+def seed(url, bookings, events):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(delete(Booking))
+        conn.execute(delete(Event))
+        conn.execute(delete(User))
+        conn.execute(insert(User), {"id": 1, "email": "fan@example.com", "hashed_password": "x", "is_admin": False})
+        date = datetime.now() + timedelta(days=60)
+        conn.execute(
+            insert(Event),
+            [{"id": i, "title": f"Festival day {i}", "description": "Three stages, forty acts. " * 8,
+              "date": date + timedelta(days=i), "venue": "Riverside Park", "total_tickets": 10**6,
+              "available_tickets": 10**6, "price": 85.0}
+             for i in range(1, events + 1)],
+        )
+        booked = datetime.now()
+        conn.execute(
+            insert(Booking),
+            [{"user_id": 1, "event_id": i % events + 1, "number_of_tickets": 1 + i % 3,
+              "booking_date": booked - timedelta(minutes=i)}
+             for i in range(bookings)],
+        )
+    engine.dispose()
+
+
+async def run(url, args):
+    engine = create_async_engine(async_database_url(url))
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    token = create_user_token(User(id=1, email="fan@example.com", is_admin=False), timedelta(hours=1))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    report = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for view in ("full", "normalized"):
+            path = f"/api/v1/events/history?view={view}&limit={args.bookings}"
+            latencies = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+            latencies.sort()
+            revalidate = await client.get(path, headers={**headers, "If-None-Match": response.headers["ETag"]})
+            report[view] = {
+                "bytes": len(response.content),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+                "revalidated_status": revalidate.status_code,
+            }
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url, args.bookings, args.events)
+    print(json.dumps(asyncio.run(run(url, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
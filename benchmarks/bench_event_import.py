@@ -0,0 +1,118 @@
+"""Throughput of the bulk event import against one POST per event.
+
+Posts the same catalog through ``POST /admin/events/bulk`` as a JSON array
+and as CSV, and through ``POST /admin/events`` one event at a time (capped
+by ``--single`` since that path is slow), and reports events per second.
+
+    python -m benchmarks.bench_event_import --events 50000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.security import create_user_token
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.migrations import upgrade
+from app.models.event import Event
+from app.models.user import User
+
+COLUMNS = ["title", "description", "date", "venue", "total_tickets", "price"]
+
+
+def reset(url):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(delete(Event))
+        conn.execute(delete(User))
+        conn.execute(insert(User), {"id": 1, "email": "admin@example.com", "hashed_password": "x", "is_admin": True})
+    engine.dispose()
+
+
+def catalog(n):
+    date = datetime.now() + timedelta(days=90)
+    return [
+        {"title": f"Event {i}", "description": "Season catalog", "date": (date + timedelta(minutes=i)).isoformat(),
+         "venue": f"Venue {i % 40}", "total_tickets": 100 + i % 900, "price": 10.0 + i % 50}
+        for i in range(n)
+    ]
+
+
+def as_csv(events):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, COLUMNS)
+    writer.writeheader()
+    writer.writerows(events)
+    return out.getvalue().encode()
+
+
+async def run(url, args):
+    engine = create_async_engine(async_database_url(url))
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    admin = User(id=1, email="admin@example.com", is_admin=True)
+    auth = {"Authorization": f"Bearer {create_user_token(admin, timedelta(hours=1))}"}
+    events = catalog(args.events)
+    bodies = {
+        "bulk_json": (json.dumps(events).encode(), "application/json"),
+        "bulk_csv": (as_csv(events), "text/csv"),
+    }
+
+    report = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        for mode, (body, content_type) in bodies.items():
+            reset(url)
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/admin/events/bulk", content=body, headers={**auth, "Content-Type": content_type}
+            )
+            elapsed = time.perf_counter() - started
+            result = response.json()
+            report[mode] = {
+                "events": result["created"],
+                "errors": len(result["errors"]),
+                "seconds": round(elapsed, 3),
+                "events_per_sec": round(result["created"] / elapsed),
+            }
+
+        reset(url)
+        single = events[: args.single]
+        started = time.perf_counter()
+        for event in single:
+            (await client.post("/api/v1/admin/events", json=event, headers=auth)).raise_for_status()
+        elapsed = time.perf_counter() - started
+        report["one_post_per_event"] = {
+            "events": len(single),
+            "seconds": round(elapsed, 3),
+            "events_per_sec": round(len(single) / elapsed),
+        }
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--single", type=int, default=1000, help="events posted one at a time")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(json.dumps(asyncio.run(run(url, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Event search latency: full-text index vs LIKE scans.
+
+Seeds a synthetic catalog (1M events by default), then runs the same
+keyword queries through ``app.services.search`` (FTS5 on SQLite, the
+tsvector index on PostgreSQL) and through the LIKE fallback that scans
+every row, reporting per-query latency for the first page of results.
+
+    python -m benchmarks.bench_event_search --events 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, insert
+
+from app.database import sync_database_url
+from app.migrations import upgrade
+from app.models.event import Event
+from app.services.search import search_events
+
+GENRES = "jazz rock opera ballet comedy poetry techno salsa blues symphony choir folk".split()
+SYLLABLES = "ka lo mi ra ven tor sul an eth dri po qua zen bel mor fi".split()
+# A few thousand made-up words; most terms are rare, like real artist names.
+VOCABULARY = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+VENUES = [f"{a.title()} {b}" for a in VOCABULARY[:200] for b in ("Hall", "Arena", "Club")]
+QUERIES = ["jazz", "jazz festival", VOCABULARY[1234], VOCABULARY[2345][:4], f"{VOCABULARY[100]} {VOCABULARY[200]}"]
+
+
+def seed(url, events):
+    rng = random.Random(42)
+    engine = create_engine(sync_database_url(url))
+    start = datetime.now() + timedelta(days=1)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(delete(Event))
+    for offset in range(0, events, 50_000):
+        rows = [
+            {
+                "title": f"{rng.choice(GENRES)} {' '.join(rng.choices(VOCABULARY, k=2))}".title(),
+                "description": " ".join(rng.choices(VOCABULARY, k=10) + ["festival"] * (i % 5 == 0)),
+                "venue": rng.choice(VENUES),
+                "date": start + timedelta(minutes=i),
+                "total_tickets": 100,
+                "available_tickets": 100,
+                "price": float(rng.randint(5, 200)),
+            }
+            for i in range(offset, min(events, offset + 50_000))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Event.__table__), rows)
+    return engine
+
+
+def timed(conn, stmt, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(stmt).all()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {"rows": len(rows), "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    started = time.perf_counter()
+    engine = seed(url, args.events)
+    report = {"events": args.events, "seed_seconds": round(time.perf_counter() - started, 1), "queries": {}}
+
+    with engine.connect() as conn:
+        for q in QUERIES:
+            report["queries"][q] = {
+                "index": timed(conn, search_events(engine.dialect.name, q).limit(args.limit), args.repeat),
+                "like_scan": timed(conn, search_events("like", q).limit(args.limit), args.repeat),
+                "index_max_price_50": timed(
+                    conn, search_events(engine.dialect.name, q, max_price=50).limit(args.limit), args.repeat
+                ),
+            }
+    engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
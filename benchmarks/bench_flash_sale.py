@@ -0,0 +1,127 @@
+"""Flash-sale booking throughput: per-request commits vs the group-commit queue.
+
+Many concurrent clients book one event through ``POST /events/{id}/book``.
+``per_request`` uses a regular event, so every booking runs its own guarded
+UPDATE and commit; ``queued`` flags the event as a flash sale, so bookings
+are admitted through ``FlashSaleQueue`` and committed in batches. Reports
+throughput, latency, commits and the final inventory check.
+
+    python -m benchmarks.bench_flash_sale --concurrency 200 --requests 4000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.security import create_user_token
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.migrations import upgrade
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.services.flash_sale import flash_sales
+
+
+def seed(url, users, tickets, flash_sale):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(delete(Booking))
+        conn.execute(delete(Event))
+        conn.execute(delete(User))
+        conn.execute(
+            insert(User),
+            [{"id": i, "email": f"user{i}@example.com", "hashed_password": "x", "is_admin": False}
+             for i in range(1, users + 1)],
+        )
+        event_id = conn.execute(
+            insert(Event).returning(Event.id),
+            {"title": "Flash sale", "description": "benchmark", "venue": "bench",
+             "date": datetime.now() + timedelta(days=1), "price": 10.0,
+             "total_tickets": tickets, "available_tickets": tickets, "flash_sale": flash_sale},
+        ).scalar_one()
+    engine.dispose()
+    return event_id
+
+
+async def run(url, mode, args):
+    event_id = seed(url, args.concurrency, args.tickets, mode == "queued")
+    flash_sales.forget()
+    engine = create_async_engine(async_database_url(url), pool_size=args.concurrency)
+    commits = 0
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def count(conn):
+        nonlocal commits
+        commits += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    tokens = [
+        create_user_token(User(id=i, email=f"user{i}@example.com", is_admin=False), timedelta(hours=1))
+        for i in range(1, args.concurrency + 1)
+    ]
+    latencies, statuses = [], {}
+    remaining = args.requests
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def client_loop(n):
+            nonlocal remaining
+            headers = {"Authorization": f"Bearer {tokens[n]}"}
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/api/v1/events/{event_id}/book",
+                    json={"event_id": event_id, "number_of_tickets": 1},
+                    headers=headers,
+                )
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    async with factory() as db:
+        available = await db.scalar(select(Event.available_tickets).where(Event.id == event_id))
+        sold = await db.scalar(select(func.coalesce(func.sum(Booking.number_of_tickets), 0)))
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "statuses": statuses,
+        "commits": commits,
+        "tickets_sold": sold,
+        "oversold": sold + available != args.tickets,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--tickets", type=int, default=3000)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    report = {mode: asyncio.run(run(url, mode, args)) for mode in ("per_request", "queued")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Client retries of bookings: no key vs Idempotency-Key (memory and database).
+
+Every logical booking is sent ``--retries`` extra times, as a mobile client
+does after a timeout, either back to back or all at once (``--concurrent``).
+Reports bookings created, tickets taken, SQL statements and latency of the
+first attempt vs the retries.
+
+    python -m benchmarks.bench_idempotency --bookings 200 --retries 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.idempotency import DatabaseIdempotencyStore, MemoryIdempotencyStore
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.models.booking import Booking
+from app.services.idempotency import idempotency_keys
+
+from benchmarks.suite.runner import percentile
+from benchmarks.suite.scenarios import API, Context
+from benchmarks.suite.seed import seed
+
+
+async def run(url, dataset, mode, args):
+    engine = create_async_engine(async_database_url(url), pool_size=20)
+    statements = {"count": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    if mode == "database":
+        idempotency_keys.store = DatabaseIdempotencyStore(lambda: factory)
+    else:
+        idempotency_keys.store = MemoryIdempotencyStore(100000, 3600)
+
+    rng = random.Random(0)
+    first, retried = [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        ctx = Context(client, dataset, rng)
+        async with factory() as db:
+            before = await db.scalar(select(func.count()).select_from(Booking))
+        statements["count"] = 0
+
+        async def attempt(path, body, headers, latencies):
+            started = time.perf_counter()
+            response = await client.post(path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            return response
+
+        for n in range(args.bookings):
+            event_id = ctx.event()
+            headers = ctx.headers(ctx.customer())
+            if mode != "none":
+                headers["Idempotency-Key"] = f"booking-{n}"
+            path, body = f"{API}/events/{event_id}/book", {"event_id": event_id, "number_of_tickets": 1}
+            if args.concurrent:
+                await asyncio.gather(
+                    attempt(path, body, headers, first),
+                    *(attempt(path, body, headers, retried) for _ in range(args.retries)),
+                )
+            else:
+                await attempt(path, body, headers, first)
+                for _ in range(args.retries):
+                    await attempt(path, body, headers, retried)
+
+        async with factory() as db:
+            created = await db.scalar(select(func.count()).select_from(Booking)) - before
+
+    await engine.dispose()
+    first.sort()
+    retried.sort()
+    return {
+        "bookings_created": created,
+        "duplicates": created - args.bookings,
+        "sql_per_attempt": round(statements["count"] / (len(first) + len(retried)), 2),
+        "first_p50_ms": percentile(first, 0.5),
+        "retry_p50_ms": percentile(retried, 0.5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--concurrent", action="store_true", help="send the retries together with the first attempt")
+    parser.add_argument("--modes", default="none,memory,database")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    results = {}
+    for mode in args.modes.split(","):
+        dataset = seed(url, 1000, 200, 1000)
+        results[mode] = asyncio.run(run(url, dataset, mode, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Overload behaviour with admission control off, static and adaptive.
+
+Requests arrive open-loop at a fixed rate above what the worker can serve
+(a browse-heavy mix with bookings in it, seeded with ``benchmarks.suite``),
+the way real traffic does not slow down because the server is slow.
+Reports, per priority class, completed requests, 503s and latency
+percentiles, so you can see whether bookings keep flowing and whether the
+requests that are admitted stay fast.
+
+    python -m benchmarks.bench_load_shedding --rate 800 --seconds 10
+"""
+import argparse
+import bisect
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.database import async_database_url, get_session_factory
+from app.main import create_app
+from app.services.event_cache import event_cache
+
+from benchmarks.suite.runner import percentile
+from benchmarks.suite.scenarios import Context, book, event_detail, list_events, search
+from benchmarks.suite.seed import seed
+
+MIX = [(list_events, "browse", 40), (event_detail, "browse", 30), (search, "browse", 15), (book, "critical", 5)]
+
+
+async def run(url, dataset, mode, args):
+    settings = get_settings().model_copy(update={
+        "overload_limit_mode": mode,
+        "overload_max_concurrency": args.limit,
+        "overload_latency_target_ms": args.target_ms,
+    })
+    app = create_app(settings)
+    engine = create_async_engine(async_database_url(url), pool_size=args.limit)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    event_cache.enabled = args.cache
+    await event_cache.clear()
+
+    latencies = defaultdict(list)
+    shed = defaultdict(int)
+    failed = defaultdict(int)
+    rng = random.Random(0)
+    operations, classes, weights = zip(*MIX)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        ctx = Context(client, dataset, rng)
+
+        async def issue(i):
+            started = time.perf_counter()
+            response = await operations[i](ctx)
+            if response.status_code == 503:
+                shed[classes[i]] += 1
+            elif response.status_code >= 400:
+                failed[classes[i]] += 1
+            else:
+                latencies[classes[i]].append(time.perf_counter() - started)
+
+        tasks = []
+        started = time.perf_counter()
+        for n in range(int(args.rate * args.seconds)):
+            delay = started + n / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(issue(rng.choices(range(len(operations)), weights)[0])))
+        await asyncio.gather(*tasks)
+
+    await engine.dispose()
+    report = {}
+    for cls in ("browse", "critical"):
+        ordered = sorted(latencies[cls])
+        report[cls] = {
+            "ok_per_s": round(len(ordered) / args.seconds, 1),
+            "goodput_per_s": round(bisect.bisect_right(ordered, args.slo_ms / 1000) / args.seconds, 1),
+            "shed": shed[cls],
+            "failed": failed[cls],
+            "p50_ms": percentile(ordered, 0.5),
+            "p99_ms": percentile(ordered, 0.99),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--rate", type=float, default=800, help="arrivals per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--limit", type=int, default=32, help="max concurrency per worker")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--slo-ms", type=float, default=1000)
+    parser.add_argument("--modes", default="off,static,adaptive")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="serve browse reads from the database")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    results = {}
+    for mode in args.modes.split(","):
+        dataset = seed(url, 1000, 500, 5000)
+        results[mode] = asyncio.run(run(url, dataset, mode, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Booking latency with and without the transactional outbox.
+
+Runs the suite's "book" scenario with the outbox off, then on with the
+worker delivering in-process to a handler that takes ``--handler-ms`` (a
+stand-in for sending a confirmation email). Doing that work inside the
+request would add ``--handler-ms`` to every booking; with the outbox the
+request pays for one INSERT and the worker's delivery lag is reported
+instead.
+
+    python -m benchmarks.bench_outbox --requests 2000 --handler-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import async_database_url
+from app.services.outbox import BOOKING_CREATED, outbox
+
+from benchmarks.suite.runner import run_scenario
+from benchmarks.suite.seed import seed
+
+
+async def run(url, dataset, enabled, args):
+    outbox.enabled = enabled
+    engine = create_async_engine(async_database_url(url), pool_size=5)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    @outbox.handler(BOOKING_CREATED)
+    async def send_confirmation(payload):
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    stop = asyncio.Event()
+    worker = asyncio.create_task(outbox.run(factory, stop, poll_interval=1.0))
+    result = await run_scenario(url, dataset, "book", args.requests, args.concurrency, 50, 0)
+
+    # Time for the worker to catch up once the bookings stop.
+    started = time.perf_counter()
+    while True:
+        await outbox.refresh_stats(factory)
+        if not outbox.pending:
+            break
+        await asyncio.sleep(0.05)
+    drained = time.perf_counter() - started
+    stop.set()
+    await worker
+    outbox.remove_handlers(BOOKING_CREATED)
+    await engine.dispose()
+
+    stats = outbox.stats()
+    return {
+        "throughput_rps": result["throughput_rps"],
+        "p50_ms": result["p50_ms"],
+        "p99_ms": result["p99_ms"],
+        "sql_per_request": result["sql_per_request"],
+        "errors": result["errors"],
+        "delivered": stats["delivered_total"],
+        "delivery_lag_seconds": stats["delivery_lag_seconds"],
+        "drain_seconds": round(drained, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--handler-ms", type=float, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    outbox.batch_size = args.batch_size
+    results = {}
+    for mode, enabled in (("off", False), ("outbox", True)):
+        dataset = seed(url, 1000, 500, 0)
+        results[mode] = asyncio.run(run(url, dataset, enabled, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
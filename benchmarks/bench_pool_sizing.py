@@ -0,0 +1,82 @@
+"""Checkout wait and throughput for several pool sizes at a fixed concurrency.
+
+Each task opens a session, runs a query and holds the connection for
+``--hold-ms`` (standing in for a request's database time). The checkout
+histogram comes from the same PoolStats the app reports on /health/ready.
+
+    python -m benchmarks.bench_pool_sizing --concurrency 50 --sizes 2,5,10,20,50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.core.pool import PoolStats, pool_options
+from app.database import async_database_url
+
+
+def quantile(snapshot, q):
+    """Upper bucket bound holding the q-th quantile of a histogram snapshot."""
+    target = q * snapshot["count"]
+    for bound, cumulative in snapshot["buckets"].items():
+        if cumulative >= target:
+            return bound
+    return "+Inf"
+
+
+async def run(url, size, args):
+    settings = get_settings().model_copy(
+        update={"db_pool_size": size, "db_max_overflow": 0, "db_pool_timeout": 60}
+    )
+    stats = PoolStats()
+    engine = create_async_engine(url, **pool_options(url, settings, stats, is_async=True))
+    stats.attach(engine.sync_engine)
+    factory = async_sessionmaker(engine)
+
+    async def worker(n):
+        for _ in range(n):
+            async with factory() as db:
+                await db.execute(select(1))
+                await asyncio.sleep(args.hold_ms / 1000)
+
+    started = time.perf_counter()
+    per_worker = args.requests // args.concurrency
+    await asyncio.gather(*(worker(per_worker) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    snapshot = stats.snapshot()
+    await engine.dispose()
+
+    checkouts = snapshot["checkout_seconds"]
+    return {
+        "pool_size": size,
+        "req_per_s": round(per_worker * args.concurrency / elapsed, 1),
+        "checkout_mean_ms": round(checkouts["sum"] / checkouts["count"] * 1000, 2),
+        "checkout_p50_le_s": quantile(checkouts, 0.5),
+        "checkout_p99_le_s": quantile(checkouts, 0.99),
+        "connects": snapshot["connects_total"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hold-ms", type=float, default=5.0)
+    parser.add_argument("--sizes", default="2,5,10,20,50")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = async_database_url(url)
+    results = [asyncio.run(run(url, int(size), args)) for size in args.sizes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Mixed traffic with reads on the primary vs on SQLite replica files.
+
+Seeds one database (``benchmarks.suite``), copies it to ``--replicas``
+files standing in for read replicas, and runs the suite's mixed scenario
+with the event cache off, so every read reaches a database. On SQLite the
+gain comes from reads no longer waiting behind the primary's write lock;
+on a server database it is the primary's CPU and I/O that is spared.
+
+    python -m benchmarks.bench_read_replicas --replicas 0,1,2 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import async_database_url, get_replica_session_factories, replica_selector
+from app.main import app
+from app.services.event_cache import event_cache
+
+from benchmarks.suite.runner import run_scenario
+from benchmarks.suite.seed import seed
+
+
+async def run(url, dataset, replicas, args):
+    engines = []
+    for index in range(replicas):
+        path = url[len("sqlite:///"):]
+        copy = f"{path}.replica{index}"
+        shutil.copyfile(path, copy)
+        engines.append(create_async_engine(async_database_url("sqlite:///" + copy), pool_size=args.concurrency))
+    factories = tuple(async_sessionmaker(engine, expire_on_commit=False) for engine in engines)
+    app.dependency_overrides[get_replica_session_factories] = lambda: factories
+    replica_selector.reads.clear()
+
+    result = await run_scenario(url, dataset, "mixed", args.requests, args.concurrency, 50, 0)
+    for engine in engines:
+        await engine.dispose()
+    return {
+        "throughput_rps": result["throughput_rps"],
+        "p50_ms": result["p50_ms"],
+        "p99_ms": result["p99_ms"],
+        "errors": result["errors"],
+        "reads": dict(replica_selector.reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", default="0,1,2")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    event_cache.enabled = False
+    results = {}
+    for replicas in (int(n) for n in args.replicas.split(",")):
+        dataset = seed(url, 1000, 500, 5000)
+        results[f"{replicas}_replicas"] = asyncio.run(run(url, dataset, replicas, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
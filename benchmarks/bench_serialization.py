@@ -0,0 +1,97 @@
+"""Per-row response serialization cost: validated vs fast JSON path.
+
+Builds in-memory event and booking-details rows and serializes them the
+way FastAPI does for a ``response_model`` (validate every row into the
+Pydantic model, dump it to JSON-compatible data, encode), and through
+``app.core.responses`` (pre-built row serializer, then orjson when
+installed). No database is involved.
+
+    python -m benchmarks.bench_serialization --sizes 100,1000,10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse, orjson
+from app.models.event import Event as EventModel
+from app.schemas.booking import BookingWithDetails, serialize_booking_details
+from app.schemas.event import Event, serialize_event
+
+
+def events(n):
+    date = datetime.now() + timedelta(days=30)
+    return [
+        EventModel(id=i, title=f"Event {i}", description="A benchmark event", date=date + timedelta(minutes=i),
+                   venue="Main Hall", total_tickets=500, available_tickets=250, price=29.99, flash_sale=False)
+        for i in range(n)
+    ]
+
+
+def booking_details(n):
+    catalog = events(50)
+    booked = datetime.now()
+    return [
+        {"id": i, "event_id": i % 50, "user_id": 7, "user_email": "user@example.com", "num_tickets": 2,
+         "total_price": 59.98, "booking_date": booked + timedelta(seconds=i), "event": catalog[i % 50]}
+        for i in range(n)
+    ]
+
+
+def validated(model):
+    adapter = TypeAdapter(List[model])
+
+    def render(rows):
+        return JSONResponse(adapter.dump_python(adapter.validate_python(rows), mode="json")).body
+
+    return render
+
+
+def fast(serializer):
+    def render(rows):
+        return FastJSONResponse([serializer(row) for row in rows]).body
+
+    return render
+
+
+def per_row_us(render, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(rows)
+        best = min(best, time.perf_counter() - started)
+    return round(best / len(rows) * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = {
+        "events": (events, validated(Event), fast(serialize_event)),
+        "booking_details": (booking_details, validated(BookingWithDetails), fast(serialize_booking_details)),
+    }
+    report = {"encoder": "orjson" if orjson else "json"}
+    for name, (build, slow_render, fast_render) in cases.items():
+        report[name] = {}
+        for size in (int(value) for value in args.sizes.split(",")):
+            rows = build(size)
+            assert json.loads(slow_render(rows)) == json.loads(fast_render(rows))
+            slow_us = per_row_us(slow_render, rows, args.repeat)
+            fast_us = per_row_us(fast_render, rows, args.repeat)
+            report[name][size] = {
+                "validated_us_per_row": slow_us,
+                "fast_us_per_row": fast_us,
+                "speedup": round(slow_us / fast_us, 1),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Import time and time to first request of the application.
+
+Each measurement runs in a fresh interpreter. ``import`` is the time to
+import ``app.main``; ``startup`` runs the lifespan (schema check, pool
+warm-up, statement precompilation); ``first_request`` and
+``second_request`` are the latencies of the first two ``GET /events/{id}``
+calls after it. ``cold`` turns the warm-up steps off for comparison.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from app.migrations import upgrade
+from app.models.event import Event
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def run():
+    import httpx
+    from app.main import create_app
+    application = create_app()
+    async with application.router.lifespan_context(application):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = []
+            for _ in range(2):
+                t = time.perf_counter()
+                (await client.get("/api/v1/events/1")).raise_for_status()
+                latencies.append(time.perf_counter() - t)
+    return ready, latencies
+
+created = time.perf_counter()
+ready, (first, second) = asyncio.run(run())
+print(json.dumps({
+    "import": imported - started,
+    "startup": ready - created,
+    "first_request": first,
+    "second_request": second,
+}))
+"""
+
+MODES = {
+    "warm": {},
+    "cold": {
+        "DB_POOL_WARM_CONNECTIONS": "0",
+        "PRECOMPILE_STATEMENTS": "false",
+        "VERIFY_SCHEMA_ON_STARTUP": "false",
+    },
+}
+
+
+def seed(url):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        conn.execute(
+            insert(Event),
+            {"id": 1, "title": "Opening night", "description": "Doors at seven",
+             "date": datetime.now() + timedelta(days=30), "venue": "Main hall",
+             "total_tickets": 100, "available_tickets": 100, "price": 40.0},
+        )
+    engine.dispose()
+
+
+def measure(env, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        key: round(statistics.median(sample[key] for sample in samples) * 1000, 1)
+        for key in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="sync URL; defaults to a temporary SQLite file")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    if not args.database_url:
+        seed(url)
+
+    env = {**os.environ, "DATABASE_URL": url}
+    env.setdefault("SECRET_KEY", "bench")
+    report = {
+        mode: measure({**env, **overrides}, args.runs) for mode, overrides in MODES.items()
+    }
+    print(json.dumps({"milliseconds": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
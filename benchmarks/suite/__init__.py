@@ -0,0 +1,7 @@
+"""Reproducible in-process load suite.
+
+Seeds a synthetic dataset (``seed``), drives weighted request mixes against
+the ASGI app (``scenarios``), and reports throughput, latency percentiles
+and SQL statements per request as JSON, optionally failing against a stored
+baseline (``baseline``). Run ``python -m benchmarks.suite --help``.
+"""
@@ -0,0 +1,38 @@
+"""Compare a report against a stored baseline report."""
+from typing import List
+
+# metric -> True if higher is better
+METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "sql_per_request": False,
+}
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Describe every metric worse than the baseline by more than ``tolerance``.
+
+    ``tolerance`` is relative (0.2 allows 20%). SQL statements per request
+    do not depend on the machine, so they get no tolerance beyond rounding.
+    New errors always count as a regression; scenarios missing from either
+    side are skipped.
+    """
+    found = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            current, expected = result[metric], base[metric]
+            allowed = 0.005 if metric == "sql_per_request" else tolerance
+            if higher_is_better:
+                worse = current < expected * (1 - allowed)
+            else:
+                worse = current > expected * (1 + allowed)
+            if worse:
+                found.append(f"{name}: {metric} {current} vs baseline {expected}")
+        if result["errors"] > base["errors"]:
+            found.append(f"{name}: {result['errors']} errors vs baseline {base['errors']}")
+    return found
@@ -0,0 +1,127 @@
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.security import identity_cache
+from app.database import async_database_url, get_session_factory
+from app.main import app
+from app.services.event_cache import event_cache
+from app.services.flash_sale import flash_sales
+
+from .scenarios import SCENARIOS, Context
+from .seed import Dataset, seed
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list, in milliseconds."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))
+    return round(ordered[index] * 1000, 3)
+
+
+def _summary(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+    }
+
+
+async def run_scenario(url: str, dataset: Dataset, name: str, requests: int, concurrency: int,
+                       warmup: int, rng_seed: int) -> dict:
+    operations, weights = zip(*SCENARIOS[name])
+    rng = random.Random(rng_seed)
+    engine = create_async_engine(async_database_url(url), pool_size=concurrency)
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    identity_cache.clear()
+    await event_cache.clear()
+    flash_sales.forget()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        ctx = Context(client, dataset, rng)
+
+        async def issue(record: bool) -> None:
+            operation = rng.choices(operations, weights)[0]
+            started = time.perf_counter()
+            response = await operation(ctx)
+            elapsed = time.perf_counter() - started
+            if record:
+                latencies[operation.__name__].append(elapsed)
+                statuses[str(response.status_code)] += 1
+
+        for _ in range(warmup):
+            await issue(record=False)
+
+        statements = 0
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await issue(record=True)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    every = [latency for values in latencies.values() for latency in values]
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        **_summary(every),
+        "throughput_rps": round(len(every) / elapsed, 1),
+        "sql_per_request": round(statements / len(every), 3),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "operations": {name: _summary(values) for name, values in sorted(latencies.items())},
+    }
+
+
+def run_suite(url: str, scenarios: List[str], users: int, events: int, bookings: int,
+              requests: int, concurrency: int, warmup: int, rng_seed: int) -> dict:
+    """Reseed before every scenario so each one starts from the same data."""
+    results = {}
+    seed_seconds = []
+    for name in scenarios:
+        dataset = seed(url, users, events, bookings, rng_seed)
+        seed_seconds.append(dataset.seconds)
+        results[name] = asyncio.run(
+            run_scenario(url, dataset, name, requests, concurrency, warmup, rng_seed)
+        )
+    return {
+        "config": {
+            "users": users,
+            "events": events,
+            "bookings": bookings,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "seed": rng_seed,
+            "database": url.split("://", 1)[0],
+        },
+        "seed_seconds": round(min(seed_seconds), 3),
+        "scenarios": results,
+    }
@@ -0,0 +1,107 @@
+"""Request mixes driven against the ASGI app.
+
+An operation picks its inputs from the seeded dataset with the run's own
+``random.Random``, sends one request and returns the response. A scenario
+is a weighted list of operations.
+"""
+import random
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from app.core.security import create_user_token
+from app.models.user import User
+
+from .seed import ADMIN_ID, Dataset
+
+API = "/api/v1"
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, dataset: Dataset, rng: random.Random):
+        self.client = client
+        self.dataset = dataset
+        self.rng = rng
+        self._tokens: Dict[int, str] = {}
+        self.cancellable: List[Tuple[int, int]] = list(dataset.bookings)
+        rng.shuffle(self.cancellable)
+
+    def headers(self, user_id: int) -> dict:
+        token = self._tokens.get(user_id)
+        if token is None:
+            user = User(id=user_id, email=f"user{user_id}@example.com", is_admin=user_id == ADMIN_ID)
+            token = self._tokens[user_id] = create_user_token(user, timedelta(hours=1))
+        return {"Authorization": f"Bearer {token}"}
+
+    def customer(self) -> int:
+        return self.rng.randrange(2, self.dataset.users + 2)
+
+    def event(self) -> int:
+        return self.rng.randrange(1, self.dataset.events + 1)
+
+
+Operation = Callable[[Context], Awaitable[httpx.Response]]
+
+
+async def list_events(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(f"{API}/events", params={"limit": 20})
+
+
+async def event_detail(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(f"{API}/events/{ctx.event()}")
+
+
+async def search(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(f"{API}/events/search", params={"q": ctx.rng.choice(ctx.dataset.words)})
+
+
+async def book(ctx: Context) -> httpx.Response:
+    event_id = ctx.event()
+    return await ctx.client.post(
+        f"{API}/events/{event_id}/book",
+        json={"event_id": event_id, "number_of_tickets": ctx.rng.randrange(1, 4)},
+        headers=ctx.headers(ctx.customer()),
+    )
+
+
+async def cancel(ctx: Context) -> httpx.Response:
+    # Each seeded booking is cancelled at most once; size runs accordingly.
+    user_id, event_id = ctx.cancellable.pop()
+    return await ctx.client.delete(f"{API}/events/{event_id}/cancel", headers=ctx.headers(user_id))
+
+
+async def history(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(
+        f"{API}/events/history",
+        params={"view": ctx.rng.choice(["full", "normalized"]), "limit": 50},
+        headers=ctx.headers(ctx.customer()),
+    )
+
+
+async def admin_report(ctx: Context) -> httpx.Response:
+    headers = ctx.headers(ADMIN_ID)
+    report = ctx.rng.randrange(3)
+    if report == 0:
+        return await ctx.client.get(f"{API}/admin/stats/daily", headers=headers)
+    if report == 1:
+        return await ctx.client.get(f"{API}/admin/events/{ctx.event()}/stats", headers=headers)
+    return await ctx.client.get(f"{API}/admin/booking", params={"limit": 100}, headers=headers)
+
+
+SCENARIOS: Dict[str, List[Tuple[Operation, int]]] = {
+    "browse": [(list_events, 5), (event_detail, 4), (search, 1)],
+    "book": [(book, 1)],
+    "cancel": [(cancel, 1)],
+    "history": [(history, 1)],
+    "admin": [(admin_report, 1)],
+    "mixed": [
+        (list_events, 30),
+        (event_detail, 25),
+        (search, 10),
+        (history, 15),
+        (book, 12),
+        (cancel, 5),
+        (admin_report, 3),
+    ],
+}
@@ -0,0 +1,106 @@
+"""Deterministic synthetic dataset, written with executemany bulk inserts."""
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, delete, insert
+
+from app.migrations import upgrade
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.hold import TicketHold
+from app.models.sales import EventSalesDaily
+from app.models.user import User
+from app.services.rollups import rebuild_rollups
+
+CHUNK = 5000
+
+GENRES = ["jazz", "rock", "opera", "comedy", "ballet", "techno", "folk", "theatre", "poetry", "blues"]
+KINDS = ["festival", "night", "matinee", "tour", "showcase", "gala", "session", "marathon"]
+VENUES = ["Riverside Park", "Main Hall", "Old Theatre", "Harbour Arena", "City Library", "Warehouse 9"]
+
+# Seeded user 1 is the admin; customers are 2..users+1.
+ADMIN_ID = 1
+
+
+@dataclass
+class Dataset:
+    users: int
+    events: int
+    bookings: List[Tuple[int, int]]  # (user_id, event_id) pairs, each booked once
+    words: List[str]
+    seconds: float
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def seed(url: str, users: int, events: int, bookings: int, seed: int = 0) -> Dataset:
+    """Replace the database contents with a generated dataset.
+
+    The same arguments always produce the same rows. Every (user, event)
+    pair is booked at most once so cancellations have a known target, and
+    inventory and the daily rollups agree with the bookings.
+    """
+    if bookings > users * events:
+        raise ValueError("more bookings than distinct (user, event) pairs")
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    now = datetime.now().replace(microsecond=0)
+
+    user_rows = [
+        {"id": i, "email": f"user{i}@example.com", "hashed_password": "x", "is_admin": i == ADMIN_ID}
+        for i in range(1, users + 2)
+    ]
+    pairs = set()
+    while len(pairs) < bookings:
+        pairs.add((rng.randrange(2, users + 2), rng.randrange(1, events + 1)))
+    pairs = sorted(pairs)
+    per_event = Counter(event_id for _, event_id in pairs)
+
+    event_rows = []
+    for i in range(1, events + 1):
+        genre, kind = rng.choice(GENRES), rng.choice(KINDS)
+        # Room for up to 4 tickets per seeded booking on top of the stock.
+        total = rng.randrange(1000, 5000) + 4 * per_event[i]
+        event_rows.append({
+            "id": i,
+            "title": f"{genre.title()} {kind} {i}",
+            "description": f"A {genre} {kind} with {rng.choice(GENRES)} guests.",
+            "date": now + timedelta(days=rng.randrange(1, 180), hours=rng.randrange(24)),
+            "venue": rng.choice(VENUES),
+            "total_tickets": total,
+            "available_tickets": total,
+            "price": float(rng.randrange(10, 200)),
+        })
+
+    booking_rows = []
+    for user_id, event_id in pairs:
+        event = event_rows[event_id - 1]
+        tickets = rng.randrange(1, 5)
+        event["available_tickets"] -= tickets
+        booking_rows.append({
+            "user_id": user_id,
+            "event_id": event_id,
+            "number_of_tickets": tickets,
+            "unit_price": event["price"],
+            "booking_date": now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+        })
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        upgrade(conn)
+        for model in (TicketHold, EventSalesDaily, Booking, Event, User):
+            conn.execute(delete(model))
+        for model, rows in ((User, user_rows), (Event, event_rows), (Booking, booking_rows)):
+            for chunk in _chunks(rows):
+                conn.execute(insert(model.__table__), chunk)
+        rebuild_rollups(conn)
+    engine.dispose()
+
+    return Dataset(users, events, pairs, GENRES + KINDS, time.perf_counter() - started)